@@ -3,18 +3,32 @@ app package initialization.
 This package contains the core functionality for:
 - Scraping Goodreads shelves (goodreads_scraper.py)
 - Searching SkupSzop for prices (skupszop_search.py)
+- The batch command line (`python -m app`, cli.py)
+
+The public functions are imported on first use, so `import app` stays cheap.
 """
-from .goodreads_scraper import (
-    scrape_goodreads_shelf,
-    save_to_csv,
-    run_goodreads_scraper,
-)
+import importlib
+
+# public name -> module it lives in
+_EXPORTS = {
+    "scrape_goodreads_shelf": "app.goodreads_scraper",
+    "save_to_csv": "app.goodreads_scraper",
+    "run_goodreads_scraper": "app.goodreads_scraper",
+    "run_skupszop_search": "app.skupszop_search",
+    "is_title_similar": "app.matching",
+    "is_author_match": "app.matching",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    "scrape_goodreads_shelf",
-    "save_to_csv",
-    "run_goodreads_scraper",
-    "run_skupszop_search",
-    "is_title_similar",
-    "is_author_match",
-]
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
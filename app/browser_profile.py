@@ -0,0 +1,149 @@
+import fnmatch
+import logging
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# only div.product-card text is read, so none of these are needed
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet", "texttrack", "manifest")
+DEFAULT_BLOCKED_URL_PATTERNS = (
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*connect.facebook.*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*cookiebot.com*",
+    "*cookielaw.org*",
+    "*onetrust.com*",
+)
+
+# rough transfer sizes used to estimate the bytes not downloaded
+TYPICAL_RESOURCE_BYTES = {
+    "image": 40_000,
+    "media": 200_000,
+    "font": 45_000,
+    "stylesheet": 60_000,
+    "script": 80_000,
+}
+DEFAULT_RESOURCE_BYTES = 10_000
+
+# consent already given ("Zezwól na wszystkie"), so no banner click is needed
+CONSENT_STORAGE_STATE = {
+    "cookies": [
+        {
+            "name": "CookieConsent",
+            "value": "{stamp:%27-1%27%2Cnecessary:true%2Cpreferences:true%2Cstatistics:true"
+                     "%2Cmarketing:true%2Cmethod:%27explicit%27%2Cver:1%2Cregion:%27pl%27}",
+            "domain": ".skupszop.pl",
+            "path": "/",
+            "expires": time.time() + 365 * 24 * 60 * 60,
+            "httpOnly": False,
+            "secure": True,
+            "sameSite": "Lax",
+        }
+    ],
+    "origins": [],
+}
+
+
+class BrowserProfile:
+    """
+    Request interception for the search browser context.
+    A request is blocked when its resource type or URL is on a deny list,
+    unless its URL matches `allowed_url_patterns`. URL patterns are fnmatch globs.
+    """
+
+    def __init__(self, blocked_resource_types=DEFAULT_BLOCKED_RESOURCE_TYPES,
+                 blocked_url_patterns=DEFAULT_BLOCKED_URL_PATTERNS, allowed_url_patterns=(),
+                 storage_state=CONSENT_STORAGE_STATE):
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.blocked_url_patterns = tuple(blocked_url_patterns)
+        self.allowed_url_patterns = tuple(allowed_url_patterns)
+        self.storage_state = storage_state
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.blocked_by_type = Counter()
+        self.bytes_loaded = 0
+
+    # with consent pre-seeded the cookie banner click can be skipped
+    @property
+    def skips_consent(self):
+        return self.storage_state is not None
+
+    def should_block(self, resource_type, url):
+        if any(fnmatch.fnmatchcase(url, pattern) for pattern in self.allowed_url_patterns):
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        return any(fnmatch.fnmatchcase(url, pattern) for pattern in self.blocked_url_patterns)
+
+    def _decide(self, request):
+        if self.should_block(request.resource_type, request.url):
+            self.requests_blocked += 1
+            self.blocked_by_type[request.resource_type] += 1
+            return False
+        self.requests_allowed += 1
+        return True
+
+    def _on_response(self, response):
+        try:
+            self.bytes_loaded += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    async def _route_async(self, route):
+        if self._decide(route.request):
+            await route.continue_()
+        else:
+            await route.abort()
+
+    def _route_sync(self, route):
+        if self._decide(route.request):
+            route.continue_()
+        else:
+            route.abort()
+
+    def context_options(self):
+        return {"storage_state": self.storage_state} if self.storage_state is not None else {}
+
+    async def apply(self, context):
+        await context.route("**/*", self._route_async)
+        context.on("response", self._on_response)
+
+    def apply_sync(self, context):
+        context.route("**/*", self._route_sync)
+        context.on("response", self._on_response)
+
+    @property
+    def estimated_bytes_saved(self):
+        return sum(TYPICAL_RESOURCE_BYTES.get(kind, DEFAULT_RESOURCE_BYTES) * count
+                   for kind, count in self.blocked_by_type.items())
+
+    def stats(self):
+        return {
+            "requests_allowed": self.requests_allowed,
+            "requests_blocked": self.requests_blocked,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "bytes_loaded": self.bytes_loaded,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+        }
+
+    def log_stats(self):
+        if self.requests_allowed or self.requests_blocked:
+            logger.info(
+                f"Browser profile: {self.requests_blocked} requests blocked "
+                f"(~{self.estimated_bytes_saved / 1024:.0f} KB saved), "
+                f"{self.requests_allowed} allowed ({self.bytes_loaded / 1024:.0f} KB loaded)"
+            )
+
+
+# "lean" -> default profile, None -> plain browser, or a BrowserProfile
+def resolve_profile(profile):
+    if profile == "lean":
+        return BrowserProfile()
+    if profile is None or isinstance(profile, BrowserProfile):
+        return profile
+    raise ValueError(f"Unknown browser profile: {profile!r}")
@@ -0,0 +1,216 @@
+"""
+Batch command line for cron jobs (`python -m app`).
+
+    python -m app scrape <shelf url>       Goodreads shelf -> books.csv
+    python -m app search                   books.csv -> SkupSzop prices
+    python -m app run <shelf url>          both, streaming the shelf into the search
+
+Books (scrape) and saved offers (search, run) are printed to stdout as JSON
+lines, followed by one "done" (or "error") line; logs, and anything else
+printed while a command runs, go to stderr. Engine modules are imported by
+the command that needs them, so `--help` starts instantly.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+from app import paths as p
+
+# exit codes
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_FAILED_SEARCHES = 3  # some books still failed after their retries
+EXIT_NO_BOOKS = 4  # the shelf (or books CSV) was empty or could not be read
+EXIT_INTERRUPTED = 130
+
+logger = logging.getLogger("app.cli")
+
+
+# 20 stays 20, so search URLs and run keys match the library defaults
+def price(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+# one JSON object per line on the command's stdout, flushed right away so a pipe sees it
+def emit(out, event, **fields):
+    out.write(json.dumps({"event": event, **fields}, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app", description="Books wishlist price checker (batch mode)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="read a Goodreads shelf into a books CSV")
+    scrape.add_argument("url", help="Goodreads shelf URL")
+    scrape.add_argument("--books", default=p.BOOKS_CSV, help="books CSV to write")
+    scrape.add_argument("--incremental", action="store_true", help="only page until the first known review")
+    scrape.add_argument("--concurrent", action="store_true", help="fetch shelf pages in parallel")
+
+    search = commands.add_parser("search", help="search SkupSzop for the books of a CSV")
+    search.add_argument("--books", default=p.BOOKS_CSV, help="books CSV to read")
+    add_search_options(search)
+
+    run = commands.add_parser("run", help="read a Goodreads shelf and search its books as they arrive")
+    run.add_argument("url", help="Goodreads shelf URL")
+    run.add_argument("--books", default=None, help="also write the shelf to this books CSV")
+    add_search_options(run)
+    return parser
+
+
+def add_search_options(parser):
+    parser.add_argument("--output", default=p.SKUPSZOP_CSV, help="prices file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--min-price", type=price, default=0)
+    parser.add_argument("--max-price", type=price, default=20)
+    parser.add_argument("--backend", default="http", choices=("http", "playwright"))
+    parser.add_argument("--base-url", default=None, help="search site (default: https://skupszop.pl)")
+    parser.add_argument("--concurrency", type=int, default=10, help="searches in flight")
+    parser.add_argument("--cache", action="store_true", help="reuse recent searches (search_cache.sqlite3)")
+    parser.add_argument("--recheck", action="store_true", help="only search books that are due (recheck.sqlite3)")
+    parser.add_argument("--history", action="store_true", help="append saved offers to price_history.sqlite3")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run with the same output")
+    parser.add_argument("--no-retry", action="store_true", help="drop failed searches instead of retrying them")
+    parser.add_argument("--progress", action="store_true", help="also print a progress line per book")
+
+
+def scrape(args):
+    from app.goodreads_scraper import save_to_csv, scrape_goodreads_shelf, sync_goodreads_shelf
+
+    if args.incremental:
+        books = sync_goodreads_shelf(args.url, delay=1.5, max_pages=100, debug=False)
+    else:
+        books = scrape_goodreads_shelf(args.url, delay=1.5, max_pages=100, debug=False, concurrent=args.concurrent)
+    if not books:
+        emit(args.out, "error", command="scrape", message="no books on the shelf")
+        return EXIT_NO_BOOKS
+    for book in books:
+        emit(args.out, "book", title=book.get("title", "Unknown title"), author=book.get("author", "Unknown"))
+    saved = save_to_csv(books, filename=args.books)
+    emit(args.out, "done", command="scrape", books=saved, output=args.books)
+    return EXIT_OK
+
+
+def search(args):
+    import asyncio
+    from app.metrics import Metrics
+    from app.result_sink import to_record
+    from app.retry import RetryQueue
+
+    books = None
+    if args.command == "search":
+        import csv
+        with open(args.books, newline="", encoding="utf-8-sig") as f:
+            books = list(csv.DictReader(f))
+        if not books:
+            emit(args.out, "error", command="search", message=f"no books in {args.books}")
+            return EXIT_NO_BOOKS
+
+    # the on-disk stores are only opened (and imported) when asked for
+    cache = recheck = history = None
+    if args.cache:
+        from app.search_cache import SearchCache
+        cache = SearchCache()
+    if args.recheck:
+        from app.recheck import RecheckScheduler
+        recheck = RecheckScheduler()
+    if args.history:
+        from app.price_history import PriceHistory
+        history = PriceHistory()
+
+    counts = {"offers": 0}
+    # retried books report progress again
+    searched = set()
+
+    def on_result(row):
+        counts["offers"] += 1
+        emit(args.out, "offer", **to_record(row))
+
+    def on_progress(current, total, title, author):
+        searched.add(current)
+        if args.progress:
+            emit(args.out, "progress", book=current, total=total, title=title, author=author)
+
+    retry = False if args.no_retry else RetryQueue()
+    # counts the shelf books the pipeline read
+    metrics = Metrics()
+    output_existed = os.path.exists(args.output)
+    options = dict(
+        min_price=args.min_price,
+        max_price=args.max_price,
+        progress_callback=on_progress,
+        result_callback=on_result,
+        max_concurrent_pages=args.concurrency,
+        backend=args.backend,
+        cache=cache,
+        recheck=recheck,
+        history=history,
+        resume=args.resume,
+        retry=retry,
+        metrics=metrics,
+    )
+    if args.base_url:
+        options["base_url"] = args.base_url
+    try:
+        if args.command == "run":
+            from app.pipeline import run_pipeline_async
+            asyncio.run(run_pipeline_async(args.url, args.output, books_csv=args.books, **options))
+        else:
+            from app.skupszop_search_async import run_skupszop_search_async
+            asyncio.run(run_skupszop_search_async(output_csv=args.output, books=books, **options))
+    finally:
+        for store in (cache, recheck, history):
+            if store is not None:
+                store.close()
+
+    if args.command == "run" and not metrics.snapshot()["counters"].get("goodreads_books"):
+        # don't leave an empty output behind for a shelf that couldn't be read
+        if not output_existed and os.path.exists(args.output):
+            os.remove(args.output)
+        emit(args.out, "error", command="run", message="no books on the shelf")
+        return EXIT_NO_BOOKS
+
+    failed = [] if args.no_retry else retry.summary()["failed"]
+    emit(args.out, "done", command=args.command, searched=len(searched), offers=counts["offers"],
+         failed=failed, output=args.output)
+    return EXIT_FAILED_SEARCHES if failed else EXIT_OK
+
+
+COMMANDS = {"scrape": scrape, "search": search, "run": search}
+
+
+def main(argv=None):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        # --help exits with 0, bad arguments with 2
+        return e.code
+
+    # configured before the engine modules are imported, so their basicConfig is a no-op
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        stream=sys.stderr)
+
+    # stdout carries only the JSON lines; stray prints of the engine go to stderr
+    args.out = sys.stdout
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            code = COMMANDS[args.command](args)
+    except KeyboardInterrupt:
+        logger.warning("Interrupted")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        logger.exception(f"{args.command} failed")
+        emit(args.out, "error", command=args.command, message=str(e))
+        return EXIT_ERROR
+    logger.info(f"{args.command} finished in {time.perf_counter() - start:.2f}s (exit code {code})")
+    return code
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# outcome of one search request
+OK = "ok"
+TIMEOUT = "timeout"
+THROTTLED = "throttled"
+SERVER_ERROR = "server_error"
+ERROR = "error"
+# the page loaded, but has neither product cards nor a known no-results text:
+# counted as no results, without backing off or tripping the circuit breaker
+NO_CARDS = "no_cards"
+
+BACKOFF_OUTCOMES = frozenset({TIMEOUT, THROTTLED, SERVER_ERROR})
+FAILED_OUTCOMES = BACKOFF_OUTCOMES | {ERROR}
+
+
+def classify_status(status):
+    if status == 429:
+        return THROTTLED
+    if status >= 500:
+        return SERVER_ERROR
+    if status >= 400:
+        return ERROR
+    return OK
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+class FixedLimiter:
+    """Constant concurrency limit, the behaviour of a plain Semaphore."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, latency, outcome):
+        pass
+
+
+class AdaptiveLimiter(FixedLimiter):
+    """
+    AIMD concurrency limit. Every `window` samples the limit grows by `increase`
+    while p90 latency stays under `latency_target` and the error rate under
+    `error_threshold`; otherwise, and right away on timeouts, HTTP 429 and 5xx,
+    it is multiplied by `decrease_factor` (at most once per `cooldown` seconds).
+    `on_change(limit, reason, stats)` is called on every change.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=10, latency_target=5.0, error_threshold=0.1,
+                 window=20, increase=1, decrease_factor=0.5, cooldown=2.0, on_change=None):
+        super().__init__(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.window = window
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.decisions = []
+        self._samples = []
+        self._peak_in_flight = 0
+        self._last_decrease = float("-inf")
+
+    async def acquire(self):
+        await super().acquire()
+        self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+
+    def record(self, latency, outcome):
+        self._samples.append((latency, outcome))
+        if outcome in BACKOFF_OUTCOMES:
+            self._decrease(outcome)
+        if len(self._samples) >= self.window:
+            self._evaluate()
+
+    def window_stats(self):
+        if not self._samples:
+            return {"p90_latency": None, "error_rate": None, "samples": 0}
+        errors = sum(1 for _, outcome in self._samples if outcome in FAILED_OUTCOMES)
+        return {
+            "p90_latency": percentile([latency for latency, _ in self._samples], 0.9),
+            "error_rate": errors / len(self._samples),
+            "samples": len(self._samples),
+        }
+
+    def _evaluate(self):
+        stats = self.window_stats()
+        saturated = self._peak_in_flight >= self.limit
+        self._samples = []
+        self._peak_in_flight = self.in_flight
+        if stats["error_rate"] > self.error_threshold:
+            self._decrease("error_rate", stats)
+        elif stats["p90_latency"] > self.latency_target:
+            self._decrease("latency", stats)
+        elif saturated:
+            # only grow when the current limit was actually used
+            self._set_limit(min(self.max_limit, self.limit + self.increase), "healthy", stats)
+
+    def _decrease(self, reason, stats=None):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(max(self.min_limit, int(self.limit * self.decrease_factor)), reason, stats)
+
+    def _set_limit(self, limit, reason, stats=None):
+        if limit == self.limit:
+            return
+        previous, self.limit = self.limit, limit
+        stats = stats if stats is not None else self.window_stats()
+        self.decisions.append((time.time(), previous, limit, reason))
+        logger.info(f"Concurrency {previous} -> {limit} ({reason})")
+        self._wake()
+        if self.on_change:
+            try:
+                self.on_change(limit, reason, stats)
+            except Exception:
+                pass
@@ -1,11 +1,39 @@
 #!/usr/bin/env python3
 import requests
 from bs4 import BeautifulSoup
+import asyncio
 import csv
+import json
+import logging
+import os
 import time
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 import random
+import re
 from app import paths as p
+from app.metrics import NULL_METRICS
+
+logger = logging.getLogger(__name__)
+
+# lxml (C) parses shelf pages much faster; without it the BeautifulSoup path is used
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# largest page size offered by the shelf view ("per page" dropdown)
+GOODREADS_MAX_PER_PAGE = 100
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'DNT': '1',
+    'Connection': 'keep-alive'
+}
 
 
 # [0] removing series name from book title
@@ -18,21 +46,130 @@ def extract_main_title(title_element) -> str:
     
     return title_element.get_text(strip=True)
 
+def new_session(pool_size: int = 10) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    # keep-alive pool sized for the number of concurrent fetches
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def with_query(url: str, **params) -> str:
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+def build_page_url(url: str, page: int, per_page: Optional[int] = None) -> str:
+    if per_page:
+        return with_query(url, page=page, per_page=per_page)
+    return with_query(url, page=page)
+
+# total page count from the shelf pagination (1 if there is none)
+def get_total_pages(soup) -> int:
+    numbers = [
+        int(elem.get_text(strip=True))
+        for elem in soup.select('#reviewPagination a, #reviewPagination em')
+        if elem.get_text(strip=True).isdigit()
+    ]
+    return max(numbers) if numbers else 1
+
+def has_next_page(soup) -> bool:
+    next_button = soup.find('a', class_='next_page')
+    return bool(next_button) and 'disabled' not in next_button.get('class', [])
+
+# parsing one shelf page -> (books, has next page, total pages)
+def parse_shelf_page(html: bytes) -> Tuple[List[Dict[str, str]], bool, int]:
+    if lxml_html is not None:
+        return parse_shelf_page_lxml(html)
+    return parse_shelf_page_soup(html)
+
+def parse_shelf_page_soup(html: bytes) -> Tuple[List[Dict[str, str]], bool, int]:
+    soup = BeautifulSoup(html, 'html.parser')
+    books = []
+    for row in soup.select('tr[id^="review_"]'):
+        book_data = extract_book_info(row)
+        if book_data:
+            book_data['review_id'] = row.get('id', '')[len('review_'):]
+            books.append(book_data)
+    return books, has_next_page(soup), get_total_pages(soup)
+
+# [0a] fast path: only the review rows and the pagination are parsed, with lxml
+if lxml_html is not None:
+    _HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+    _HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+    _REVIEW_ROWS = etree.XPath("//tr[starts-with(@id, 'review_')]")
+    # title and author cells of a row in one query
+    _ROW_CELLS = etree.XPath(f"./td[{_HAS_CLASS.format('title')} or {_HAS_CLASS.format('author')}]")
+    # text the way extract_main_title/get_text(strip=True) read it, series span excluded
+    _LINK_TEXT = etree.XPath(f".//text()[not(ancestor::span[{_HAS_CLASS.format('darkGreyText')}])]")
+    _PAGE_NUMBERS = etree.XPath("//div[@id='reviewPagination']//*[self::a or self::em]")
+    _NEXT_PAGE_CLASS = etree.XPath(f"(//a[{_HAS_CLASS.format('next_page')}])[1]/@class")
+
+_REVIEW_ROW_START = re.compile(rb'<tr\b[^>]*?\bid\s*=\s*["\']?review_', re.IGNORECASE)
+_PAGINATION_START = re.compile(rb'<div\b[^>]*?\bid\s*=\s*["\']?reviewPagination\b', re.IGNORECASE)
+
+def _review_region(html: bytes) -> Optional[bytes]:
+    """Review rows and pagination cut out of the page (None if the rows aren't found)."""
+    rows = list(_REVIEW_ROW_START.finditer(html))
+    if not rows:
+        return None
+    end = html.find(b'</tr>', rows[-1].end())
+    if end < 0:
+        return None
+    region = b'<html><body><table>' + html[rows[0].start():end + len(b'</tr>')] + b'</table>'
+    pagination = _PAGINATION_START.search(html)
+    if pagination is not None:
+        pagination_end = html.find(b'</div>', pagination.end())
+        if pagination_end >= 0:
+            region += html[pagination.start():pagination_end + len(b'</div>')]
+    return region + b'</body></html>'
+
+def _link_text(link) -> str:
+    return ''.join(text.strip() for text in _LINK_TEXT(link))
+
+def parse_shelf_page_lxml(html: bytes) -> Tuple[List[Dict[str, str]], bool, int]:
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    region = _review_region(html)
+    root = lxml_html.document_fromstring(region if region is not None else html, parser=_HTML_PARSER)
+
+    books = []
+    for row in _REVIEW_ROWS(root):
+        book_data = {}
+        for cell in _ROW_CELLS(row):
+            link = cell.find('.//a')
+            if link is None:
+                continue
+            key = 'title' if 'title' in cell.get('class', '').split() else 'author'
+            book_data.setdefault(key, _link_text(link))
+        if 'title' not in book_data:
+            # other layout: the selector chain on this row only
+            book_data = extract_book_info(BeautifulSoup(etree.tostring(row, encoding='unicode'), 'html.parser'))
+        if book_data:
+            book_data['review_id'] = row.get('id', '')[len('review_'):]
+            books.append(book_data)
+
+    numbers = [int(text) for text in (elem.text_content().strip() for elem in _PAGE_NUMBERS(root)) if text.isdigit()]
+    next_class = _NEXT_PAGE_CLASS(root)
+    has_next = bool(next_class) and 'disabled' not in next_class[0].split()
+    return books, has_next, max(numbers) if numbers else 1
+
 # [1] scraping Goodreads shelf given by user (URL)
-def scrape_goodreads_shelf(url: str, delay: float = 1.5, debug: bool = True, max_pages: int = 100) -> List[Dict[str, str]]:
+def scrape_goodreads_shelf(url: str, delay: float = 1.5, debug: bool = True, max_pages: int = 100,
+                           concurrent: bool = False, max_concurrency: int = 8, metrics=None) -> List[Dict[str, str]]:
+    if concurrent:
+        return asyncio.run(scrape_goodreads_shelf_async(
+            url, debug=debug, max_pages=max_pages, max_concurrency=max_concurrency, metrics=metrics))
+
+    metrics = metrics or NULL_METRICS
+
     books = []
     page = 1
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'DNT': '1',
-        'Connection': 'keep-alive'
-    }
-
     session = requests.Session()
-    session.headers.update(headers)
+    session.headers.update(HEADERS)
 
     # iterating pages
     while page <= max_pages:
@@ -41,29 +178,28 @@ def scrape_goodreads_shelf(url: str, delay: float = 1.5, debug: bool = True, max
             print(f"\nFetching page {page}: {current_url}")
 
         try:
-            response = session.get(current_url, timeout=10)
+            with metrics.span("goodreads_fetch"):
+                response = session.get(current_url, timeout=10)
             response.raise_for_status()
         except requests.RequestException as e:
-            print(f"Error fetching page {page}: {e}")
+            logger.warning(f"Error fetching page {page}: {e}")
+            metrics.count("goodreads_errors")
             break
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        book_rows = soup.select('tr[id^="review_"]')
+        with metrics.span("goodreads_parse"):
+            page_books, has_next, _ = parse_shelf_page(response.content)
+        metrics.count("goodreads_pages")
+        metrics.count("goodreads_books", len(page_books))
 
         # if no results
-        if not book_rows:
+        if not page_books:
             if debug:
                 print(f"No books found on page {page}.")
             break
         
-        # parsing
-        for row in book_rows:
-            book_data = extract_book_info(row)
-            if book_data:
-                books.append(book_data)
-
-        next_button = soup.find('a', class_='next_page')
-        if not next_button or 'disabled' in next_button.get('class', []):
+        books.extend(page_books)
+
+        if not has_next:
             break
 
         time.sleep(delay + random.uniform(0.01, 0.05))
@@ -71,6 +207,180 @@ def scrape_goodreads_shelf(url: str, delay: float = 1.5, debug: bool = True, max
 
     return books
 
+# [1a] concurrent mode: page 1 gives the page count, the rest is fetched in parallel
+async def iter_goodreads_shelf_pages(url: str, debug: bool = True, max_pages: int = 100,
+                                     max_concurrency: int = 8, per_page: int = GOODREADS_MAX_PER_PAGE,
+                                     parse_executor=None, metrics=None) -> AsyncIterator[List[Dict[str, str]]]:
+    """Yields the books of each shelf page in shelf order, as soon as that page is parsed."""
+    metrics = metrics or NULL_METRICS
+    loop = asyncio.get_running_loop()
+    session = new_session(pool_size=max_concurrency)
+    # blocking requests calls run in their own pool, parsing in parse_executor
+    io_executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    own_parse_executor = parse_executor is None
+    if own_parse_executor:
+        parse_executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    pending = []
+
+    async def fetch_page(page: int):
+        current_url = build_page_url(url, page, per_page)
+        async with semaphore:
+            if debug:
+                print(f"\nFetching page {page}: {current_url}")
+            try:
+                with metrics.span("goodreads_fetch"):
+                    response = await loop.run_in_executor(
+                        io_executor, lambda: session.get(current_url, timeout=10))
+                response.raise_for_status()
+            except requests.RequestException as e:
+                logger.warning(f"Error fetching page {page}: {e}")
+                metrics.count("goodreads_errors")
+                return None
+        with metrics.span("goodreads_parse"):
+            result = await loop.run_in_executor(parse_executor, parse_shelf_page, response.content)
+        metrics.count("goodreads_pages")
+        metrics.count("goodreads_books", len(result[0]))
+        return result
+
+    try:
+        first = await fetch_page(1)
+        if first is None:
+            return
+        books, has_next, total_pages = first
+        if not books:
+            if debug:
+                print("No books found on page 1.")
+            return
+        yield books
+        if not has_next:
+            return
+
+        if total_pages < 2:
+            # no page count in the markup -> walk the remaining pages one by one
+            page = 2
+            while page <= max_pages:
+                result = await fetch_page(page)
+                if result is None or not result[0]:
+                    break
+                yield result[0]
+                if not result[1]:
+                    break
+                page += 1
+            return
+
+        last_page = min(total_pages, max_pages)
+        pending = [asyncio.ensure_future(fetch_page(page)) for page in range(2, last_page + 1)]
+
+        # keep shelf order; stop at the first failed or empty page like the sequential mode
+        for page, task in enumerate(pending, start=2):
+            result = await task
+            if result is None or not result[0]:
+                if debug:
+                    print(f"No books found on page {page}.")
+                break
+            yield result[0]
+    finally:
+        for task in pending:
+            task.cancel()
+        io_executor.shutdown(wait=False)
+        if own_parse_executor:
+            parse_executor.shutdown(wait=False)
+        session.close()
+
+async def scrape_goodreads_shelf_async(url: str, debug: bool = True, max_pages: int = 100,
+                                       max_concurrency: int = 8, per_page: int = GOODREADS_MAX_PER_PAGE,
+                                       parse_executor=None, metrics=None) -> List[Dict[str, str]]:
+    books = []
+    async for page_books in iter_goodreads_shelf_pages(url, debug, max_pages, max_concurrency, per_page,
+                                                       parse_executor, metrics):
+        books.extend(page_books)
+    return books
+
+# [1b] incremental sync: newest-first paging that stops at the first known review
+def load_shelf_snapshot(url: str, path: str = p.SHELF_SNAPSHOTS_JSON) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get(url, {})
+
+def save_shelf_snapshot(url: str, snapshot: Dict, path: str = p.SHELF_SNAPSHOTS_JSON):
+    snapshots = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            snapshots = json.load(f)
+    snapshots[url] = snapshot
+    with open(p.ensure_parent(path), 'w', encoding='utf-8') as f:
+        json.dump(snapshots, f, ensure_ascii=False)
+
+def sync_goodreads_shelf(url: str, snapshot_path: str = p.SHELF_SNAPSHOTS_JSON, delay: float = 1.5,
+                         debug: bool = True, max_pages: int = 100,
+                         per_page: int = GOODREADS_MAX_PER_PAGE) -> List[Dict[str, str]]:
+    """Shelf newest-first: new reviews merged in front of the stored snapshot."""
+    snapshot = load_shelf_snapshot(url, snapshot_path)
+    known_books = snapshot.get('books', [])
+    known_ids = {book['review_id'] for book in known_books}
+    newest_first_url = with_query(url, sort='date_added', order='d')
+
+    session = new_session(pool_size=1)
+    try:
+        new_books = []
+        etag = last_modified = None
+        page = 1
+
+        while page <= max_pages:
+            current_url = build_page_url(newest_first_url, page, per_page)
+            if debug:
+                print(f"\nFetching page {page}: {current_url}")
+
+            headers = {}
+            if page == 1 and known_books:
+                if snapshot.get('etag'):
+                    headers['If-None-Match'] = snapshot['etag']
+                if snapshot.get('last_modified'):
+                    headers['If-Modified-Since'] = snapshot['last_modified']
+
+            try:
+                response = session.get(current_url, headers=headers, timeout=10)
+                if response.status_code == 304:
+                    if debug:
+                        print("Shelf not modified since the last sync.")
+                    return known_books
+                response.raise_for_status()
+            except requests.RequestException as e:
+                # keep the old snapshot; the next sync starts from it again
+                logger.warning(f"Error fetching page {page}: {e}")
+                return new_books + known_books
+
+            if page == 1:
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+            page_books, has_next, _ = parse_shelf_page(response.content)
+            if not page_books:
+                break
+
+            reached_known = False
+            for book in page_books:
+                if book['review_id'] in known_ids:
+                    reached_known = True
+                    break
+                new_books.append(book)
+
+            if reached_known or not has_next:
+                break
+
+            time.sleep(delay + random.uniform(0.01, 0.05))
+            page += 1
+    finally:
+        session.close()
+
+    if debug:
+        print(f"{len(new_books)} new books since the last sync.")
+    books = new_books + known_books
+    save_shelf_snapshot(url, {'books': books, 'etag': etag, 'last_modified': last_modified}, snapshot_path)
+    return books
+
 # [2] extracting title & author
 def extract_book_info(element) -> Dict[str, str]:
     book_info = {}
@@ -112,7 +422,7 @@ def save_to_csv(books: List[Dict[str, str]], filename: str = p.BOOKS_CSV):
 
     books = list(reversed(books))
 
-    with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
+    with open(p.ensure_parent(filename), 'w', newline='', encoding='utf-8-sig') as csvfile:
         fieldnames = ['Title', 'Author']
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
@@ -124,8 +434,12 @@ def save_to_csv(books: List[Dict[str, str]], filename: str = p.BOOKS_CSV):
     return len(books)
 
 # [4] main function used by streamlit_app.py
-def run_goodreads_scraper(url: str, output_csv: str = p.BOOKS_CSV) -> int:
-    books = scrape_goodreads_shelf(url, delay=1.5, max_pages=100, debug=False)
+def run_goodreads_scraper(url: str, output_csv: str = p.BOOKS_CSV, incremental: bool = False,
+                          snapshot_path: str = p.SHELF_SNAPSHOTS_JSON) -> int:
+    if incremental:
+        books = sync_goodreads_shelf(url, snapshot_path=snapshot_path, delay=1.5, max_pages=100, debug=False)
+    else:
+        books = scrape_goodreads_shelf(url, delay=1.5, max_pages=100, debug=False)
     if not books:
         return 0
     return save_to_csv(books, filename=output_csv)
\ No newline at end of file
@@ -0,0 +1,270 @@
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+
+from app import paths as p
+from app.browser_profile import resolve_profile
+from app.metrics import Metrics
+from app.pipeline import run_pipeline_async
+from app.skupszop_backends import SKUPSZOP_URL, HttpSearchBackend
+from app.skupszop_search_async import LazyBrowser, run_skupszop_search_async
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class SearchJob:
+    """
+    One pipeline run on the JobRunner's loop. Callbacks run on the loop thread
+    and only put events on `events`; the UI thread drains them:
+    ("progress", current, total, title, author), ("result", row),
+    ("concurrency", limit, reason), ("metrics", snapshot), ("finished", status).
+    `log` keeps every event for readers that replay them (events_since).
+    """
+
+    def __init__(self, job_id, user="default"):
+        self.id = job_id
+        self.user = user
+        self.status = PENDING
+        self.error = None
+        self.books = 0
+        self.cache = None
+        self.metrics = None
+        self.events = queue.Queue()
+        self.log = []
+        self.started_at = None
+        self.finished_at = None
+        self._future = None
+        self._finished = threading.Event()
+        self._changed = threading.Condition()
+
+    def emit(self, kind, *payload):
+        event = (kind, *payload)
+        self.events.put(event)
+        with self._changed:
+            self.log.append(event)
+            self._changed.notify_all()
+
+    # events after the first `start`, waiting up to `timeout` s for a new one
+    def events_since(self, start, timeout=None):
+        with self._changed:
+            if len(self.log) <= start and not self.done():
+                self._changed.wait(timeout)
+            return self.log[start:]
+
+    # events received so far, without blocking
+    def drain(self, limit=None):
+        events = []
+        while limit is None or len(events) < limit:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    # cancels the task on the loop; open pages are closed as its searches unwind
+    def cancel(self):
+        if self._future is not None:
+            self._future.cancel()
+
+    # set once the task has unwound, not when cancel() is requested
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+
+class FairScheduler:
+    """
+    At most `max_running` jobs at once. Waiting users take turns round-robin,
+    so one user's backlog can't starve the others.
+    """
+
+    def __init__(self, max_running=2):
+        self.max_running = max_running
+        self.running = 0
+        # user -> waiters; dict order is the order of turns
+        self._waiting = {}
+
+    @property
+    def waiting(self):
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    @asynccontextmanager
+    async def slot(self, user):
+        if self.running < self.max_running and not self._waiting:
+            self.running += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiting.setdefault(user, deque()).append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # the slot was already handed over
+                    self._release()
+                else:
+                    self._forget(user, waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _forget(self, user, waiter):
+        waiters = self._waiting.get(user)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[user]
+
+    # a freed slot goes to the next user in turn, who then moves to the back
+    def _release(self):
+        while self._waiting:
+            user = next(iter(self._waiting))
+            waiters = self._waiting.pop(user)
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting[user] = waiters
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+
+class JobRunner:
+    """
+    Event loop in a daemon thread that runs Goodreads -> SkupSzop pipelines as
+    cancellable tasks. One LazyBrowser and one HttpSearchBackend (connection
+    pool for `base_url`) are shared by all jobs and stay warm between them;
+    they are only closed by close(). With a `scheduler` jobs queue
+    for a FairScheduler slot; a shared `limiter` caps searches across all jobs.
+    """
+
+    def __init__(self, browser_profile="lean", pool_size=10, page_max_uses=50, browser_contexts=1,
+                 scheduler=None, limiter=None, base_url=SKUPSZOP_URL):
+        self.pool_size = pool_size
+        self.scheduler = scheduler
+        self.limiter = limiter
+        self.browser = LazyBrowser(resolve_profile(browser_profile), pool_size=pool_size,
+                                   page_max_uses=page_max_uses, contexts=browser_contexts)
+        self.http_backend = HttpSearchBackend(pool_size=pool_size, base_url=base_url)
+        self.loop = asyncio.new_event_loop()
+        self._ids = itertools.count(1)
+        self._thread = threading.Thread(target=self._run_loop, name="search-jobs", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def closed(self):
+        return not self._thread.is_alive()
+
+    def _slot(self, job):
+        if self.scheduler is None:
+            return nullcontext()
+        job.status = QUEUED
+        return self.scheduler.slot(job.user)
+
+    async def _run(self, job, coro):
+        job.started_at = time.time()
+        try:
+            async with self._slot(job):
+                job.status = RUNNING
+                await coro
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            coro.close()
+            raise
+        except Exception as e:
+            logger.exception(f"Search job {job.id} failed")
+            job.status = FAILED
+            job.error = e
+        finally:
+            job.metrics.publish()
+            self._finish(job)
+            logger.info(f"Search job {job.id} {job.status} ({job.finished_at - job.started_at:.2f} seconds)")
+
+    def _finish(self, job):
+        if job.cache is not None:
+            job.cache.close()
+        job.finished_at = time.time()
+        job.emit("finished", job.status)
+        job._finished.set()
+
+    def _callbacks(self, job):
+        def on_progress(current, total, title, author):
+            job.books = max(job.books, total)
+            job.emit("progress", current, total, title, author)
+
+        return {
+            "progress_callback": on_progress,
+            "result_callback": lambda row: job.emit("result", row),
+            "concurrency_callback": lambda limit, reason, stats: job.emit("concurrency", limit, reason),
+            "metrics": job.metrics,
+            "browser": self.browser,
+            "http_backend": self.http_backend,
+            "limiter": self.limiter,
+        }
+
+    def _new_job(self, user, cache):
+        job = SearchJob(next(self._ids), user)
+        job.cache = cache
+        job.metrics = Metrics(on_update=lambda snapshot: job.emit("metrics", snapshot))
+        return job
+
+    def _start(self, job, coro):
+        job._future = asyncio.run_coroutine_threadsafe(self._run(job, coro), self.loop)
+
+        def on_done(future):
+            # cancelled before the loop started it: _run never ran
+            if job.status == PENDING:
+                coro.close()
+                job.status = CANCELLED
+                self._finish(job)
+
+        job._future.add_done_callback(on_done)
+        return job
+
+    # starts run_pipeline_async in the background; the job owns (and closes) `cache`
+    def submit_pipeline(self, url, output_csv=p.SKUPSZOP_CSV, cache=None, user="default", **options):
+        job = self._new_job(user, cache)
+        options.setdefault("max_concurrent_pages", self.pool_size)
+        coro = run_pipeline_async(url, output_csv, cache=cache, **self._callbacks(job), **options)
+        return self._start(job, coro)
+
+    # same for a ready list of books ({"Title": ..., "Author": ...})
+    def submit_search(self, books, output_csv=p.SKUPSZOP_CSV, cache=None, user="default", **options):
+        job = self._new_job(user, cache)
+        job.books = len(books)
+        options.setdefault("max_concurrent_pages", self.pool_size)
+        coro = run_skupszop_search_async(output_csv=output_csv, cache=cache, books=books,
+                                         **self._callbacks(job), **options)
+        return self._start(job, coro)
+
+    # closes the warm browser and HTTP pool and stops the loop thread
+    def close(self, timeout=5):
+        if self.closed:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.browser.close(), self.loop).result(timeout)
+        except Exception:
+            logger.warning("Browser did not close cleanly")
+        self.http_backend.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
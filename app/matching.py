@@ -0,0 +1,111 @@
+import re
+from collections import namedtuple
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+AUTHOR_MATCH_THRESHOLD = 0.7
+TITLE_SIMILARITY_THRESHOLD = 0.8
+
+_PUNCTUATION = re.compile(r"[.,.]")
+
+# scores are None when the candidate was rejected by a bound before the full comparison
+CardMatch = namedtuple("CardMatch", ["title_score", "author_score", "matched"])
+
+
+def normalize_name(name):
+    name = name.lower()
+    name = _PUNCTUATION.sub("", name)
+    return name.split()
+
+@lru_cache(maxsize=4096)
+def _normalized_author(name):
+    parts = normalize_name(name)
+    return frozenset(parts), " ".join(parts)
+
+# upper bound of SequenceMatcher.ratio() from the lengths alone
+def _length_bound(len_a, len_b):
+    return 2.0 * min(len_a, len_b) / (len_a + len_b) if len_a + len_b else 1.0
+
+
+class BookMatcher:
+    """
+    Wishlist title and author normalized once, scored against many candidates.
+    Scores equal the difflib ratios used before; length and character-count
+    bounds reject hopeless candidates without running the full comparison.
+    """
+
+    def __init__(self, title, author, title_threshold=TITLE_SIMILARITY_THRESHOLD,
+                 author_threshold=AUTHOR_MATCH_THRESHOLD):
+        self.title_threshold = title_threshold
+        self.author_threshold = author_threshold
+        self._title = title.casefold()
+        # the wishlist title is the second sequence, so difflib's index of it is built once
+        self._title_matcher = SequenceMatcher(None, "", self._title)
+        parts = normalize_name(author)
+        self._author_set = frozenset(parts)
+        self._author = " ".join(parts)
+        self._author_matcher = SequenceMatcher(None, self._author, "")
+
+    def title_score(self, candidate_title):
+        candidate = candidate_title.casefold()
+        if _length_bound(len(candidate), len(self._title)) < self.title_threshold:
+            return None
+        matcher = self._title_matcher
+        matcher.set_seq1(candidate)
+        if matcher.quick_ratio() < self.title_threshold:
+            return None
+        return matcher.ratio()
+
+    def is_title_similar(self, candidate_title):
+        score = self.title_score(candidate_title)
+        return score is not None and score >= self.title_threshold
+
+    # best score over the candidate authors; 1.0 for the same set of name parts
+    def author_score(self, candidate_authors):
+        best = 0.0
+        rejected = False
+        for candidate_author in candidate_authors:
+            candidate_set, candidate = _normalized_author(candidate_author)
+            if candidate_set == self._author_set:
+                return 1.0
+            if _length_bound(len(self._author), len(candidate)) < self.author_threshold:
+                rejected = True
+                continue
+            matcher = self._author_matcher
+            matcher.set_seq2(candidate)
+            if matcher.quick_ratio() < self.author_threshold:
+                rejected = True
+                continue
+            best = max(best, matcher.ratio())
+        if best == 0.0 and rejected:
+            return None
+        return best
+
+    def is_author_match(self, candidate_authors):
+        score = self.author_score(candidate_authors)
+        return score is not None and score >= self.author_threshold
+
+    # whole batch of cards in one call
+    def score_cards(self, cards):
+        results = []
+        for card in cards:
+            title_score = self.title_score(card["title"])
+            if title_score is None or title_score < self.title_threshold:
+                results.append(CardMatch(title_score, None, False))
+                continue
+            author_score = self.author_score(card["authors"])
+            matched = author_score is not None and author_score >= self.author_threshold
+            results.append(CardMatch(title_score, author_score, matched))
+        return results
+
+    def matching_cards(self, cards):
+        return [card for card, match in zip(cards, self.score_cards(cards)) if match.matched]
+
+
+def is_author_match(csv_author, skupszop_authors, threshold=AUTHOR_MATCH_THRESHOLD):
+    #csv_author is the author name from the csv file
+    #skupszop_authors is a list of possible matching authors on SkupSzop
+    return BookMatcher("", csv_author, author_threshold=threshold).is_author_match(skupszop_authors)
+
+def is_title_similar(a, b, threshold=TITLE_SIMILARITY_THRESHOLD):
+    return BookMatcher(b, "", title_threshold=threshold).is_title_similar(a)
@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+# upper bounds (seconds) of the stage histograms; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    # bucket upper bound the given share of observations falls under
+    def quantile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank, seen = fraction * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    Timings of pipeline stages (histograms) and event counters for one run.
+    `on_update(snapshot)` is called at most every `update_interval` seconds.
+    """
+
+    enabled = True
+
+    def __init__(self, on_update=None, update_interval=1.0, buckets=DEFAULT_BUCKETS):
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.buckets = buckets
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._last_update = time.monotonic()
+
+    def span(self, stage):
+        return _Span(self, stage)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        self._maybe_update()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        self._maybe_update()
+
+    def _maybe_update(self):
+        if self.on_update is None or time.monotonic() - self._last_update < self.update_interval:
+            return
+        self.publish()
+
+    # pushes a snapshot to on_update now (e.g. at the end of a run)
+    def publish(self):
+        self._last_update = time.monotonic()
+        if self.on_update is not None:
+            try:
+                self.on_update(self.snapshot())
+            except Exception:
+                pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {stage: h.to_dict() for stage, h in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def to_json(self, path=None):
+        data = json.dumps(self.snapshot(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        return data
+
+    def to_prometheus(self, prefix="books_wishlist"):
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, h in snapshot["stages"].items():
+            cumulative = 0
+            for bound, n in h["buckets"].items():
+                cumulative += n
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {h["sum"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics:
+    """Stand-in when metrics are off: shared no-op span, nothing recorded."""
+
+    enabled = False
+    _span = nullcontext()
+
+    def span(self, stage):
+        return self._span
+
+    def observe(self, stage, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def publish(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
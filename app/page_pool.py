@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class PooledPage:
+    def __init__(self, page, context_index):
+        self.page = page
+        self.context_index = context_index
+        self.uses = 0
+        self.crashed = False
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, *args):
+        self.crashed = True
+
+    @property
+    def healthy(self):
+        return not self.crashed and not self.page.is_closed()
+
+
+class PagePool:
+    """
+    Warm pages reused across books instead of new_page/close per search.
+    Pages are created lazily up to `size`, spread round-robin over `contexts`
+    browser contexts, and recycled after `max_uses` uses, an error, or a
+    failed health check.
+    """
+
+    def __init__(self, context_factory, size=10, max_uses=50, contexts=1):
+        self.context_factory = context_factory
+        self.size = size
+        self.max_uses = max_uses
+        self.num_contexts = max(1, min(contexts, size))
+        self._contexts = []
+        self._idle = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+        self._lock = asyncio.Lock()
+        self._next_context = 0
+        self.pages_created = 0
+        self.acquisitions = 0
+        self.reuses = 0
+        self.recycled = Counter()
+
+    async def _context(self, index):
+        async with self._lock:
+            while len(self._contexts) <= index:
+                self._contexts.append(await self.context_factory())
+            return self._contexts[index]
+
+    async def _new_page(self):
+        index = self._next_context
+        self._next_context = (self._next_context + 1) % self.num_contexts
+        context = await self._context(index)
+        self.pages_created += 1
+        return PooledPage(await context.new_page(), index)
+
+    async def _recycle(self, pooled, reason):
+        self.recycled[reason] += 1
+        try:
+            if not pooled.page.is_closed():
+                await pooled.page.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        await self._slots.acquire()
+        self.acquisitions += 1
+        while not self._idle.empty():
+            pooled = self._idle.get_nowait()
+            if pooled.healthy:
+                self.reuses += 1
+                pooled.uses += 1
+                return pooled
+            await self._recycle(pooled, "unhealthy")
+        try:
+            pooled = await self._new_page()
+        except Exception:
+            self._slots.release()
+            raise
+        pooled.uses += 1
+        return pooled
+
+    async def release(self, pooled, failed=False):
+        try:
+            if failed:
+                await self._recycle(pooled, "error")
+            elif pooled.uses >= self.max_uses:
+                await self._recycle(pooled, "max_uses")
+            elif not pooled.healthy:
+                await self._recycle(pooled, "unhealthy")
+            else:
+                self._idle.put_nowait(pooled)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "pages_created": self.pages_created,
+            "acquisitions": self.acquisitions,
+            "reuses": self.reuses,
+            "recycled": dict(self.recycled),
+            "contexts": len(self._contexts),
+        }
+
+    async def close(self):
+        while not self._idle.empty():
+            pooled = self._idle.get_nowait()
+            try:
+                await pooled.page.close()
+            except Exception:
+                pass
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._contexts = []
@@ -1,9 +1,28 @@
 import os
 
-# storing CSV files
+# storing CSV files (created by whatever writes there first, not on import)
 DATA_DIR = os.path.join(os.path.dirname(__file__), "output_data")
-os.makedirs(DATA_DIR, exist_ok=True)
 
 # paths to CSV files
 BOOKS_CSV = os.path.join(DATA_DIR, "books.csv")
 SKUPSZOP_CSV = os.path.join(DATA_DIR, "skupszop_prices.csv")
+
+# on-disk cache of SkupSzop search results
+SEARCH_CACHE_DB = os.path.join(DATA_DIR, "search_cache.sqlite3")
+
+# last synced Goodreads shelves (incremental sync)
+SHELF_SNAPSHOTS_JSON = os.path.join(DATA_DIR, "shelf_snapshots.json")
+
+# per-book search outcomes across runs (re-check scheduling)
+RECHECK_DB = os.path.join(DATA_DIR, "recheck.sqlite3")
+
+# append-only history of saved offers
+PRICE_HISTORY_DB = os.path.join(DATA_DIR, "price_history.sqlite3")
+
+
+# creates the directory a file is about to be written to -> path
+def ensure_parent(path):
+    directory = os.path.dirname(os.fspath(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return path
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+
+from app import paths as p
+from app.goodreads_scraper import GOODREADS_MAX_PER_PAGE, iter_goodreads_shelf_pages, save_to_csv
+from app.query_planner import SearchCoalescer
+from app.skupszop_backends import SKUPSZOP_URL
+from app.result_sink import ResultSink
+from app.run_journal import RunJournal, journal_path, run_key
+from app.skupszop_search_async import log_retry_summary, make_limiter, make_retry_queue, search_book, search_resources
+
+logger = logging.getLogger(__name__)
+
+
+# Goodreads shelf -> bounded queue -> SkupSzop workers, without the books.csv round-trip
+async def run_pipeline_async(
+    url,
+    output_csv=p.SKUPSZOP_CSV,
+    books_csv=None,
+    min_price=0,
+    max_price=20,
+    progress_callback=None,
+    result_callback=None,
+    max_concurrent_pages=10,
+    queue_size=100,
+    shelf_concurrency=8,
+    max_pages=100,
+    backend="http",
+    base_url=SKUPSZOP_URL,
+    cache=None,
+    output_format=None,
+    browser_profile="lean",
+    page_max_uses=50,
+    browser_contexts=1,
+    adaptive_concurrency=True,
+    concurrency_callback=None,
+    dedupe_queries=True,
+    metrics=None,
+    browser=None,
+    http_backend=None,
+    limiter=None,
+    recheck=None,
+    history=None,
+    resume=False,
+    checkpoint=None,
+    retry=True,
+):
+    """
+    Searches each shelf book on SkupSzop as soon as its Goodreads page is parsed.
+    The queue holds at most `queue_size` books; `books_csv` is an optional side output.
+    Progress totals grow while the shelf is still being read. Books whose search
+    already ran (or is running) reuse its cards instead of searching again.
+    A warm `browser` (LazyBrowser) and a shared `http_backend` can be passed in; they are not closed at the end.
+    A shared `limiter` caps concurrency across runs instead of a per-run one.
+    With a `recheck` scheduler books that aren't due are not searched.
+    Saved offers are also appended to `history` (PriceHistory).
+    With `resume=True` (or a `checkpoint` journal path) finished books are
+    journaled by review id, so books added to or removed from the shelf in
+    between don't shift them; a resumed run skips them and continues the output.
+    Failed searches are retried once the shelf is done (see run_skupszop_search_async).
+    """
+    start_time = time.time()
+
+    queue = asyncio.Queue(maxsize=queue_size)
+    if limiter is None:
+        limiter = make_limiter(max_concurrent_pages, adaptive_concurrency, concurrency_callback)
+    coalescer = SearchCoalescer() if dedupe_queries else None
+    retry_queue = make_retry_queue(retry)
+    breaker = retry_queue.breaker if retry_queue is not None else None
+    shelf_books = []
+    # journal id per shelf position: the review id (the position only for rows without one)
+    book_ids = []
+    if recheck is not None:
+        recheck.begin()
+
+    # checkpoint: books already in the output of an interrupted run are skipped
+    journal, resumed = None, False
+    if resume or checkpoint:
+        journal = RunJournal(checkpoint or journal_path(output_csv), run_key(url, min_price, max_price, max_pages, output_format))
+        resumed = journal.open(output_csv, resume)
+    # books the interrupted run re-checked may not have reached its output
+    rechecked_since = journal.started if resumed else None
+
+    try:
+        async with ResultSink(output_csv, output_format, history=history, append=resumed, journal=journal) as sink, \
+                search_resources(backend, max_concurrent_pages, base_url, browser_profile,
+                                 page_max_uses, browser_contexts, metrics, browser, http_backend) as (http_backend, browser):
+            async def producer():
+                try:
+                    async for page_books in iter_goodreads_shelf_pages(
+                        url, debug=False, max_pages=max_pages,
+                        max_concurrency=shelf_concurrency, per_page=GOODREADS_MAX_PER_PAGE, metrics=metrics,
+                    ):
+                        for book in page_books:
+                            idx = len(shelf_books)
+                            shelf_books.append(book)
+                            book_ids.append(book.get("review_id") or idx)
+                            await queue.put((idx, {
+                                "Title": book.get("title", "Unknown title"),
+                                "Author": book.get("author", "Unknown"),
+                            }))
+                finally:
+                    # one stop marker per worker
+                    for _ in range(max_concurrent_pages):
+                        await queue.put(None)
+
+            async def run_book(idx, book):
+                if retry_queue is not None:
+                    retry_queue.attempt(idx, book["Title"])
+                search = search_book(http_backend, browser, book, min_price, max_price, sink, idx, len(shelf_books),
+                                     progress_callback, result_callback, base_url, cache, limiter, coalescer, metrics,
+                                     breaker)
+                # a repeated search only waits for the first one, it doesn't need a slot
+                if coalescer is not None and coalescer.known(book["Title"]):
+                    rows = await search
+                else:
+                    async with limiter.slot():
+                        rows = await search
+                # a failed search waits in the retry queue instead of being dropped
+                if rows is None and retry_queue is not None and retry_queue.defer(idx, book):
+                    return
+                if recheck is not None:
+                    recheck.record(book["Title"], rows)
+                # a failed search stays unfinished, a resumed run tries it again
+                if journal is not None and rows is not None:
+                    sink.book_done(book_ids[idx])
+
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    idx, book = item
+                    if journal is not None and book_ids[idx] in journal.completed:
+                        continue
+                    if recheck is not None:
+                        if not recheck.is_due(book["Title"], rechecked_since=rechecked_since):
+                            recheck.skipped += 1
+                            continue
+                        recheck.due += 1
+                    await run_book(idx, book)
+
+            try:
+                await asyncio.gather(producer(), *(worker() for _ in range(max_concurrent_pages)))
+                if retry_queue is not None:
+                    await retry_queue.drain(run_book)
+            finally:
+                if coalescer is not None:
+                    coalescer.cancel()
+    except BaseException:
+        if journal is not None:
+            journal.close()
+        raise
+    if journal is not None:
+        journal.close(finished=True)
+
+    if recheck is not None:
+        recheck.finish()
+        logger.info(f"Re-check: {recheck.due} books due, {recheck.skipped} skipped")
+    log_retry_summary(retry_queue, metrics)
+    if books_csv:
+        save_to_csv(shelf_books, filename=books_csv)
+
+    if metrics is not None:
+        metrics.publish()
+    elapsed = time.time() - start_time
+    searches = f", {coalescer.searches} searches" if coalescer is not None else ""
+    logger.info(f"Pipeline ended: {len(shelf_books)} books{searches} (elapsed: {elapsed:.2f} seconds)")
+    return output_csv
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import time
+
+from app import paths as p
+from app.query_planner import search_key
+
+DAY = 24 * 60 * 60  # seconds
+
+
+def to_grosze(price):
+    return round(float(str(price).replace(",", ".")) * 100)
+
+def median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+class PriceHistory:
+    """
+    Append-only SQLite history of every offer a run saved. Prices are stored
+    as integer grosze, conditions, books and links are dictionary-encoded;
+    observations are indexed by book, link and time. Books are keyed by the
+    search key of the wishlist title the offer was found for (the SkupSzop
+    card title only for records without one), so edition suffixes on cards
+    don't split a book. Returned prices are in PLN.
+    """
+
+    def __init__(self, path=p.PRICE_HISTORY_DB):
+        self.path = str(path)
+        self.run_id = None
+        self._ids = {"books": {}, "links": {}, "conditions": {}}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(p.ensure_parent(self.path), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, started_at INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS books (id INTEGER PRIMARY KEY, book_key TEXT NOT NULL UNIQUE, title TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS links (id INTEGER PRIMARY KEY, link TEXT NOT NULL UNIQUE);"
+            "CREATE TABLE IF NOT EXISTS conditions (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);"
+            "CREATE TABLE IF NOT EXISTS observations ("
+            " run_id INTEGER NOT NULL,"
+            " book_id INTEGER NOT NULL,"
+            " link_id INTEGER NOT NULL,"
+            " condition_id INTEGER NOT NULL,"
+            " price INTEGER NOT NULL,"
+            " observed_at INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS observations_book ON observations (book_id, observed_at);"
+            "CREATE INDEX IF NOT EXISTS observations_link ON observations (link_id, observed_at);"
+            "CREATE INDEX IF NOT EXISTS observations_run ON observations (run_id, link_id);"
+        )
+        self._conn.commit()
+
+    # [1] writing
+    def start_run(self, now=None):
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            self.run_id = self._conn.execute("INSERT INTO runs (started_at) VALUES (?)", (now,)).lastrowid
+            self._conn.commit()
+        return self.run_id
+
+    def _id(self, table, value, extra=()):
+        ids = self._ids[table]
+        if value not in ids:
+            column = {"books": "book_key", "links": "link", "conditions": "name"}[table]
+            row = self._conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()
+            if row is None:
+                placeholders = ", ".join("?" * (1 + len(extra)))
+                row = (self._conn.execute(f"INSERT INTO {table} VALUES (NULL, {placeholders})", (value, *extra)).lastrowid,)
+            ids[value] = row[0]
+        return ids[value]
+
+    # typed records (result_sink.to_record) observed in the current run
+    def add_records(self, records, now=None):
+        def book_id(r):
+            title = r.get("wishlist_title") or r["title"]
+            return self._id("books", search_key(title), (title,))
+
+        if self.run_id is None:
+            self.start_run(now)
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.run_id,
+                     book_id(r),
+                     self._id("links", r["link"]),
+                     self._id("conditions", r["condition"]),
+                     to_grosze(r["price"]),
+                     now)
+                    for r in records
+                ],
+            )
+            self._conn.commit()
+
+    # [2] queries
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _book_id(self, title):
+        rows = self._query("SELECT id FROM books WHERE book_key = ?", (search_key(title),))
+        return rows[0][0] if rows else None
+
+    def runs(self):
+        return [{"id": run_id, "started_at": started_at}
+                for run_id, started_at in self._query("SELECT id, started_at FROM runs ORDER BY id")]
+
+    # offers of the last run that saw any (or, for `title`, the last run that saw that book)
+    def latest_offers(self, title=None):
+        if title is None:
+            where, params = "o.run_id = (SELECT MAX(run_id) FROM observations)", ()
+        else:
+            book_id = self._book_id(title)
+            if book_id is None:
+                return []
+            where = "o.book_id = ? AND o.run_id = (SELECT MAX(run_id) FROM observations WHERE book_id = ?)"
+            params = (book_id, book_id)
+        rows = self._query(
+            "SELECT b.title, l.link, c.name, o.price, o.observed_at FROM observations o"
+            " JOIN books b ON b.id = o.book_id JOIN links l ON l.id = o.link_id"
+            f" JOIN conditions c ON c.id = o.condition_id WHERE {where} ORDER BY o.price",
+            params,
+        )
+        return [{"title": t, "link": link, "condition": condition, "price": price / 100, "observed_at": observed_at}
+                for t, link, condition, price, observed_at in rows]
+
+    # cheapest price per link in the last run vs the run before, where it went down
+    def price_drops(self):
+        last_runs = self._query("SELECT DISTINCT run_id FROM observations ORDER BY run_id DESC LIMIT 2")
+        if len(last_runs) < 2:
+            return []
+        current, previous = last_runs[0][0], last_runs[1][0]
+        rows = self._query(
+            "WITH now AS (SELECT link_id, book_id, MIN(price) AS price FROM observations WHERE run_id = ? GROUP BY link_id),"
+            " before AS (SELECT link_id, MIN(price) AS price FROM observations WHERE run_id = ? GROUP BY link_id)"
+            " SELECT b.title, l.link, before.price, now.price FROM now"
+            " JOIN before ON before.link_id = now.link_id"
+            " JOIN books b ON b.id = now.book_id JOIN links l ON l.id = now.link_id"
+            " WHERE now.price < before.price ORDER BY before.price - now.price DESC",
+            (current, previous),
+        )
+        return [{"title": t, "link": link, "old_price": old / 100, "price": new / 100}
+                for t, link, old, new in rows]
+
+    # min/median/max of a book's observed prices over the last `days`
+    def price_stats(self, title, days=30, now=None):
+        book_id = self._book_id(title)
+        now = time.time() if now is None else now
+        prices = [] if book_id is None else [price for (price,) in self._query(
+            "SELECT price FROM observations WHERE book_id = ? AND observed_at >= ?", (book_id, int(now - days * DAY)))]
+        if not prices:
+            return {"count": 0, "min": None, "median": None, "max": None}
+        return {"count": len(prices), "min": min(prices) / 100, "median": median(prices) / 100, "max": max(prices) / 100}
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,59 @@
+import asyncio
+import re
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+# titles with the same key produce the same SkupSzop search (case, punctuation and spacing differ)
+def search_key(title):
+    return " ".join(_NON_WORD.sub(" ", title.casefold()).split())
+
+# (idx, book) pairs -> groups sharing a search key, in order of their first book
+def group_by_search_key(items):
+    groups = {}
+    for idx, book in items:
+        groups.setdefault(search_key(book["Title"]), []).append((idx, book))
+    return list(groups.values())
+
+def plan_searches(books):
+    return group_by_search_key(enumerate(books))
+
+
+class SearchCoalescer:
+    """
+    One search per key for the whole run: concurrent requesters await the same
+    in-flight task, later ones get its result. Matching stays per book.
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.coalesced = 0
+        self._tasks = {}
+
+    def known(self, title):
+        return search_key(title) in self._tasks
+
+    async def run(self, title, search):
+        key = search_key(title)
+        task = self._tasks.get(key)
+        if task is None:
+            self.searches += 1
+            task = self._tasks[key] = asyncio.ensure_future(search())
+            task.add_done_callback(lambda done: self._forget_failed(key, done))
+        else:
+            self.coalesced += 1
+        # a cancelled requester must not cancel the search for the others
+        return await asyncio.shield(task)
+
+    # a failed search (None) isn't shared with later requesters, so a retry searches again
+    def _forget_failed(self, key, task):
+        if self._tasks.get(key) is task and (task.cancelled() or task.exception() is not None or task.result() is None):
+            del self._tasks[key]
+
+    # searches nobody waits for anymore (run finished or cancelled)
+    def cancel(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+    def stats(self):
+        return {"searches": self.searches, "coalesced": self.coalesced}
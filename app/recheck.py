@@ -0,0 +1,171 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from app import paths as p
+from app.query_planner import search_key
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60  # seconds
+
+# outcomes written per commit (and on finish/close)
+COMMIT_EVERY = 50
+
+# how early a book may be re-checked, so a daily run a bit earlier than yesterday's still checks it
+DUE_SLACK = 2 * 60 * 60
+
+
+class RecheckScheduler:
+    """
+    Per-book search outcomes across runs (SQLite): last check, consecutive
+    misses and the last seen offer. New books and books that had offers are
+    searched every run; after `n` misses in a row a book waits
+    `base_interval * 2 ** (n - 1)` seconds (at most `max_interval`). Every
+    `full_sweep_days` days all books are searched regardless. Books sharing a
+    search key share a state; a run counts for it once (a hit if any of them had offers).
+    """
+
+    def __init__(self, path=p.RECHECK_DB, base_interval=DAY, max_interval=30 * DAY, full_sweep_days=7):
+        self.path = str(path)
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.full_sweep_days = full_sweep_days
+        self.sweep = False
+        self.due = 0
+        self.skipped = 0
+        self._sweep_started = None
+        self._books = {}
+        # search key -> cheapest offer price recorded in this run (None: a miss)
+        self._recorded = {}
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(p.ensure_parent(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recheck_books ("
+            " book_key TEXT PRIMARY KEY,"
+            " last_checked REAL NOT NULL,"
+            " misses INTEGER NOT NULL,"
+            " last_hit REAL,"
+            " last_offer TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS recheck_meta (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+        self._conn.commit()
+
+    # [1] start of a run: load the book states, decide whether this run is a full sweep
+    def begin(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._books = {
+                key: (last_checked, misses)
+                for key, last_checked, misses in self._conn.execute(
+                    "SELECT book_key, last_checked, misses FROM recheck_books")
+            }
+            row = self._conn.execute("SELECT value FROM recheck_meta WHERE name = 'last_sweep'").fetchone()
+        self.sweep = row is None or now - row[0] >= self.full_sweep_days * DAY
+        self._sweep_started = now if self.sweep else None
+        self.due = self.skipped = 0
+        self._recorded = {}
+        if self.sweep:
+            logger.info("Re-check: full sweep")
+        return self.sweep
+
+    def interval(self, misses):
+        if misses <= 0:
+            return 0
+        return min(self.base_interval * 2 ** (misses - 1), self.max_interval)
+
+    # `rechecked_since`: start of an interrupted run being resumed; books it checked
+    # stay due, their offers may not have reached the output before the crash
+    def is_due(self, title, now=None, rechecked_since=None):
+        state = self._books.get(search_key(title))
+        if self.sweep or state is None:
+            return True
+        now = time.time() if now is None else now
+        last_checked, misses = state
+        if rechecked_since is not None and last_checked >= rechecked_since:
+            return True
+        return now >= last_checked + self.interval(misses) - DUE_SLACK
+
+    # lower sorts first: new books, then books with offers, then by miss streak
+    def priority(self, title):
+        state = self._books.get(search_key(title))
+        return -1 if state is None else state[1]
+
+    # [2] books to search in this run, in priority order (stable within a priority)
+    def plan(self, books, now=None, rechecked_since=None):
+        return [books[i] for i in self.plan_indexes(books, now, rechecked_since)]
+
+    # same plan as positions in `books`
+    def plan_indexes(self, books, now=None, rechecked_since=None):
+        due = [i for i, book in enumerate(books) if self.is_due(book["Title"], now, rechecked_since)]
+        due.sort(key=lambda i: self.priority(books[i]["Title"]))
+        self.due, self.skipped = len(due), len(books) - len(due)
+        logger.info(f"Re-check plan: {self.due} books due, {self.skipped} skipped")
+        return due
+
+    # [3] offer rows of a searched book; None (failed search) leaves its state alone.
+    # Within a run a key gets at most one miss, and a hit of any of its books wins
+    def record(self, title, rows, now=None):
+        if rows is None:
+            return
+        now = time.time() if now is None else now
+        key = search_key(title)
+        with self._lock:
+            if rows:
+                cheapest = min(rows, key=lambda row: float(str(row[2]).replace(",", ".")))
+                price = float(str(cheapest[2]).replace(",", "."))
+                # another book of the key already found a cheaper offer
+                if self._recorded.get(key) is not None and price >= self._recorded[key]:
+                    return
+                self._recorded[key] = price
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO recheck_books VALUES (?, ?, 0, ?, ?)",
+                    (key, now, now, json.dumps(cheapest, ensure_ascii=False)),
+                )
+            else:
+                if key in self._recorded:
+                    return
+                self._recorded[key] = None
+                self._conn.execute(
+                    "INSERT INTO recheck_books (book_key, last_checked, misses) VALUES (?, ?, 1)"
+                    " ON CONFLICT (book_key) DO UPDATE SET last_checked = excluded.last_checked, misses = misses + 1",
+                    (key, now),
+                )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._commit()
+
+    def _commit(self):
+        self._conn.commit()
+        self._uncommitted = 0
+
+    # [4] end of a completed run: a sweep resets the full-sweep clock
+    def finish(self):
+        with self._lock:
+            if self._sweep_started is not None:
+                self._conn.execute("INSERT OR REPLACE INTO recheck_meta VALUES ('last_sweep', ?)", (self._sweep_started,))
+                self._sweep_started = None
+            self._commit()
+
+    def state(self, title):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_checked, misses, last_hit, last_offer FROM recheck_books WHERE book_key = ?",
+                (search_key(title),),
+            ).fetchone()
+        if row is None:
+            return None
+        last_checked, misses, last_hit, last_offer = row
+        return {"last_checked": last_checked, "misses": misses, "last_hit": last_hit,
+                "last_offer": json.loads(last_offer) if last_offer else None}
+
+    def stats(self):
+        return {"sweep": self.sweep, "due": self.due, "skipped": self.skipped}
+
+    def close(self):
+        with self._lock:
+            self._commit()
+        self._conn.close()
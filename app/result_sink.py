@@ -0,0 +1,202 @@
+import asyncio
+import csv
+import json
+import os
+import time
+
+from app.paths import ensure_parent
+
+CSV_HEADER = ["Title", "Author", "Price", "Condition", "Link"]
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+
+# record fields kept for the price history, not written to the output files
+BOOK_FIELDS = ("wishlist_title", "wishlist_author")
+
+
+# result row [title, authors, price, condition, link] -> typed record;
+# `book` is the (title, author) of the wishlist book the offer was found for
+def to_record(row, book=None):
+    title, authors, price, condition, link = row
+    if isinstance(authors, str):
+        authors = [authors]
+    record = {
+        "title": title,
+        "authors": list(authors),
+        "price": float(str(price).replace(",", ".")),
+        "condition": condition,
+        "link": link,
+    }
+    if book is not None:
+        record["wishlist_title"], record["wishlist_author"] = book
+    return record
+
+def output_record(record):
+    return {key: value for key, value in record.items() if key not in BOOK_FIELDS}
+
+def infer_format(path):
+    extension = os.path.splitext(str(path))[1].lower().lstrip(".")
+    return {"parquet": "parquet", "pq": "parquet", "jsonl": "jsonl", "ndjson": "jsonl"}.get(extension, "csv")
+
+# pyarrow is only imported for Parquet output
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def parquet_schema():
+    pa = import_pyarrow()
+    return pa.schema([
+        ("title", pa.string()),
+        ("authors", pa.list_(pa.string())),
+        ("price", pa.float64()),
+        ("condition", pa.dictionary(pa.int32(), pa.string())),
+        ("link", pa.string()),
+    ])
+
+
+# end-of-book marker in the writer queue (journaled runs)
+class _BookDone:
+    __slots__ = ("idx",)
+
+    def __init__(self, idx):
+        self.idx = idx
+
+
+class ResultSink:
+    """
+    Single writer for search results. Rows are buffered and flushed every
+    `flush_rows` rows or `flush_interval` seconds, and on close.
+    Inside an event loop, `start()` runs one writer task fed by a queue;
+    without it `put()` writes through the buffer directly. Every flushed
+    batch is also appended to `history` (PriceHistory), as one run.
+    With `append=True` an existing CSV/JSONL output is continued instead of
+    truncated; a `journal` (RunJournal) records the books finished with
+    `book_done(idx)` once their rows are flushed. Rows put with their wishlist
+    `book` are kept under that book in the history.
+    """
+
+    def __init__(self, path, fmt=None, flush_rows=200, flush_interval=1.0, history=None, append=False, journal=None):
+        self.path = str(path)
+        self.fmt = fmt or infer_format(path)
+        if self.fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {self.fmt} (expected one of {OUTPUT_FORMATS})")
+        if self.fmt == "parquet" and (append or journal is not None):
+            raise ValueError("Appending and run journals need csv or jsonl output")
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._queue = None
+        self._task = None
+        self._parquet_writer = None
+        self._done = []
+        self.append = append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self.journal = journal
+        self.history = history
+        if history is not None:
+            history.start_run()
+        self._open()
+
+    def _open(self):
+        if self.append:
+            return
+        ensure_parent(self.path)
+        if self.fmt == "parquet":
+            self._parquet_writer = import_pyarrow().parquet.ParquetWriter(self.path, parquet_schema())
+        elif self.fmt == "csv":
+            with open(self.path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(CSV_HEADER)
+        else:
+            open(self.path, "w", encoding="utf-8").close()
+
+    def write(self, row, book=None):
+        self._buffer.append(to_record(row, book))
+        if len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        batch, self._buffer = self._buffer, []
+        done, self._done = self._done, []
+        self._last_flush = time.monotonic()
+        if batch:
+            self._write_batch(batch)
+        if self.journal is not None and done:
+            self.journal.commit(done, os.path.getsize(self.path))
+
+    def _write_batch(self, batch):
+        if self.fmt == "parquet":
+            pa = import_pyarrow()
+            self._parquet_writer.write_table(pa.Table.from_pylist([output_record(r) for r in batch], schema=parquet_schema()))
+        elif self.fmt == "csv":
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerows(
+                    [r["title"], "; ".join(r["authors"]), r["price"], r["condition"], r["link"]] for r in batch
+                )
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(output_record(r), ensure_ascii=False) + "\n" for r in batch)
+        if self.history is not None:
+            self.history.add_records(batch)
+        self.rows_written += len(batch)
+
+    def close(self):
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    # async single-writer mode
+    def put(self, row, book=None):
+        if self._queue is None:
+            self.write(row, book)
+        else:
+            self._queue.put_nowait(to_record(row, book))
+
+    # all rows of book `idx` were put; journaled with the next flush
+    def book_done(self, idx):
+        if self._queue is None:
+            self._done.append(idx)
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+        else:
+            self._queue.put_nowait(_BookDone(idx))
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._writer())
+        return self
+
+    async def _writer(self):
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - self._last_flush))
+            try:
+                row = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.flush)
+                continue
+            if row is None:
+                break
+            if isinstance(row, _BookDone):
+                self._done.append(row.idx)
+                continue
+            self._buffer.append(row)
+            if len(self._buffer) >= self.flush_rows:
+                await asyncio.to_thread(self.flush)
+
+    async def aclose(self):
+        if self._task is not None:
+            self._queue.put_nowait(None)
+            await self._task
+            self._queue = self._task = None
+        await asyncio.to_thread(self.close)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import random
+import time
+from collections import Counter, deque
+
+from app.concurrency import FAILED_OUTCOMES
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    Up to `max_attempts` searches per book. After the n-th failure a book
+    waits `base_delay * 2 ** (n - 1)` seconds (at most `max_delay`), less a
+    random share of up to `jitter` so retries don't arrive in lockstep.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, jitter=0.5):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, failures, rng=random):
+        delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        return delay * (1 - self.jitter * rng.random())
+
+
+class CircuitBreaker:
+    """
+    Pauses every search while the site is failing: when more than `threshold`
+    of the last `window` requests (at least `min_requests`) failed, the
+    breaker opens for `cooldown` seconds. Afterwards requests go through
+    again on a fresh window.
+    """
+
+    def __init__(self, threshold=0.5, window=20, min_requests=10, cooldown=10.0):
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)
+        self._open_until = 0.0
+
+    @property
+    def is_open(self):
+        return time.monotonic() < self._open_until
+
+    def record(self, outcome):
+        if self.is_open:
+            return
+        self._outcomes.append(outcome in FAILED_OUTCOMES)
+        failures = sum(self._outcomes)
+        if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) > self.threshold:
+            self.opened += 1
+            self._open_until = time.monotonic() + self.cooldown
+            self._outcomes.clear()
+            logger.warning(f"Circuit breaker open for {self.cooldown:.0f}s ({failures} failed requests)")
+
+    async def wait(self):
+        while self.is_open:
+            await asyncio.sleep(self._open_until - time.monotonic())
+
+
+class RetryQueue:
+    """
+    Books whose search failed (timeouts, 5xx, navigation errors; not "no
+    results") are deferred and searched again after the main pass, each once
+    its backoff delay has passed, so they never hold up fresh work.
+    """
+
+    def __init__(self, policy=None, breaker=None, seed=None):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.attempts = {}
+        self.titles = {}
+        self.failed = set()
+        self._deferred = []
+        self._rng = random.Random(seed)
+
+    def attempt(self, idx, title):
+        self.attempts[idx] = self.attempts.get(idx, 0) + 1
+        self.titles[idx] = title
+
+    # -> False when the book is out of attempts
+    def defer(self, idx, book):
+        failures = self.attempts.get(idx, 1)
+        if failures >= self.policy.max_attempts:
+            self.failed.add(idx)
+            logger.warning(f"Giving up on {book['Title']} after {failures} attempts")
+            return False
+        due = time.monotonic() + self.policy.delay(failures, self._rng)
+        self._deferred.append((due, idx, book))
+        return True
+
+    def __len__(self):
+        return len(self._deferred)
+
+    # runs `run(idx, book)` for deferred books until none are left; a retry may defer again
+    async def drain(self, run):
+        async def retry(due, idx, book):
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            await run(idx, book)
+
+        while self._deferred:
+            batch, self._deferred = sorted(self._deferred, key=lambda item: item[0]), []
+            logger.info(f"Retrying {len(batch)} failed searches")
+            await asyncio.gather(*(retry(*item) for item in batch))
+
+    def summary(self):
+        retried = {idx: n for idx, n in self.attempts.items() if n > 1}
+        return {
+            "books": len(self.attempts),
+            "retried": len(retried),
+            "recovered": len(set(retried) - self.failed),
+            "failed": sorted(self.titles[idx] for idx in self.failed),
+            "attempts": dict(sorted(Counter(self.attempts.values()).items())),
+            "attempts_per_book": {self.titles[idx]: n for idx, n in sorted(retried.items())},
+            "breaker_opened": self.breaker.opened,
+        }
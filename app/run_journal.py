@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from app.paths import ensure_parent
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path(output_path):
+    return f"{output_path}.journal"
+
+# identifies the work of a run: same books (or shelf) and prices -> same key
+def run_key(*parts):
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class RunJournal:
+    """
+    Append-only JSON-lines checkpoint of a run, written by the ResultSink after
+    each flush: the ids of the books whose rows are now in the output (input
+    position or review id, never the position in a re-check plan) and the
+    output size at that point. `started` is when the journaled run began. Resuming truncates the output back to the
+    last recorded size, so rows of unfinished books are never duplicated.
+    The journal is removed when the run completes.
+    """
+
+    def __init__(self, path, key):
+        self.path = str(path)
+        self.key = key
+        self.completed = set()
+        self.started = None
+        self._f = None
+
+    # [1] -> True when a matching journal was found and the run continues
+    def open(self, output_path, resume=False):
+        size = None
+        if resume and os.path.exists(self.path):
+            size = self._load()
+        resumed = size is not None and os.path.exists(output_path)
+        if resumed:
+            with open(output_path, "r+b") as f:
+                f.truncate(size)
+            self._f = open(self.path, "a", encoding="utf-8")
+            logger.info(f"Resuming run: {len(self.completed)} books already done")
+        else:
+            self.completed = set()
+            self.started = time.time()
+            self._f = open(ensure_parent(self.path), "w", encoding="utf-8")
+            self._write({"key": self.key, "started": self.started})
+        return resumed
+
+    def _load(self):
+        size = None
+        with open(self.path, encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn last line after a crash
+                    break
+                if n == 0:
+                    if entry.get("key") != self.key:
+                        logger.info("Run journal belongs to a different run, starting over")
+                        return None
+                    self.started = entry.get("started")
+                    size = 0
+                    continue
+                self.completed.update(entry["books"])
+                size = entry["size"]
+        return size
+
+    def _write(self, entry):
+        self._f.write(json.dumps(entry) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    # [2] books whose rows were flushed; `size` is the output size after the flush
+    def commit(self, books, size):
+        self.completed.update(books)
+        self._write({"books": list(books), "size": size})
+
+    # [3] a finished run leaves nothing to resume
+    def close(self, finished=False):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        if finished and os.path.exists(self.path):
+            os.remove(self.path)
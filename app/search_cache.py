@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import threading
+import time
+
+from app import paths as p
+
+DEFAULT_TTL = 6 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 5000
+
+
+# title the way is_title_similar compares it
+def normalize_title_key(title):
+    return " ".join(title.casefold().split())
+
+
+class SearchCache:
+    """
+    SQLite cache of raw SkupSzop product cards keyed by normalized title and max_price.
+    Entries expire after `ttl` seconds; above `max_entries` the least recently used are evicted.
+    With `bypass=True` reads always miss but fresh results are still stored.
+    Hits only note their use in memory; it is written with the next `put` and on `close`.
+    """
+
+    def __init__(self, path=p.SEARCH_CACHE_DB, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, bypass=False):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> time of its last hit, not written yet
+        self._used = {}
+        self._conn = sqlite3.connect(p.ensure_parent(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " title TEXT NOT NULL,"
+            " max_price REAL NOT NULL,"
+            " cards TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (title, max_price))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS search_cache_last_used ON search_cache (last_used)")
+        self._conn.commit()
+
+    def get(self, title, max_price):
+        if self.bypass:
+            self.misses += 1
+            return None
+        key = (normalize_title_key(title), float(max_price))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cards, created_at FROM search_cache WHERE title = ? AND max_price = ?", key
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM search_cache WHERE title = ? AND max_price = ?", key)
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._used[key] = now
+        self.hits += 1
+        return json.loads(row[0])
+
+    # writes the pending hits (caller holds the lock and commits)
+    def _write_used(self):
+        if self._used:
+            self._conn.executemany(
+                "UPDATE search_cache SET last_used = ? WHERE title = ? AND max_price = ?",
+                [(used, *key) for key, used in self._used.items()],
+            )
+            self._used.clear()
+
+    def put(self, title, max_price, cards):
+        now = time.time()
+        with self._lock:
+            # recent hits count for the eviction below
+            self._write_used()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (normalize_title_key(title), float(max_price), json.dumps(cards, ensure_ascii=False), now, now),
+            )
+            # LRU eviction above the size cap
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE rowid IN ("
+                " SELECT rowid FROM search_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def clear(self):
+        with self._lock:
+            self._used.clear()
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._write_used()
+            self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,295 @@
+"""
+Search daemon: a local HTTP/JSON API in front of one JobRunner, so Chromium, its
+page pool and the HTTP pools are started once and shared by every job.
+
+    POST   /jobs                 {"user", "shelf_url" | "books": [{"title", "author"}], "min_price", "max_price"}
+    GET    /jobs                 all kept jobs
+    GET    /jobs/<id>            status and counts
+    GET    /jobs/<id>/events     ?start=N&timeout=S, long-polls for events after the first N
+    GET    /jobs/<id>/stream     JSON lines, one per event, until the job finishes
+    DELETE /jobs/<id>            cancel
+    GET    /health
+
+Jobs wait in a FairScheduler (round-robin across users) and all searches share
+one concurrency limiter, so the cap is global instead of per job.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app import paths as p
+from app.jobs import FairScheduler, JobRunner
+from app.search_cache import SearchCache
+from app.skupszop_backends import SKUPSZOP_URL
+from app.skupszop_search_async import make_limiter
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.path.join(p.DATA_DIR, "jobs")
+DEFAULT_PORT = 8765
+
+# payload names of the SearchJob event tuples
+EVENT_FIELDS = {
+    "progress": ("current", "total", "title", "author"),
+    "result": ("offer",),
+    "concurrency": ("limit", "reason"),
+    "metrics": ("snapshot",),
+    "finished": ("status",),
+}
+OFFER_FIELDS = ("title", "authors", "price", "condition", "link")
+
+_JOB_PATH = re.compile(r"^/jobs/(\d+)(/events|/stream)?$")
+
+
+def event_json(event):
+    kind, *payload = event
+    data = dict(zip(EVENT_FIELDS.get(kind, ()), payload))
+    if kind == "result":
+        data["offer"] = dict(zip(OFFER_FIELDS, data["offer"]))
+    return {"event": kind, **data}
+
+
+class SearchService:
+    """
+    Jobs on a shared JobRunner: at most `max_running` at once, at most
+    `max_concurrency` searches in flight across all of them.
+    """
+
+    def __init__(self, max_running=2, max_concurrency=10, browser_profile="lean", base_url=SKUPSZOP_URL,
+                 backend="http", use_cache=True, output_dir=JOBS_DIR, keep_jobs=100):
+        self.base_url = base_url
+        self.backend = backend
+        self.use_cache = use_cache
+        self.output_dir = output_dir
+        self.keep_jobs = keep_jobs
+        self.scheduler = FairScheduler(max_running)
+        self.runner = JobRunner(browser_profile, pool_size=max_concurrency, scheduler=self.scheduler,
+                                limiter=make_limiter(max_concurrency), base_url=base_url)
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    # request body -> started job; ValueError for a bad request
+    def submit(self, request):
+        user = str(request.get("user") or "default")
+        try:
+            min_price = float(request.get("min_price", 0))
+            max_price = float(request.get("max_price", 20))
+        except (TypeError, ValueError):
+            raise ValueError("min_price and max_price must be numbers")
+        if min_price > max_price:
+            raise ValueError("min_price is above max_price")
+
+        shelf_url, books = request.get("shelf_url"), request.get("books")
+        if bool(shelf_url) == (books is not None):
+            raise ValueError("give either shelf_url or books")
+        if shelf_url and urlparse(shelf_url).scheme not in ("http", "https"):
+            raise ValueError("shelf_url must be an http(s) URL")
+        books = parse_books(books) if books is not None else None
+
+        output_path = os.path.join(self.output_dir, f"{uuid.uuid4().hex}.csv")
+        options = {
+            "min_price": min_price,
+            "max_price": max_price,
+            "cache": SearchCache() if self.use_cache else None,
+            "user": user,
+            "backend": self.backend,
+            "base_url": self.base_url,
+        }
+        if books is None:
+            job = self.runner.submit_pipeline(shelf_url, output_path, **options)
+        else:
+            job = self.runner.submit_search(books, output_path, **options)
+        job.output_path = output_path
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        logger.info(f"Job {job.id} submitted by {user}")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    # drops the oldest finished jobs above `keep_jobs`
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done()]
+        for job_id in finished[:max(0, len(self.jobs) - self.keep_jobs)]:
+            del self.jobs[job_id]
+
+    def describe(self, job):
+        return {
+            "id": job.id,
+            "user": job.user,
+            "status": job.status,
+            "books": job.books,
+            "events": len(job.log),
+            "error": str(job.error) if job.error is not None else None,
+            "output": job.output_path,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    def health(self):
+        return {
+            "status": "ok",
+            "running": self.scheduler.running,
+            "queued": self.scheduler.waiting,
+            "browser_launched": self.runner.browser.launched,
+            "jobs": len(self.list_jobs()),
+        }
+
+    def close(self):
+        for job in self.list_jobs():
+            job.cancel()
+        self.runner.close()
+
+
+# [{"title", "author"}] (or Title/Author, as in books.csv) -> search input
+def parse_books(books):
+    if not isinstance(books, list) or not books:
+        raise ValueError("books must be a non-empty list")
+    parsed = []
+    for book in books:
+        if not isinstance(book, dict):
+            raise ValueError("each book must be an object with a title")
+        title = book.get("title") or book.get("Title")
+        if not title:
+            raise ValueError("each book must be an object with a title")
+        parsed.append({"Title": str(title), "Author": str(book.get("author") or book.get("Author") or "Unknown")})
+    return parsed
+
+
+# ?start=&timeout= of an events poll -> (start, timeout), timeout capped at 60 s
+def parse_events_query(query):
+    try:
+        start, timeout = int(query.get("start", 0)), float(query.get("timeout", 10))
+    except ValueError:
+        raise ValueError("start must be an integer and timeout a number") from None
+    # `not 0 <= timeout` also rejects nan
+    if start < 0 or not 0 <= timeout:
+        raise ValueError("start and timeout must not be negative")
+    return start, min(timeout, 60)
+
+
+def make_handler(service):
+    class ServiceHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def send_json(self, data, status=200):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def find_job(self):
+            match = _JOB_PATH.match(urlparse(self.path).path)
+            job = service.get(int(match.group(1))) if match else None
+            if job is None:
+                self.send_json({"error": "not found"}, status=404)
+            return job, match.group(2) if match else None
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self.send_json(service.health())
+            if url.path == "/jobs":
+                return self.send_json([service.describe(job) for job in service.list_jobs()])
+            job, action = self.find_job()
+            if job is None:
+                return
+            if action == "/events":
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                try:
+                    start, timeout = parse_events_query(query)
+                except ValueError as e:
+                    return self.send_json({"error": str(e)}, status=400)
+                events = job.events_since(start, timeout)
+                return self.send_json({"status": job.status, "next": start + len(events),
+                                       "events": [event_json(event) for event in events]})
+            if action == "/stream":
+                return self.stream(job)
+            self.send_json(service.describe(job))
+
+        # one JSON line per event; the body ends with the connection
+        def stream(self, job):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.end_headers()
+            start = 0
+            while True:
+                events = job.events_since(start, timeout=1)
+                start += len(events)
+                for event in events:
+                    self.wfile.write((json.dumps(event_json(event), ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                if job.done() and start >= len(job.log):
+                    return
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/jobs":
+                return self.send_json({"error": "not found"}, status=404)
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("request body must be a JSON object")
+                job = service.submit(request)
+            except ValueError as e:
+                return self.send_json({"error": str(e)}, status=400)
+            self.send_json(service.describe(job), status=201)
+
+        def do_DELETE(self):
+            job, action = self.find_job()
+            if job is None:
+                return
+            job.cancel()
+            self.send_json(service.describe(job), status=202)
+
+    return ServiceHandler
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    httpd = ThreadingHTTPServer((host, port), make_handler(service))
+    httpd.daemon_threads = True
+    return httpd
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Books wishlist search service (local HTTP/JSON API)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-running", type=int, default=2, help="jobs running at once")
+    parser.add_argument("--max-concurrency", type=int, default=10, help="searches in flight across all jobs")
+    parser.add_argument("--backend", default="http", choices=("http", "playwright"))
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    service = SearchService(max_running=args.max_running, max_concurrency=args.max_concurrency,
+                            backend=args.backend, use_cache=not args.no_cache)
+    httpd = make_server(service, args.host, args.port)
+    logger.info(f"Search service listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
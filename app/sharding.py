@@ -0,0 +1,258 @@
+"""
+Sharded SkupSzop search: the books are split across worker processes, each with
+its own event loop, HTTP pool and browser. Progress and results stream back to
+the parent through a queue; the per-shard outputs are merged in book order.
+Failed searches are retried inside their shard, behind a circuit breaker per shard.
+"""
+import asyncio
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app import paths as p
+from app.result_sink import ResultSink
+from app.query_planner import SearchCoalescer, plan_searches
+from app.retry import RetryQueue
+from app.search_cache import SearchCache
+from app.skupszop_backends import SKUPSZOP_URL
+from app.skupszop_search_async import (
+    SEARCH_BACKENDS, log_retry_summary, make_limiter, make_retry_queue, search_book, search_resources,
+)
+
+logger = logging.getLogger(__name__)
+
+# event queue shared with the worker processes (set by the pool initializer)
+_events = None
+
+
+# [1] round-robin split, so every shard gets a mix of the whole shelf;
+# with dedupe_queries books sharing a search stay together in one group
+def split_books(books, shards, dedupe_queries=False):
+    groups = plan_searches(books) if dedupe_queries else [[item] for item in enumerate(books)]
+    parts = [[] for _ in range(max(1, shards))]
+    for n, group in enumerate(groups):
+        parts[n % len(parts)].append(group)
+    return [part for part in parts if part]
+
+# [2] worker side
+def _init_worker(events):
+    global _events
+    _events = events
+
+def _send_progress(current, total, title, author):
+    _events.put(("progress", current, total, title, author))
+
+def _send_result(row):
+    _events.put(("result", row))
+
+
+class _ShardSink:
+    """Rows tagged with their book index (and wishlist book), appended to the shard file."""
+
+    def __init__(self, f, idx):
+        self.f = f
+        self.idx = idx
+
+    def put(self, row, book=None):
+        self.f.write(json.dumps([self.idx, row, book], ensure_ascii=False) + "\n")
+
+
+async def _search_shard_async(shard, groups, total, shard_dir, min_price, max_price, concurrency, backend,
+                              base_url, cache_options, browser_profile, page_max_uses, browser_contexts,
+                              adaptive_concurrency, dedupe_queries, stream_progress, stream_results, retry_policy):
+    cache = SearchCache(**cache_options) if cache_options is not None else None
+    coalescer = SearchCoalescer() if dedupe_queries else None
+    retry_queue = RetryQueue(retry_policy) if retry_policy is not None else None
+    breaker = retry_queue.breaker if retry_queue is not None else None
+    progress_callback = _send_progress if stream_progress else None
+    result_callback = _send_result if stream_results else None
+    limiter = make_limiter(concurrency, adaptive_concurrency)
+    shard_path = os.path.join(shard_dir, f"shard-{shard}.jsonl")
+
+    try:
+        with open(shard_path, "w", encoding="utf-8") as f:
+            async with search_resources(backend, concurrency, base_url, browser_profile,
+                                        page_max_uses, browser_contexts) as (http_backend, browser):
+                async def run_book(idx, book):
+                    if retry_queue is not None:
+                        retry_queue.attempt(idx, book["Title"])
+                    rows = await search_book(http_backend, browser, book, min_price, max_price, _ShardSink(f, idx),
+                                             idx, total, progress_callback, result_callback, base_url, cache,
+                                             limiter, coalescer, breaker=breaker)
+                    if rows is None and retry_queue is not None:
+                        retry_queue.defer(idx, book)
+
+                async def limited_run(idx, book):
+                    async with limiter.slot():
+                        await run_book(idx, book)
+
+                # same scheduling as run_skupszop_search_async
+                async def limited_task(group):
+                    await limited_run(*group[0])
+                    for idx, book in group[1:]:
+                        if coalescer is not None and not coalescer.known(book["Title"]):
+                            await limited_run(idx, book)
+                        else:
+                            await run_book(idx, book)
+
+                try:
+                    await asyncio.gather(*(limited_task(group) for group in groups))
+                    if retry_queue is not None:
+                        await retry_queue.drain(limited_run)
+                finally:
+                    if coalescer is not None:
+                        coalescer.cancel()
+    finally:
+        cache_stats = (cache.hits, cache.misses) if cache is not None else (0, 0)
+        if cache is not None:
+            cache.close()
+    retry_stats = None
+    if retry_queue is not None:
+        retry_stats = (retry_queue.attempts, retry_queue.titles, sorted(retry_queue.failed), retry_queue.breaker.opened)
+    return shard_path, cache_stats, retry_stats
+
+def _search_shard(shard, groups, total, shard_dir, **options):
+    try:
+        return asyncio.run(_search_shard_async(shard, groups, total, shard_dir, **options))
+    finally:
+        # last event of this shard; queued after all of its progress and results
+        _events.put(("done", shard))
+
+# [3] parent side
+def _dispatch(event, progress_callback, result_callback):
+    kind, *payload = event
+    callback = progress_callback if kind == "progress" else result_callback
+    if callback:
+        try:
+            callback(*payload)
+        except Exception:
+            pass
+
+def _wait_for_shards(futures, events, progress_callback, result_callback):
+    remaining = len(futures)
+    while remaining:
+        try:
+            event = events.get(timeout=0.1)
+        except queue.Empty:
+            # a crashed worker never sends "done"
+            if any(f.done() and f.exception() is not None for f in futures):
+                break
+            continue
+        if event[0] == "done":
+            remaining -= 1
+        else:
+            _dispatch(event, progress_callback, result_callback)
+    return [f.result() for f in futures]
+
+# [4] merging the shard files in book order (rows of one book keep their order)
+def merge_shard_outputs(shard_paths, output_path, output_format=None, history=None):
+    tagged = []
+    for path in shard_paths:
+        with open(path, encoding="utf-8") as f:
+            tagged.extend(json.loads(line) for line in f)
+    tagged.sort(key=lambda item: item[0])
+
+    sink = ResultSink(output_path, output_format, history=history)
+    try:
+        for _, row, book in tagged:
+            sink.write(row, book)
+    finally:
+        sink.close()
+    return len(tagged)
+
+# main function; shards defaults to the number of CPU cores
+def run_sharded_search(
+    input_csv=p.BOOKS_CSV,
+    output_csv=p.SKUPSZOP_CSV,
+    min_price=0,
+    max_price=20,
+    progress_callback=None,
+    result_callback=None,
+    shards=None,
+    concurrency_per_shard=10,
+    backend="http",
+    base_url=SKUPSZOP_URL,
+    cache=None,
+    output_format=None,
+    browser_profile="lean",
+    page_max_uses=50,
+    browser_contexts=1,
+    adaptive_concurrency=True,
+    dedupe_queries=True,
+    history=None,
+    retry=True,
+):
+    """
+    Failed searches are retried within their shard (`retry`: True, a RetryQueue
+    whose policy every shard uses and which collects their attempts, or False).
+    """
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend} (expected one of {SEARCH_BACKENDS})")
+    if browser_profile is not None and not isinstance(browser_profile, str):
+        raise ValueError("Sharded search takes a browser profile name, not a BrowserProfile instance")
+
+    start_time = time.time()
+
+    with open(input_csv, newline="", encoding="utf-8-sig") as f:
+        books = list(csv.DictReader(f))
+
+    parts = split_books(books, shards or os.cpu_count() or 1, dedupe_queries)
+    # each worker opens its own connection to the same cache file
+    cache_options = None
+    if cache is not None:
+        cache_options = {"path": cache.path, "ttl": cache.ttl, "max_entries": cache.max_entries, "bypass": cache.bypass}
+    # the shards retry with their own queues; their attempts are collected here
+    retry_queue = make_retry_queue(retry)
+    options = {
+        "min_price": min_price,
+        "max_price": max_price,
+        "concurrency": concurrency_per_shard,
+        "backend": backend,
+        "base_url": base_url,
+        "cache_options": cache_options,
+        "browser_profile": browser_profile,
+        "page_max_uses": page_max_uses,
+        "browser_contexts": browser_contexts,
+        "adaptive_concurrency": adaptive_concurrency,
+        "dedupe_queries": dedupe_queries,
+        "stream_progress": progress_callback is not None,
+        "stream_results": result_callback is not None,
+        "retry_policy": retry_queue.policy if retry_queue is not None else None,
+    }
+
+    # spawn: Playwright and the HTTP pools don't survive a fork
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    shard_paths = []
+    with tempfile.TemporaryDirectory(prefix="skupszop-shards-") as shard_dir:
+        if parts:
+            with ProcessPoolExecutor(max_workers=len(parts), mp_context=ctx,
+                                     initializer=_init_worker, initargs=(events,)) as pool:
+                futures = [
+                    pool.submit(_search_shard, shard, groups, len(books), shard_dir, **options)
+                    for shard, groups in enumerate(parts)
+                ]
+                for shard_path, (hits, misses), retry_stats in _wait_for_shards(futures, events, progress_callback,
+                                                                                 result_callback):
+                    shard_paths.append(shard_path)
+                    if cache is not None:
+                        cache.hits += hits
+                        cache.misses += misses
+                    if retry_stats is not None:
+                        attempts, titles, failed, breaker_opened = retry_stats
+                        retry_queue.attempts.update(attempts)
+                        retry_queue.titles.update(titles)
+                        retry_queue.failed.update(failed)
+                        retry_queue.breaker.opened += breaker_opened
+        merge_shard_outputs(shard_paths, output_csv, output_format, history)
+
+    log_retry_summary(retry_queue)
+    elapsed = time.time() - start_time
+    logger.info(f"Sharded search ended ({len(parts)} shards, elapsed: {elapsed:.2f} seconds)")
+    return output_csv
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from app.concurrency import ERROR, NO_CARDS, OK, TIMEOUT, classify_status
+from app.metrics import NULL_METRICS
+
+# lxml is much faster; html.parser keeps things working without it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# requests and bs4 are imported on first use, so cached runs and the CLI start fast
+
+SKUPSZOP_URL = "https://skupszop.pl"
+
+# texts of a search page that really has no results. They come from hand-written
+# stand-in pages, not from a captured page of the live site, so nothing relies on them alone
+NO_RESULTS_MARKERS = ("Brak wyników", "Nie znaleziono")
+
+# never visible text: a body that only has these is an unrendered app shell
+NON_CONTENT_TAGS = ("script", "noscript", "style", "template")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pl-PL,pl;q=0.9,en;q=0.8",
+    "Connection": "keep-alive",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def build_search_url(title, max_price, base_url=SKUPSZOP_URL):
+    encoded_title = urllib.parse.quote(title)
+    return f"{base_url}/wyszukaj?keyword={encoded_title}&price_to={max_price}"
+
+# same card structure as EXTRACT_CARDS_JS in skupszop_search_async.py
+def parse_product_cards(soup):
+    cards = []
+    for card in soup.select("div.product-card"):
+        link = card.select_one("div.product-card__title a")
+        if link is None:
+            continue
+        scope = link.parent.parent if link.parent is not None and link.parent.parent is not None else card
+        offers = []
+        for li in scope.select(".product-dropdown-condition-list li"):
+            price = li.select_one(".dropdown-list-price span")
+            condition = li.select_one(".dropdown-list-condition")
+            if price is not None and condition is not None:
+                offers.append({"price": price.get_text(strip=True), "condition": condition.get_text(strip=True)})
+        cards.append({
+            "title": link.get_text(strip=True),
+            "link": link.get("href"),
+            "authors": [a.get_text(strip=True) for a in card.select("div.product-card__author .author")],
+            "offers": offers,
+        })
+    return cards
+
+# a page whose body has no visible text yet (only scripts and empty mount points)
+def is_app_shell(soup):
+    body = soup.body or soup
+    for tag in body.find_all(NON_CONTENT_TAGS):
+        tag.decompose()
+    return not body.get_text(strip=True)
+
+# (cards, outcome) of a search page; cards is None when the page has to be rendered by a browser.
+# A server-rendered page without cards has no results, whatever its wording (NO_CARDS without a marker)
+def read_search_page(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, HTML_PARSER)
+    cards = parse_product_cards(soup)
+    if cards:
+        return cards, OK
+    if is_app_shell(soup):
+        return None, OK
+    text = soup.get_text(" ", strip=True)
+    return [], OK if any(marker in text for marker in NO_RESULTS_MARKERS) else NO_CARDS
+
+def parse_search_page(html):
+    return read_search_page(html)[0]
+
+
+class HttpSearchBackend:
+    """Browserless SkupSzop search over a keep-alive connection pool."""
+
+    name = "http"
+
+    def __init__(self, pool_size=10, timeout=15, base_url=SKUPSZOP_URL, metrics=None):
+        self.timeout = timeout
+        self.base_url = base_url
+        self.metrics = metrics or NULL_METRICS
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    # the connection pool is opened by the first search that isn't answered from the cache
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+        return self._session
+
+    # (cards, outcome); cards is None if the browser backend should take over.
+    # `metrics` of the calling run, when the backend is shared between runs
+    def search_with_outcome(self, title, max_price, metrics=None):
+        metrics = metrics or self.metrics
+        url = build_search_url(title, max_price, self.base_url)
+        session = self.session
+        import requests
+
+        try:
+            with metrics.span("http_fetch"):
+                response = session.get(url, timeout=self.timeout)
+        except requests.Timeout:
+            logger.warning(f"HTTP search timed out for {title}")
+            return None, TIMEOUT
+        except requests.RequestException as e:
+            logger.warning(f"HTTP search failed for {title}: {e}")
+            return None, ERROR
+        outcome = classify_status(response.status_code)
+        if outcome != OK:
+            logger.warning(f"HTTP search failed for {title}: status {response.status_code}")
+            return None, outcome
+        with metrics.span("http_parse"):
+            cards, outcome = read_search_page(response.content)
+        if outcome == NO_CARDS:
+            logger.info(f"No product cards (and no no-results text) for: {title}")
+        return cards, outcome
+
+    def search(self, title, max_price):
+        return self.search_with_outcome(title, max_price)[0]
+
+    async def search_with_outcome_async(self, title, max_price, metrics=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.search_with_outcome, title, max_price, metrics)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
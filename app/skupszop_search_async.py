@@ -1,142 +1,350 @@
 import csv
-import urllib.parse
-import re
 import time
 import logging
 import asyncio
-from difflib import SequenceMatcher
-from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
 from app import paths as p
-
-AUTHOR_MATCH_THRESHOLD = 0.7
-TITLE_SIMILARITY_THRESHOLD = 0.8
+from app.matching import (
+    AUTHOR_MATCH_THRESHOLD,
+    TITLE_SIMILARITY_THRESHOLD,
+    BookMatcher,
+    normalize_name,
+    is_author_match,
+    is_title_similar,
+)
+from app.browser_profile import resolve_profile
+from app.concurrency import (
+    BACKOFF_OUTCOMES, ERROR, NO_CARDS, OK, SERVER_ERROR, THROTTLED, TIMEOUT, AdaptiveLimiter, FixedLimiter,
+    classify_status,
+)
+from app.metrics import NULL_METRICS
+from app.page_pool import PagePool
+from app.query_planner import SearchCoalescer, plan_searches
+from app.result_sink import ResultSink
+from app.run_journal import RunJournal, journal_path, run_key
+from app.retry import RetryQueue
+from app.skupszop_backends import NO_RESULTS_MARKERS, SKUPSZOP_URL, HttpSearchBackend, build_search_url
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+SEARCH_BACKENDS = ("http", "playwright")
 
-def normalize_name(name):
-    name = name.lower()
-    name = re.sub(r"[.,.]", "", name)
-    return name.split()
-
-def is_author_match(csv_author, skupszop_authors, threshold=AUTHOR_MATCH_THRESHOLD):
-    #authors_csv is the author name from the csv file
-    #skupszop_authors is a list of possible matching authors on SkupSzop
-    csv_parts = normalize_name(csv_author)
-    for skupszop_author in skupszop_authors:
-        skupszop_author_parts = normalize_name(skupszop_author)
-        if set(csv_parts) == set(skupszop_author_parts):
-            return True
-        similarity = SequenceMatcher(None, " ".join(csv_parts), " ".join(skupszop_author_parts)).ratio()
-        if similarity >= threshold:
-            return True
-    return False
-
-def is_title_similar(a, b, threshold=TITLE_SIMILARITY_THRESHOLD):
-    return SequenceMatcher(None, a.casefold(), b.casefold()).ratio() >= threshold
-
-async def process_book(page, book, min_price, max_price, output_csv, idx, total, progress_callback=None, result_callback=None):
-    title, author = book["Title"], book["Author"]
+# metrics counter per failed request outcome
+OUTCOME_COUNTERS = {TIMEOUT: "timeouts", THROTTLED: "throttled", SERVER_ERROR: "server_errors", ERROR: "errors",
+                    NO_CARDS: "no_cards"}
 
-    if progress_callback:
+BROWSER_ARGS = [
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-animations",
+    "--disable-translate",
+    "--disable-background-networking",
+    "--disable-application-cache",
+    "--disable-software-rasterizer"
+]
+
+
+# all product cards in one page.evaluate round-trip; offers are read from the
+# title link's grandparent, the same scope the per-locator version used
+EXTRACT_CARDS_JS = """
+() => Array.from(document.querySelectorAll("div.product-card")).map(card => {
+    const link = card.querySelector("div.product-card__title a");
+    if (!link) return null;
+    const scope = (link.parentElement && link.parentElement.parentElement) || card;
+    const offers = [];
+    for (const li of scope.querySelectorAll(".product-dropdown-condition-list li")) {
+        const price = li.querySelector(".dropdown-list-price span");
+        const condition = li.querySelector(".dropdown-list-condition");
+        if (price && condition) {
+            offers.push({price: price.innerText.trim(), condition: condition.innerText.trim()});
+        }
+    }
+    return {
+        title: link.innerText.trim(),
+        link: link.getAttribute("href"),
+        authors: Array.from(card.querySelectorAll("div.product-card__author .author")).map(a => a.innerText.trim()),
+        offers: offers,
+    };
+}).filter(card => card !== null)
+"""
+
+async def extract_product_cards(page):
+    return await page.evaluate(EXTRACT_CARDS_JS)
+
+# matching and price filtering on extracted cards -> rows for the output csv
+def select_offers(cards, title, author, min_price, max_price, matcher=None):
+    # a card needs a similar title and at least one matching author to be saved
+    matcher = matcher or BookMatcher(title, author)
+    rows = []
+    for card in matcher.matching_cards(cards):
+        for offer in card["offers"]:
+            price = offer["price"]
+            try:
+                numeric_price = float(price.replace(",", "."))
+            except ValueError:
+                continue
+            if numeric_price < min_price or numeric_price > max_price:
+                continue
+            rows.append([card["title"], card["authors"], price, offer["condition"], card["link"]])
+    return rows
+
+# search page in the browser -> (cards, outcome); cards is None on navigation failure
+async def fetch_cards_with_outcome(page, title, max_price, base_url=SKUPSZOP_URL, accept_cookies=True, metrics=None):
+    from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+    metrics = metrics or NULL_METRICS
+    search_url = build_search_url(title, max_price, base_url)
+
+    try:
+        with metrics.span("browser_goto"):
+            response = await page.goto(search_url, timeout=15000)
+    except PlaywrightTimeout:
+        logger.warning(f"Timeout for: {title}")
+        return None, TIMEOUT
+    except Exception:
+        logger.warning(f"Navigation failed for: {title}")
+        return None, ERROR
+
+    outcome = classify_status(response.status) if response is not None else OK
+    if outcome in BACKOFF_OUTCOMES:
+        logger.warning(f"Search page returned {response.status} for: {title}")
+        return None, outcome
+
+    # zaakceptuj cookies (not needed when the browser profile pre-seeds consent)
+    if accept_cookies:
         try:
-            progress_callback(idx + 1, total if total else 1, title, author)
+            with metrics.span("browser_cookie_click"):
+                await page.click("button:has-text('Zezwól na wszystkie')", timeout=5000)
         except Exception:
             pass
 
-    logger.info(f"Searching: {title} - {author}")
-    encoded_title = urllib.parse.quote(title)
-    search_url = f"https://skupszop.pl/wyszukaj?keyword={encoded_title}&price_to={max_price}"
-
     try:
-        await page.goto(search_url, timeout=15000)
+        with metrics.span("browser_wait_for_cards"):
+            await page.locator("div.product-card").first.wait_for(timeout=15000)
     except Exception:
-        logger.warning(f"Timeout for: {title}")
-        return
+        if await page_says_no_results(page):
+            logger.warning(f"No results found for: {title}")
+            return [], OK
+        # most likely no results in wording we don't know; reported apart, but not a failure
+        logger.warning(f"No product cards (and no no-results text) for: {title}")
+        return [], NO_CARDS
 
-    # zaakceptuj cookies
+    # a page that crashed or navigated away is recycled and the book retried
     try:
-        await page.click("button:has-text('Zezwól na wszystkie')", timeout=5000)
+        with metrics.span("browser_extract"):
+            return await extract_product_cards(page), OK
     except Exception:
-        pass
+        logger.warning(f"Extracting product cards failed for: {title}")
+        return None, ERROR
 
+async def page_says_no_results(page):
     try:
-        product_elements = page.locator("div.product-card")
-        await product_elements.first.wait_for(timeout=15000)
+        text = await page.inner_text("body", timeout=2000)
     except Exception:
-        logger.warning(f"No results found for: {title}")
-        return
+        return False
+    return any(marker in text for marker in NO_RESULTS_MARKERS)
 
-    product_candidates = []
-    count = await product_elements.count()
-    for i in range(count):
-        title_elem = product_elements.nth(i)
-        try:
-            candidate_title = (await title_elem.locator("div.product-card__title a").inner_text()).strip()
-            link = await title_elem.locator("div.product-card__title a").get_attribute("href")
-        except:
-            continue
-        candidate_authors = [ (await a.inner_text()).strip() for a in await title_elem.locator("div.product-card__author .author").all() ]
-        product_candidates.append((candidate_title, candidate_authors, link))
-
-    matching_links = []
-    for candidate_title, candidate_authors, link in product_candidates:
-        if is_title_similar(candidate_title, title):
-            if not candidate_authors or is_author_match(author, candidate_authors):
-                matching_links.append(link)
-
-    if not matching_links:
-        return
+def count_outcome(metrics, outcome):
+    metrics.count("requests")
+    if outcome in OUTCOME_COUNTERS:
+        metrics.count(OUTCOME_COUNTERS[outcome])
+
+# matching + writing the offers of one book -> its rows (None if the search failed)
+def match_and_save(cards, title, author, min_price, max_price, sink, result_callback=None, metrics=NULL_METRICS):
+    if cards == []:
+        metrics.count("no_results")
+    if not cards:
+        return cards
+    with metrics.span("match"):
+        rows = select_offers(cards, title, author, min_price, max_price)
+    metrics.count("matches", len(rows))
+    with metrics.span("write"):
+        save_offers(rows, sink, result_callback, (title, author))
+    return rows
 
-    for link_url in matching_links:
-        product = page.locator(f'a[href="{link_url}"]').first.locator("..").locator("..")
+# `book`: (title, author) of the wishlist book, kept with the offers in the price history
+def save_offers(rows, sink, result_callback=None, book=None):
+    for row in rows:
+        sink.put(row, book)
+
+        # send result to Streamlit via callback
+        if result_callback:
+            try:
+                result_callback(row)
+            except Exception:
+                pass
+
+def report_progress(progress_callback, idx, total, title, author):
+    if progress_callback:
         try:
-            product_title = (await product.locator("div.product-card__title a").inner_text()).strip()
-        except:
-            product_title = title
+            progress_callback(idx + 1, total if total else 1, title, author)
+        except Exception:
+            pass
+    logger.info(f"Searching: {title} - {author}")
+
+# cache lookup in front of a search; failed searches (None) are not stored
+async def cached_search(cache, title, max_price, search):
+    if cache is not None:
+        cards = cache.get(title, max_price)
+        if cards is not None:
+            return cards
+    cards = await search()
+    if cache is not None and cards is not None:
+        cache.put(title, max_price, cards)
+    return cards
 
+# HTTP backend first (if any); the browser only renders pages the HTML backend can't read
+async def search_book(http_backend, browser, book, min_price, max_price, sink, idx, total, progress_callback=None, result_callback=None, base_url=SKUPSZOP_URL, cache=None, limiter=None, coalescer=None, metrics=None, breaker=None):
+    metrics = metrics or NULL_METRICS
+    title, author = book["Title"], book["Author"]
+    report_progress(progress_callback, idx, total, title, author)
+
+    # latency and outcome of each request feed the concurrency limiter (and circuit breaker)
+    async def observed(request):
+        if breaker is not None:
+            await breaker.wait()
+        start = time.monotonic()
+        cards, outcome = await request
+        if limiter is not None:
+            limiter.record(time.monotonic() - start, outcome)
+        if breaker is not None:
+            breaker.record(outcome)
+        count_outcome(metrics, outcome)
+        return cards, outcome
+
+    async def search():
+        if http_backend is not None:
+            cards, outcome = await observed(http_backend.search_with_outcome_async(title, max_price, metrics))
+            if cards is not None:
+                return cards
+            # an overloaded site won't do better for a browser
+            if outcome in BACKOFF_OUTCOMES:
+                return None
+            logger.info(f"Falling back to browser for: {title}")
+            metrics.count("browser_fallbacks")
+        pooled = await browser.acquire()
+        cards = None
         try:
-            product_authors_page = [ (await a.inner_text()).strip() for a in await product.locator("div.product-card__author .author").all() ]
-            if not is_author_match(author, product_authors_page):
-                continue
-        except:
-            product_authors_page = [author]
+            cards, _ = await observed(fetch_cards_with_outcome(pooled.page, title, max_price, base_url,
+                                                               not browser.skips_consent, metrics))
+            return cards
+        finally:
+            # a timed-out or crashed page is replaced instead of reused
+            await browser.release(pooled, failed=cards is None)
 
-        prices, conditions = [], []
-        cond_count = await product.locator(".product-dropdown-condition-list li").count()
-        for j in range(cond_count):
-            li = product.locator(".product-dropdown-condition-list li").nth(j)
-            try:
-                price = (await li.locator(".dropdown-list-price span").inner_text()).strip()
-                condition = (await li.locator(".dropdown-list-condition").inner_text()).strip()
-                prices.append(price)
-                conditions.append(condition)
-            except:
-                continue
-            
-        # save results to csv
-        for price, condition in zip(prices, conditions):
-            try:
-                numeric_price = float(price.replace(",", "."))
-                if numeric_price < min_price or numeric_price > max_price:
-                    continue
-            except ValueError:
-                continue
+    with metrics.span("book"):
+        # books sharing a search key share one search; matching stays per book
+        if coalescer is not None:
+            cards = await coalescer.run(title, lambda: cached_search(cache, title, max_price, search))
+        else:
+            cards = await cached_search(cache, title, max_price, search)
+        return match_and_save(cards, title, author, min_price, max_price, sink, result_callback, metrics)
+
+
+class LazyBrowser:
+    """Chromium with a pool of warm pages; only launched when the first page is needed."""
+
+    def __init__(self, profile=None, pool_size=10, page_max_uses=50, contexts=1):
+        self.profile = profile
+        self.pool = None
+        self._pool_options = {"size": pool_size, "max_uses": page_max_uses, "contexts": contexts}
+        self._pw = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def launched(self):
+        return self._browser is not None
+
+    @property
+    def skips_consent(self):
+        return self.profile is not None and self.profile.skips_consent
+
+    async def _new_context(self):
+        if self.profile is None:
+            return await self._browser.new_context()
+        context = await self._browser.new_context(**self.profile.context_options())
+        await self.profile.apply(context)
+        return context
+
+    async def acquire(self):
+        async with self._lock:
+            if self._browser is None:
+                # Playwright is only imported once a search needs the browser
+                from playwright.async_api import async_playwright
+
+                self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+                self.pool = PagePool(self._new_context, **self._pool_options)
+        return await self.pool.acquire()
+
+    async def release(self, pooled, failed=False):
+        await self.pool.release(pooled, failed)
 
-            row = [product_title, product_authors_page, price, condition, link_url]
-            with open(output_csv, "a", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
-                
-            # send result to Streamlit via callback
-            if result_callback:
-                try:
-                    result_callback(row)
-                except Exception:
-                    pass
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            logger.info(f"Page pool: {self.pool.stats()}")
+        if self._browser is not None:
+            await self._browser.close()
+            if self.profile is not None:
+                self.profile.log_stats()
+        if self._pw is not None:
+            await self._pw.stop()
+        self._pw = self._browser = self.pool = None
+
+# HTTP backend (if selected) and a lazily launched browser, closed on exit;
+# a caller-owned `browser` or `http_backend` (shared between runs) is reused and left open
+@asynccontextmanager
+async def search_resources(backend="http", max_concurrent_pages=10, base_url=SKUPSZOP_URL, browser_profile="lean",
+                           page_max_uses=50, browser_contexts=1, metrics=None, browser=None, http_backend=None):
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend} (expected one of {SEARCH_BACKENDS})")
+
+    own_browser = browser is None
+    if own_browser:
+        browser = LazyBrowser(resolve_profile(browser_profile), pool_size=max_concurrent_pages,
+                              page_max_uses=page_max_uses, contexts=browser_contexts)
+    # a shared pool only serves runs against its own site
+    if backend != "http" or (http_backend is not None and http_backend.base_url != base_url):
+        http_backend = None
+    own_http_backend = backend == "http" and http_backend is None
+    if own_http_backend:
+        http_backend = HttpSearchBackend(pool_size=max_concurrent_pages, base_url=base_url, metrics=metrics)
+    try:
+        yield http_backend, browser
+    finally:
+        if own_http_backend:
+            http_backend.close()
+        if own_browser:
+            await browser.close()
+
+# max_concurrent_pages is the fixed limit, or the ceiling of the adaptive one
+def make_limiter(max_concurrent_pages=10, adaptive=True, on_change=None):
+    if not adaptive:
+        return FixedLimiter(max_concurrent_pages)
+    return AdaptiveLimiter(initial=min(4, max_concurrent_pages), max_limit=max_concurrent_pages, on_change=on_change)
+
+# retry=True -> default RetryQueue; a RetryQueue is used as given; False/None -> no retries
+def make_retry_queue(retry=True):
+    if isinstance(retry, RetryQueue):
+        return retry
+    return RetryQueue() if retry else None
+
+def log_retry_summary(retry_queue, metrics=None):
+    if retry_queue is None:
+        return
+    summary = retry_queue.summary()
+    if metrics is not None:
+        metrics.count("retried_books", summary["retried"])
+        metrics.count("failed_books", len(summary["failed"]))
+    if summary["retried"] or summary["failed"]:
+        logger.info(f"Retries: {summary['retried']} books retried, {summary['recovered']} recovered, "
+                    f"{len(summary['failed'])} failed; attempts per book: {summary['attempts_per_book']}")
 
 # main async function
 async def run_skupszop_search_async(
@@ -147,47 +355,129 @@ async def run_skupszop_search_async(
     progress_callback=None,
     result_callback=None,
     max_concurrent_pages=10,
+    backend="http",
+    base_url=SKUPSZOP_URL,
+    cache=None,
+    output_format=None,
+    browser_profile="lean",
+    page_max_uses=50,
+    browser_contexts=1,
+    adaptive_concurrency=True,
+    concurrency_callback=None,
+    dedupe_queries=True,
+    metrics=None,
+    browser=None,
+    http_backend=None,
+    books=None,
+    limiter=None,
+    recheck=None,
+    history=None,
+    resume=False,
+    checkpoint=None,
+    retry=True,
 ):
+    """
+    `books` (dicts with Title and Author) replaces reading `input_csv`; a shared
+    `limiter` caps concurrency across runs instead of a per-run one; a shared
+    `browser` (LazyBrowser) and `http_backend` are reused and left open. With a
+    `recheck` scheduler only the books it finds due are searched, most promising first.
+    Saved offers are also appended to `history` (PriceHistory).
+    With `resume=True` (or a `checkpoint` journal path) finished books are
+    journaled; a resumed run skips them and continues the existing output.
+    Failed searches are retried after the main pass (`retry`: True, a
+    RetryQueue, or False to drop them as before).
+    """
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend} (expected one of {SEARCH_BACKENDS})")
+
     start_time = time.time()
-    with open(output_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Title", "Author", "Price", "Condition", "Link"])
 
-    with open(input_csv, newline="", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        books = list(reader)
+    if books is None:
+        with open(input_csv, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            books = list(reader)
+
+    # checkpoint: keyed by the input and journaled by input position, which the re-check plan doesn't change
+    journal, resumed = None, False
+    if resume or checkpoint:
+        journal = RunJournal(checkpoint or journal_path(output_csv), run_key(books, min_price, max_price, output_format))
+        resumed = journal.open(output_csv, resume)
+
+    book_ids = list(range(len(books)))
+    if recheck is not None:
+        recheck.begin()
+        book_ids = recheck.plan_indexes(books, rechecked_since=journal.started if resumed else None)
+        books = [books[i] for i in book_ids]
 
     total = len(books)
+    if limiter is None:
+        limiter = make_limiter(max_concurrent_pages, adaptive_concurrency, concurrency_callback)
+
+    # query plan: books that produce the same search are handled as one group
+    coalescer = SearchCoalescer() if dedupe_queries else None
+    groups = plan_searches(books) if dedupe_queries else [[item] for item in enumerate(books)]
+    if dedupe_queries:
+        logger.info(f"Query plan: {total} books -> {len(groups)} searches")
+
+    retry_queue = make_retry_queue(retry)
+    breaker = retry_queue.breaker if retry_queue is not None else None
 
-    async with async_playwright() as pw:
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--disable-gpu",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-animations",
-                "--disable-translate",
-                "--disable-background-networking",
-                "--disable-application-cache",
-                "--disable-software-rasterizer"
-            ]
-        )
-        context = await browser.new_context()
-
-        semaphore = asyncio.Semaphore(max_concurrent_pages)
-
-        async def sem_task(book, idx):
-            async with semaphore:
-                page = await context.new_page()
-                await process_book(page, book, min_price, max_price, output_csv, idx, total, progress_callback, result_callback)
-                await page.close()
-
-        tasks = [sem_task(book, idx) for idx, book in enumerate(books)]
-        await asyncio.gather(*tasks)
-
-        await browser.close()
+    # books already in the output of an interrupted run are skipped
+    if journal is not None:
+        groups = [[item for item in group if book_ids[item[0]] not in journal.completed] for group in groups]
+        groups = [group for group in groups if group]
+
+    try:
+        async with ResultSink(output_csv, output_format, history=history, append=resumed, journal=journal) as sink, \
+                search_resources(backend, max_concurrent_pages, base_url, browser_profile,
+                                 page_max_uses, browser_contexts, metrics, browser, http_backend) as (http_backend, browser):
+            async def run_book(idx, book):
+                if retry_queue is not None:
+                    retry_queue.attempt(idx, book["Title"])
+                rows = await search_book(http_backend, browser, book, min_price, max_price, sink, idx, total, progress_callback, result_callback, base_url, cache, limiter, coalescer, metrics, breaker)
+                # a failed search waits in the retry queue instead of being dropped
+                if rows is None and retry_queue is not None and retry_queue.defer(idx, book):
+                    return
+                if recheck is not None:
+                    recheck.record(book["Title"], rows)
+                # a failed search stays unfinished, a resumed run tries it again
+                if journal is not None and rows is not None:
+                    sink.book_done(book_ids[idx])
+
+            async def limited_run(idx, book):
+                async with limiter.slot():
+                    await run_book(idx, book)
+
+            async def limited_task(group):
+                # only the first book searches (inside a slot); the rest reuse its cards
+                await limited_run(*group[0])
+                for idx, book in group[1:]:
+                    # unless that search failed: then the next book needs a slot of its own
+                    if coalescer is not None and not coalescer.known(book["Title"]):
+                        await limited_run(idx, book)
+                    else:
+                        await run_book(idx, book)
+
+            tasks = [limited_task(group) for group in groups]
+            try:
+                await asyncio.gather(*tasks)
+                if retry_queue is not None:
+                    await retry_queue.drain(limited_run)
+            finally:
+                if coalescer is not None:
+                    coalescer.cancel()
+    except BaseException:
+        if journal is not None:
+            journal.close()
+        raise
+    if journal is not None:
+        journal.close(finished=True)
 
+    if recheck is not None:
+        recheck.finish()
+    log_retry_summary(retry_queue, metrics)
+    if metrics is not None:
+        metrics.publish()
     elapsed = time.time() - start_time
     logger.info(f"Search ended (elapsed: {elapsed:.2f} seconds)")
     return output_csv
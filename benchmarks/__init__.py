@@ -0,0 +1,3 @@
+"""
+Benchmarks and local stand-in servers for Goodreads and SkupSzop.
+"""
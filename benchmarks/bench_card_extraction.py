@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of SkupSzop product-card extraction on a saved results page:
+per-element Playwright locator calls vs a single page.evaluate round-trip.
+
+    python -m benchmarks.bench_card_extraction --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from playwright.async_api import async_playwright
+
+from app.skupszop_search_async import extract_product_cards
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "skupszop_results.html")
+
+
+# the per-locator extraction used before EXTRACT_CARDS_JS
+async def extract_with_locators(page):
+    cards = []
+    product_elements = page.locator("div.product-card")
+    for i in range(await product_elements.count()):
+        card = product_elements.nth(i)
+        try:
+            title = (await card.locator("div.product-card__title a").inner_text()).strip()
+            link = await card.locator("div.product-card__title a").get_attribute("href")
+        except Exception:
+            continue
+        authors = [(await a.inner_text()).strip() for a in await card.locator("div.product-card__author .author").all()]
+        product = page.locator(f'a[href="{link}"]').first.locator("..").locator("..")
+        offers = []
+        for j in range(await product.locator(".product-dropdown-condition-list li").count()):
+            li = product.locator(".product-dropdown-condition-list li").nth(j)
+            offers.append({
+                "price": (await li.locator(".dropdown-list-price span").inner_text()).strip(),
+                "condition": (await li.locator(".dropdown-list-condition").inner_text()).strip(),
+            })
+        cards.append({"title": title, "link": link, "authors": authors, "offers": offers})
+    return cards
+
+
+async def time_extraction(page, extract, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cards = await extract(page)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return cards, timings[len(timings) // 2]
+
+
+async def main(repeat):
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        # keep external assets out of the measurement
+        await page.route("**/*", lambda route: route.abort())
+        await page.set_content(html)
+
+        legacy_cards, legacy_time = await time_extraction(page, extract_with_locators, repeat)
+        cards, evaluate_time = await time_extraction(page, extract_product_cards, repeat)
+        await browser.close()
+
+    assert cards == legacy_cards, "single-evaluate extraction returned different cards"
+    print(f"cards:             {len(cards)}")
+    print(f"locator calls:     {legacy_time * 1000:.1f} ms (median of {repeat})")
+    print(f"one page.evaluate: {evaluate_time * 1000:.1f} ms (median of {repeat})")
+    print(f"speedup:           {legacy_time / evaluate_time:.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args().repeat))
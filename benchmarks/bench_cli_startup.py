@@ -0,0 +1,93 @@
+"""
+Startup of the batch CLI: wall time of `--help` and of a no-op search (a resumed run whose
+books are all done), and which heavy modules each loads.
+
+    python -m benchmarks.bench_cli_startup --repeat 10
+"""
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# imported only by the commands (and backends) that need them
+HEAVY_MODULES = ("requests", "bs4", "playwright", "pyarrow", "pandas", "streamlit")
+
+# prints the heavy modules loaded after running the CLI with the given arguments
+PROBE = """
+import sys
+from app.cli import main
+code = main(sys.argv[1:])
+print(",".join(m for m in {heavy!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+
+
+# -> (median wall seconds, heavy modules loaded); `prepare` runs before each (untimed)
+def measure(cli_args, repeat, prepare=None):
+    times = []
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        python("-m", "app", *cli_args)
+        times.append(time.perf_counter() - start)
+    if prepare is not None:
+        prepare()
+    probe = python("-c", PROBE.format(heavy=HEAVY_MODULES), *cli_args)
+    loaded = probe.stderr.strip().splitlines()[-1] if probe.stderr.strip() else ""
+    return statistics.median(times), loaded
+
+
+# books CSV and the journal of a run that already finished its only book
+def write_finished_run(books_csv, output):
+    from app.result_sink import CSV_HEADER
+    from app.run_journal import RunJournal, journal_path, run_key
+
+    book = {"Title": "Rdza", "Author": "Jakub Małecki"}
+    with open(books_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([list(book), list(book.values())])
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(CSV_HEADER)
+    # same key as the CLI's defaults: min price 0, max price 20, format from the extension
+    journal = RunJournal(journal_path(output), run_key([book], 0, 20, None))
+    journal.open(output)
+    journal.commit([0], os.path.getsize(output))
+    journal.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        books, output = os.path.join(tmp, "books.csv"), os.path.join(tmp, "prices.csv")
+        # a resumed run that finds nothing left removes its journal, so each run gets a fresh one
+        scenarios = [
+            ("python -c pass", None, None),
+            ("python -m app --help", ["--help"], None),
+            ("python -m app search (all done)", ["-q", "search", "--books", books, "--output", output, "--resume"],
+             lambda: write_finished_run(books, output)),
+        ]
+        for name, cli_args, prepare in scenarios:
+            if cli_args is None:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    python("-c", "pass")
+                print(f"{name:34} {(time.perf_counter() - start) / args.repeat * 1000:7.1f} ms")
+                continue
+            seconds, loaded = measure(cli_args, args.repeat, prepare)
+            print(f"{name:34} {seconds * 1000:7.1f} ms   heavy modules: {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+End-to-end benchmark: the Goodreads scraper and both SkupSzop engines against
+local stand-in servers. Each scenario runs in a fresh process and reports
+books/s, p50/p95/p99 latency, peak RSS and CPU time. Results go to a JSON file;
+--compare flags regressions against an earlier run.
+
+    python -m benchmarks.bench_e2e --books 300 --latency 0.05 --output bench.json
+    python -m benchmarks.bench_e2e --books 300 --latency 0.05 --compare bench.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.concurrency import percentile
+from benchmarks.standin_servers import generated_skupszop_server, goodreads_shelf_server, make_shelf_books
+
+SCENARIOS = ("goodreads_sequential", "goodreads_concurrent", "skupszop_sync", "skupszop_async")
+
+# metric -> True when higher is better
+COMPARED_METRICS = {
+    "books_per_s": True,
+    "latency_p95": False,
+    "cpu_s": False,
+    "peak_rss_mb": False,
+}
+
+
+# [1] timing helpers, only used inside a scenario process
+class _CallTimer:
+    """Replaces owner.name with a wrapper that records the duration of every call."""
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.samples = []
+
+    def __enter__(self):
+        original = self.original = getattr(self.owner, self.name)
+        samples = self.samples
+
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - start)
+        else:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - start)
+
+        setattr(self.owner, self.name, timed)
+        return self
+
+    def __exit__(self, *exc):
+        setattr(self.owner, self.name, self.original)
+
+
+def _latency_summary(samples, unit):
+    return {
+        "latency_unit": unit,
+        "latency_p50": percentile(samples, 0.50) if samples else 0.0,
+        "latency_p95": percentile(samples, 0.95) if samples else 0.0,
+        "latency_p99": percentile(samples, 0.99) if samples else 0.0,
+    }
+
+# [2] one scenario in the current process -> (items, per-item latencies, unit)
+def _goodreads(shelf_url, concurrent):
+    import requests
+    from app.goodreads_scraper import scrape_goodreads_shelf
+
+    # per page: one shelf request
+    with _CallTimer(requests.Session, "get") as timer:
+        books = scrape_goodreads_shelf(shelf_url, delay=0, debug=False, max_pages=1000, concurrent=concurrent)
+    return len(books), timer.samples, "page"
+
+def _skupszop_sync(input_csv, output_csv, search_url, max_price):
+    from app import skupszop_search_async as ssa
+    from app.skupszop_search import run_skupszop_search
+
+    # the sync entry point runs the async engine, so books are timed the same way
+    with _CallTimer(ssa, "search_book") as timer:
+        run_skupszop_search(input_csv, output_csv, max_price=max_price, base_url=search_url)
+    return len(timer.samples), timer.samples, "book"
+
+def _skupszop_async(input_csv, output_csv, search_url, max_price, concurrency):
+    from app import skupszop_search_async as ssa
+
+    with _CallTimer(ssa, "search_book") as timer:
+        asyncio.run(ssa.run_skupszop_search_async(input_csv, output_csv, max_price=max_price, base_url=search_url,
+                                                  max_concurrent_pages=concurrency))
+    return len(timer.samples), timer.samples, "book"
+
+# -> (CPU seconds, peak RSS in MB); the resource module is Unix-only, elsewhere peak RSS is None
+def _process_usage():
+    try:
+        import resource
+    except ImportError:
+        return time.process_time(), None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def run_scenario(name, options):
+    logging.disable(logging.INFO)
+    cpu_before, _ = _process_usage()
+    start = time.perf_counter()
+
+    if name in ("goodreads_sequential", "goodreads_concurrent"):
+        items, samples, unit = _goodreads(options["shelf_url"], name == "goodreads_concurrent")
+    elif name == "skupszop_sync":
+        items, samples, unit = _skupszop_sync(options["input_csv"], options["output_csv"],
+                                              options["search_url"], options["max_price"])
+    else:
+        items, samples, unit = _skupszop_async(options["input_csv"], options["output_csv"], options["search_url"],
+                                               options["max_price"], options["concurrency"])
+
+    elapsed = time.perf_counter() - start
+    cpu, peak_rss_mb = _process_usage()
+    books = options["books"] if name.startswith("goodreads") else items
+    result = {
+        "books": books,
+        "elapsed_s": elapsed,
+        "books_per_s": books / elapsed if elapsed else 0.0,
+        **_latency_summary(samples, unit),
+        "cpu_s": cpu - cpu_before,
+        "peak_rss_mb": peak_rss_mb,
+    }
+    if name.startswith("goodreads") and items != options["books"]:
+        result["books_scraped"] = items
+    return result
+
+# [3] fresh process per scenario, so peak RSS and CPU time aren't shared
+def run_suite(books=300, latency=0.05, error_rate=0.0, hit_rate=0.7, max_price=30, concurrency=10,
+              scenarios=SCENARIOS, seed=0):
+    shelf = make_shelf_books(books)
+    # a share of the shelf is missing from the shop ("Brak wyników")
+    stocked = shelf[:int(len(shelf) * hit_rate)]
+    catalog = {book["title"]: book["author"] for book in stocked}
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            goodreads_shelf_server(books=shelf, latency=latency, error_rate=error_rate, seed=seed) as shelf_server, \
+            generated_skupszop_server(catalog, latency=latency, error_rate=error_rate, seed=seed) as search_server:
+        input_csv = os.path.join(tmp, "books.csv")
+        with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Title", "Author"])
+            writer.writerows((book["title"], book["author"]) for book in shelf)
+
+        options = {
+            "books": books,
+            "shelf_url": f"{shelf_server.url}/review/list/1-bench?shelf=to-read",
+            "search_url": search_server.url,
+            "input_csv": input_csv,
+            "output_csv": os.path.join(tmp, "prices.csv"),
+            "max_price": max_price,
+            "concurrency": concurrency,
+        }
+        for name in scenarios:
+            with ctx.Pool(1) as pool:
+                results[name] = pool.apply(run_scenario, (name, options))
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {"books": books, "latency": latency, "error_rate": error_rate, "hit_rate": hit_rate,
+                   "max_price": max_price, "concurrency": concurrency, "seed": seed},
+        "scenarios": results,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# [4] regression check: relative change of each compared metric, worse beyond tolerance
+def compare_reports(baseline, current, tolerance=0.15):
+    rows = []
+    for name, metrics in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = -change > tolerance if higher_is_better else change > tolerance
+            rows.append({"scenario": name, "metric": metric, "before": old, "after": new,
+                         "change": change, "regressed": regressed})
+    return rows
+
+def print_report(report):
+    print(f"commit {report['commit']}  cpus {report['cpus']}  config {report['config']}")
+    print(f"{'scenario':<22}{'books/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'cpu s':>8}{'rss MB':>9}")
+    for name, r in report["scenarios"].items():
+        rss = "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.1f}"
+        print(f"{name:<22}{r['books_per_s']:>10.1f}{r['latency_p50']:>9.3f}{r['latency_p95']:>9.3f}"
+              f"{r['latency_p99']:>9.3f}{r['cpu_s']:>8.2f}{rss:>9}  (latency per {r['latency_unit']})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--hit-rate", type=float, default=0.7, help="share of the shelf stocked by the shop")
+    parser.add_argument("--max-price", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative change before failing")
+    args = parser.parse_args()
+
+    report = run_suite(args.books, args.latency, args.error_rate, args.hit_rate, args.max_price,
+                       args.concurrency, args.scenarios, args.seed)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_reports(baseline, report, args.tolerance)
+        print(f"\ncompared with {baseline.get('commit')}:")
+        if baseline.get("config") != report["config"]:
+            print(f"note: different config {baseline.get('config')}")
+        for row in rows:
+            flag = "  REGRESSION" if row["regressed"] else ""
+            print(f"{row['scenario']:<22}{row['metric']:<13}{row['before']:>10.3f} -> {row['after']:>10.3f}"
+                  f"  ({row['change']:+.1%}){flag}")
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Parse time of one Goodreads shelf page: BeautifulSoup (html.parser, full tree)
+against the lxml path that only parses the review rows and the pagination.
+
+    python -m benchmarks.bench_goodreads_parse --repeat 50
+"""
+import argparse
+import time
+
+from app.goodreads_scraper import parse_shelf_page_lxml, parse_shelf_page_soup
+from benchmarks.standin_servers import FIXTURES_DIR, make_shelf_books, render_shelf_page
+
+
+def time_parser(parser, page, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = parser(page)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(f"{FIXTURES_DIR}/goodreads_shelf_page.html", "rb") as f:
+        fixture = f.read()
+    pages = {
+        "fixture page": fixture,
+        "stand-in page (100 rows)": render_shelf_page(make_shelf_books(100), page=1, total_pages=5).encode(),
+    }
+
+    for name, page in pages.items():
+        soup_time, soup_result = time_parser(parse_shelf_page_soup, page, args.repeat)
+        lxml_time, lxml_result = time_parser(parse_shelf_page_lxml, page, args.repeat)
+        assert soup_result == lxml_result, f"parsers disagree on the {name}"
+        print(f"{name}: {len(page) / 1024:.0f} KB, {len(soup_result[0])} books")
+        print(f"  BeautifulSoup: {soup_time * 1000:7.2f} ms/page")
+        print(f"  lxml:          {lxml_time * 1000:7.2f} ms/page  ({soup_time / lxml_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Wall-clock comparison of the sequential and concurrent Goodreads shelf scrapers
+against a local stand-in shelf server.
+
+    python -m benchmarks.bench_goodreads_shelf --books 1500 --latency 0.15
+"""
+import argparse
+import time
+
+from app.goodreads_scraper import scrape_goodreads_shelf
+from benchmarks.standin_servers import goodreads_shelf_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=1500)
+    parser.add_argument("--latency", type=float, default=0.15, help="server latency per page (s)")
+    parser.add_argument("--delay", type=float, default=0.0, help="sequential delay between pages (s)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with goodreads_shelf_server(num_books=args.books, latency=args.latency) as server:
+        shelf_url = f"{server.url}/review/list/1-bench?shelf=to-read"
+
+        start = time.perf_counter()
+        sequential = scrape_goodreads_shelf(shelf_url, delay=args.delay, debug=False, max_pages=1000)
+        sequential_time = time.perf_counter() - start
+        sequential_requests = server.request_count
+
+        start = time.perf_counter()
+        concurrent = scrape_goodreads_shelf(shelf_url, debug=False, max_pages=1000,
+                                            concurrent=True, max_concurrency=args.concurrency)
+        concurrent_time = time.perf_counter() - start
+        concurrent_requests = server.request_count - sequential_requests
+
+    assert sequential == concurrent, "concurrent mode returned a different shelf"
+    print(f"books:      {len(sequential)}")
+    print(f"sequential: {sequential_time:.2f}s ({sequential_requests} requests)")
+    print(f"concurrent: {concurrent_time:.2f}s ({concurrent_requests} requests)")
+    print(f"speedup:    {sequential_time / concurrent_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Batch title/author matching: BookMatcher vs a fresh difflib.SequenceMatcher per candidate.
+
+    python -m benchmarks.bench_matching --books 2000
+"""
+import argparse
+import time
+from difflib import SequenceMatcher
+
+from app.matching import AUTHOR_MATCH_THRESHOLD, TITLE_SIMILARITY_THRESHOLD, BookMatcher, normalize_name
+from app.skupszop_backends import parse_search_page
+from benchmarks.standin_servers import load_fixture
+
+
+# matching as it was done before app.matching
+def legacy_matching_cards(cards, title, author):
+    matched = []
+    for card in cards:
+        if SequenceMatcher(None, card["title"].casefold(), title.casefold()).ratio() < TITLE_SIMILARITY_THRESHOLD:
+            continue
+        csv_parts = normalize_name(author)
+        for candidate in card["authors"]:
+            parts = normalize_name(candidate)
+            if set(csv_parts) == set(parts) or \
+                    SequenceMatcher(None, " ".join(csv_parts), " ".join(parts)).ratio() >= AUTHOR_MATCH_THRESHOLD:
+                matched.append(card)
+                break
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=2000)
+    args = parser.parse_args()
+
+    cards = parse_search_page(load_fixture("skupszop_results.html"))
+    # wishlist entries: every card title/author pair, repeated up to --books
+    wishlist = [(card["title"], (card["authors"] or ["Unknown"])[0]) for card in cards]
+    wishlist = (wishlist * (args.books // len(wishlist) + 1))[:args.books]
+
+    start = time.perf_counter()
+    legacy = [legacy_matching_cards(cards, title, author) for title, author in wishlist]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = [BookMatcher(title, author).matching_cards(cards) for title, author in wishlist]
+    batched_time = time.perf_counter() - start
+
+    assert batched == legacy, "BookMatcher disagrees with the difflib matching"
+    comparisons = len(wishlist) * len(cards)
+    print(f"books x cards: {len(wishlist)} x {len(cards)} = {comparisons}")
+    print(f"difflib:       {legacy_time:.3f}s ({comparisons / legacy_time:,.0f} cards/s)")
+    print(f"BookMatcher:   {batched_time:.3f}s ({comparisons / batched_time:,.0f} cards/s)")
+    print(f"speedup:       {legacy_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
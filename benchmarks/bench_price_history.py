@@ -0,0 +1,65 @@
+"""
+Price-history queries after a year of daily runs (latest offers, drops, 30-day min/median).
+
+    python -m benchmarks.bench_price_history --days 365 --offers 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.price_history import DAY, PriceHistory
+
+CONDITIONS = ("jak nowa", "bardzo dobry", "dobry", "akceptowalny")
+
+
+def fill(history, days, offers, books, seed=0):
+    rng = random.Random(seed)
+    catalog = [(f"Book {rng.randrange(books)}", f"https://skupszop.pl/book?id={i}") for i in range(offers * 2)]
+    for day in range(days):
+        history.start_run(now=day * DAY)
+        history.add_records([
+            {"title": title, "authors": [], "price": rng.randrange(300, 6000) / 100,
+             "condition": rng.choice(CONDITIONS), "link": link}
+            for title, link in rng.sample(catalog, offers)
+        ], now=day * DAY)
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--offers", type=int, default=2000, help="offers saved per run")
+    parser.add_argument("--books", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.sqlite3")
+        history = PriceHistory(path)
+        start = time.perf_counter()
+        fill(history, args.days, args.offers, args.books)
+        print(f"observations: {args.days * args.offers:,} ({time.perf_counter() - start:.1f}s to write, "
+              f"{os.path.getsize(path) / 2**20:.1f} MB)")
+
+        now = args.days * DAY
+        for name, fn in [
+            ("latest_offers(title)", lambda: history.latest_offers("Book 7")),
+            ("price_stats(title, 30 days)", lambda: history.price_stats("Book 7", days=30, now=now)),
+            ("price_stats(title, 365 days)", lambda: history.price_stats("Book 7", days=365, now=now)),
+            ("latest_offers()", lambda: history.latest_offers()),
+            ("price_drops()", lambda: history.price_drops()),
+        ]:
+            ms, result = timed(fn)
+            print(f"{name:30} {ms:8.2f} ms ({len(result)} {'rows' if isinstance(result, list) else 'fields'})")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
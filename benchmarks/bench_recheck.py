@@ -0,0 +1,71 @@
+"""
+Re-check scheduling: searches per daily run and how fast new arrivals are found, against searching every book daily.
+
+    python -m benchmarks.bench_recheck --books 2000 --days 60
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from app.recheck import DAY, RecheckScheduler
+
+
+def simulate(books, days, in_stock, arrivals_per_day, full_sweep_days, seed=0):
+    rng = random.Random(seed)
+    titles = [f"Book {i}" for i in range(books)]
+    # books with offers now; each day a few more arrive, some sell out
+    stocked = set(rng.sample(titles, int(books * in_stock)))
+    arrived_on = {}
+    searches, delays = [], []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recheck = RecheckScheduler(os.path.join(tmp, "recheck.sqlite3"), full_sweep_days=full_sweep_days)
+        for day in range(days):
+            now = day * DAY
+            for title in rng.sample(titles, arrivals_per_day):
+                if title not in stocked:
+                    stocked.add(title)
+                    arrived_on[title] = day
+            for title in rng.sample(sorted(stocked), max(1, len(stocked) // 20)):
+                stocked.discard(title)
+                arrived_on.pop(title, None)
+
+            recheck.begin(now)
+            due = recheck.plan([{"Title": title} for title in titles], now)
+            for book in due:
+                title = book["Title"]
+                hit = title in stocked
+                recheck.record(title, [[title, [], "9,99", "dobry", "x"]] if hit else [], now)
+                if hit and title in arrived_on:
+                    delays.append(day - arrived_on.pop(title))
+            recheck.finish()
+            searches.append(len(due))
+        recheck.close()
+    return searches, delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--in-stock", type=float, default=0.1, help="share of books with offers at the start")
+    parser.add_argument("--arrivals", type=int, default=20, help="books getting new offers per day")
+    parser.add_argument("--full-sweep-days", type=int, default=7)
+    args = parser.parse_args()
+
+    searches, delays = simulate(args.books, args.days, args.in_stock, args.arrivals, args.full_sweep_days)
+    # the first week settles the miss streaks
+    steady = searches[7:] or searches
+    baseline = args.books
+    mean = sum(steady) / len(steady)
+    delays.sort()
+    print(f"books: {args.books}, days: {args.days}, full sweep every {args.full_sweep_days} days")
+    print(f"searches/day: {mean:,.0f} vs {baseline:,} without re-check scheduling ({1 - mean / baseline:.0%} fewer)")
+    if delays:
+        print(f"new arrivals found: {len(delays)}, median delay {delays[len(delays) // 2]} days, "
+              f"max {delays[-1]} days, same day {sum(d == 0 for d in delays) / len(delays):.0%}")
+
+
+if __name__ == "__main__":
+    main()
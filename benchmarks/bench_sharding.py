@@ -0,0 +1,50 @@
+"""
+Scaling of the sharded SkupSzop search (1/2/4/8 worker processes) against a
+local stand-in search server.
+
+    python -m benchmarks.bench_sharding --books 400 --latency 0.05 --concurrency 4
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from app.sharding import run_sharded_search
+from benchmarks.standin_servers import generated_skupszop_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per search (s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent searches per shard")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    # distinct titles: copies of one book would be coalesced into a single search
+    catalog = {f"Book {i}": f"Author {i}" for i in range(args.books)}
+    with tempfile.TemporaryDirectory() as tmp, \
+            generated_skupszop_server(catalog, latency=args.latency) as server:
+        input_csv = os.path.join(tmp, "books.csv")
+        with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Title", "Author"])
+            writer.writerows(catalog.items())
+
+        print(f"books: {args.books}, cpus: {os.cpu_count()}, concurrency per shard: {args.concurrency}")
+        baseline = None
+        for shards in args.shards:
+            requests_before = server.request_count
+            start = time.perf_counter()
+            run_sharded_search(input_csv, os.path.join(tmp, f"prices-{shards}.csv"), max_price=100,
+                               base_url=server.url, shards=shards, concurrency_per_shard=args.concurrency,
+                               adaptive_concurrency=False)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{shards} shard(s): {elapsed:6.2f}s  {args.books / elapsed:7.1f} books/s  "
+                  f"speedup {baseline / elapsed:.1f}x  searches {server.request_count - requests_before}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Sync and async SkupSzop entry points against the same slow stand-in site: throughput and identical output.
+
+    python -m benchmarks.bench_sync_async_parity --books 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import tempfile
+import time
+
+from app.skupszop_search import run_skupszop_search
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import generated_skupszop_server
+
+
+def write_books(path, catalog):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], *catalog.items()])
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return sorted(map(tuple, list(csv.reader(f))[1:]))
+
+
+# -> {entry point: (seconds, rows, peak requests in flight)}
+def compare(books, latency, max_price=100):
+    catalog = {f"Book {i}": f"Author {i}" for i in range(books)}
+    runs = {
+        "sync": lambda input_csv, output, url: run_skupszop_search(input_csv, output, max_price=max_price, base_url=url),
+        "async": lambda input_csv, output, url: asyncio.run(
+            run_skupszop_search_async(input_csv, output, max_price=max_price, base_url=url)),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, "books.csv")
+        write_books(input_csv, catalog)
+        for name, run in runs.items():
+            output = os.path.join(tmp, f"{name}.csv")
+            with generated_skupszop_server(catalog, latency=latency) as server:
+                start = time.perf_counter()
+                run(input_csv, output, server.url)
+                results[name] = (time.perf_counter() - start, read_rows(output), server.peak_in_flight)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per search (s)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = compare(args.books, args.latency)
+    for name, (elapsed, rows, peak) in results.items():
+        print(f"{name:6} {elapsed:7.2f}s {args.books / elapsed:8.1f} books/s {len(rows):7} rows {peak:4} in flight")
+    print(f"same output: {results['sync'][1] == results['async'][1]}")
+
+
+if __name__ == "__main__":
+    main()
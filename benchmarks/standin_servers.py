@@ -0,0 +1,258 @@
+"""
+Local HTTP servers imitating the pages the scrapers read.
+Used by the benchmarks and by tests that need a real HTTP round-trip.
+"""
+import hashlib
+import html
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StandInServer:
+    """Runs a ThreadingHTTPServer on a free local port in a background thread."""
+
+    def __init__(self, handler_class, seed: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.rng = random.Random(seed)
+        self.httpd.error_count = 0
+        self.httpd.request_count = 0
+        self.httpd.in_flight = 0
+        self.httpd.peak_in_flight = 0
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    @property
+    def peak_in_flight(self) -> int:
+        return self.httpd.peak_in_flight
+
+    @property
+    def error_count(self) -> int:
+        return self.httpd.error_count
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _BaseHandler(BaseHTTPRequestHandler):
+    # seconds, or a function of the number of requests in flight
+    latency = 0.0
+    # above this many concurrent requests the server answers 429
+    capacity = None
+    # share of requests answered with 500 (drawn from the server's seeded rng)
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_html(self, body: str, status: int = 200, headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+            in_flight = server.in_flight
+            failed = self.error_rate > 0 and server.rng.random() < self.error_rate
+            server.error_count += failed
+        try:
+            latency = self.latency(in_flight) if callable(self.latency) else self.latency
+            if latency:
+                time.sleep(latency)
+            if self.capacity is not None and in_flight > self.capacity:
+                return self.send_html("Too Many Requests", status=429)
+            if failed:
+                return self.send_html("Internal Server Error", status=500)
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            self.handle_get(parsed.path, query)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def handle_get(self, path, query):
+        self.send_html("", status=404)
+
+
+# Goodreads shelf: /review/list/<user>?shelf=...&page=N&per_page=M
+def make_shelf_books(num_books: int):
+    return [
+        {"id": 1000 + i, "title": f"Book {i}", "series": f"(Series #{i % 7})", "author": f"Author {i % 50}"}
+        for i in range(num_books)
+    ]
+
+def render_shelf_page(books, page: int, total_pages: int) -> str:
+    rows = "\n".join(
+        f'<tr id="review_{b["id"]}" class="bookalike review">'
+        f'<td class="field cover"><div class="value"><img src="/cover/{b["id"]}.jpg"></div></td>'
+        f'<td class="field title"><div class="value"><a href="/book/show/{b["id"]}">{html.escape(b["title"])} '
+        f'<span class="darkGreyText">{html.escape(b["series"])}</span></a></div></td>'
+        f'<td class="field author"><div class="value"><a href="/author/show/{b["id"]}">{html.escape(b["author"])}</a></div></td>'
+        f'<td class="field rating"><div class="value">really liked it</div></td>'
+        f'</tr>'
+        for b in books
+    )
+    links = " ".join(
+        f'<em class="current">{n}</em>' if n == page else f'<a href="?page={n}">{n}</a>'
+        for n in range(1, total_pages + 1)
+    )
+    if page < total_pages:
+        links += f' <a class="next_page" rel="next" href="?page={page + 1}">next »</a>'
+    else:
+        links += ' <span class="next_page disabled">next »</span>'
+    padding = "<div class='sidebar'>" + "<p>Lorem ipsum dolor sit amet.</p>" * 200 + "</div>"
+    return (
+        "<html><head><title>Shelf</title></head><body>"
+        f"<table id='books'><tbody>{rows}</tbody></table>"
+        f"<div id='reviewPagination'>{links}</div>{padding}</body></html>"
+    )
+
+def goodreads_shelf_server(num_books: int = 300, latency: float = 0.0,
+                           default_per_page: int = 20, max_per_page: int = 100,
+                           books=None, error_rate: float = 0.0, seed: int = 0) -> StandInServer:
+    """Shelf ordered oldest-first; sort=date_added&order=d reverses it. Sends ETags and honours If-None-Match."""
+    books = make_shelf_books(num_books) if books is None else books
+
+    class ShelfHandler(_BaseHandler):
+        def handle_get(self, path, query):
+            if not path.startswith("/review/list/"):
+                return self.send_html("", status=404)
+            per_page = min(int(query.get("per_page", default_per_page)), max_per_page)
+            page = int(query.get("page", 1))
+            ordered = books[::-1] if query.get("sort") == "date_added" and query.get("order") == "d" else books
+            total_pages = max(1, -(-len(ordered) // per_page))
+            chunk = ordered[(page - 1) * per_page: page * per_page]
+            body = render_shelf_page(chunk, page, total_pages)
+            etag = '"%s"' % hashlib.md5(body.encode("utf-8")).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_html(body, headers={"ETag": etag})
+
+    ShelfHandler.latency = latency
+    ShelfHandler.error_rate = error_rate
+    return StandInServer(ShelfHandler, seed)
+
+
+# SkupSzop search: /wyszukaj?keyword=...&price_to=... served from the fixture pages
+# (hand-written stand-ins modelled on the site's markup, not captures of the live site)
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def skupszop_search_server(pages=None, default_page: str = "skupszop_no_results.html",
+                           latency=0.0, capacity=None, error_rate: float = 0.0, seed: int = 0) -> StandInServer:
+    """pages maps a keyword to a fixture file name; latency may depend on the requests in flight."""
+    pages = {keyword.casefold(): name for keyword, name in (pages or {}).items()}
+
+    class SearchHandler(_BaseHandler):
+        def handle_get(self, path, query):
+            if path != "/wyszukaj":
+                return self.send_html("", status=404)
+            name = pages.get(query.get("keyword", "").casefold(), default_page)
+            self.send_html(load_fixture(name))
+
+    SearchHandler.latency = staticmethod(latency) if callable(latency) else latency
+    SearchHandler.capacity = capacity
+    SearchHandler.error_rate = error_rate
+    return StandInServer(SearchHandler, seed)
+
+
+# SkupSzop search pages generated from a catalog {title: author}: the matching
+# card (if the title is in the catalog) among look-alike and unrelated cards
+CONDITIONS = ("jak nowa", "bardzo dobry", "dobry", "akceptowalny")
+NO_RESULTS_PAGE = (
+    "<!DOCTYPE html><html lang='pl'><head><meta charset='utf-8'><title>Wyniki wyszukiwania - SkupSzop.pl</title></head>"
+    "<body><main class='search-results'><h1>Wyniki wyszukiwania</h1>"
+    "<p class='search-results__empty'>Brak wyników dla podanej frazy.</p></main></body></html>"
+)
+
+def render_product_card(product_id: int, title: str, author: str, offers) -> str:
+    items = "".join(
+        f'<li class="product-dropdown-condition-item" data-condition="{html.escape(condition)}">'
+        f'<span class="dropdown-list-condition">{html.escape(condition)}</span>'
+        f'<span class="dropdown-list-price"><span>{price}</span> zł</span></li>'
+        for price, condition in offers
+    )
+    link = f"https://skupszop.pl/ksiazka-{product_id}?id={product_id}"
+    return (
+        f'<div class="product-card" data-product-id="{product_id}">'
+        f'<div class="product-card__image"><a href="{link}"><img src="/media/{product_id}.jpg" alt="" loading="lazy"></a></div>'
+        f'<div class="product-card__content">'
+        f'<div class="product-card__title"><a href="{link}">{html.escape(title)}</a></div>'
+        f'<div class="product-card__author"><a class="author" href="/autor/{html.escape(author)}">{html.escape(author)}</a></div>'
+        f'<div class="product-dropdown-condition"><button class="product-dropdown-condition-toggle" type="button">Wybierz stan</button>'
+        f'<ul class="product-dropdown-condition-list">{items}</ul></div>'
+        f'<button class="product-card__add-to-cart" type="button">Do koszyka</button></div></div>'
+    )
+
+def render_search_page(keyword: str, author, cards_per_page: int = 24, offers_per_card: int = 3) -> str:
+    rng = random.Random(keyword)
+
+    def offers():
+        return [(f"{rng.uniform(3, 60):.2f}".replace(".", ","), condition)
+                for condition in rng.sample(CONDITIONS, min(offers_per_card, len(CONDITIONS)))]
+
+    cards = []
+    if author is not None:
+        cards.append(render_product_card(rng.randrange(10 ** 7), keyword, author, offers()))
+        cards.append(render_product_card(rng.randrange(10 ** 7), f"{keyword} i inne opowiadania", author, offers()))
+    while len(cards) < cards_per_page:
+        n = rng.randrange(10 ** 5)
+        cards.append(render_product_card(rng.randrange(10 ** 7), f"Inna książka {n}", f"Autor {n % 97}", offers()))
+    return (
+        "<!DOCTYPE html><html lang='pl'><head><meta charset='utf-8'><title>Wyniki wyszukiwania - SkupSzop.pl</title></head>"
+        f"<body><main class='search-results'><h1>Wyniki wyszukiwania</h1><div class='product-list'>{''.join(cards)}</div></main>"
+        "<div id='cookie-banner' class='cookie-banner'><button type='button'>Zezwól na wszystkie</button></div></body></html>"
+    )
+
+def generated_skupszop_server(catalog=None, cards_per_page: int = 24, offers_per_card: int = 3,
+                              latency=0.0, capacity=None, error_rate: float = 0.0, seed: int = 0) -> StandInServer:
+    """Keywords outside the catalog get the "Brak wyników" page."""
+    catalog = {title.casefold(): author for title, author in (catalog or {}).items()}
+
+    class GeneratedSearchHandler(_BaseHandler):
+        def handle_get(self, path, query):
+            if path != "/wyszukaj":
+                return self.send_html("", status=404)
+            keyword = query.get("keyword", "")
+            author = catalog.get(keyword.casefold())
+            if author is None:
+                return self.send_html(NO_RESULTS_PAGE)
+            self.send_html(render_search_page(keyword, author, cards_per_page, offers_per_card))
+
+    GeneratedSearchHandler.latency = staticmethod(latency) if callable(latency) else latency
+    GeneratedSearchHandler.capacity = capacity
+    GeneratedSearchHandler.error_rate = error_rate
+    return StandInServer(GeneratedSearchHandler, seed)
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+import requests
+from app.skupszop_backends import parse_search_page
+from benchmarks.bench_cli_startup import ROOT
+from benchmarks.bench_e2e import _process_usage, compare_reports, run_suite
+from benchmarks.standin_servers import generated_skupszop_server, goodreads_shelf_server, render_search_page
+
+
+def test_generated_search_page_has_matching_card_and_dropdowns():
+    cards = parse_search_page(render_search_page("Book 3", "Author 3", cards_per_page=10, offers_per_card=2))
+    assert len(cards) == 10
+    assert cards[0]["title"] == "Book 3" and cards[0]["authors"] == ["Author 3"]
+    assert all(len(card["offers"]) == 2 for card in cards)
+    # same keyword -> same page
+    assert render_search_page("Book 3", "Author 3") == render_search_page("Book 3", "Author 3")
+
+def test_generated_server_no_results_and_error_injection():
+    with generated_skupszop_server({"Book 1": "Author 1"}, error_rate=0.5, seed=1) as server:
+        statuses = [requests.get(f"{server.url}/wyszukaj?keyword=Book 1").status_code for _ in range(20)]
+        assert 0 < statuses.count(500) == server.error_count < 20
+    with generated_skupszop_server({"Book 1": "Author 1"}) as server:
+        assert parse_search_page(requests.get(f"{server.url}/wyszukaj?keyword=Book 2").text) == []
+
+def test_shelf_server_error_injection():
+    with goodreads_shelf_server(num_books=5, error_rate=1.0) as server:
+        assert requests.get(f"{server.url}/review/list/1-test").status_code == 500
+
+def test_run_suite_reports_metrics():
+    report = run_suite(books=12, latency=0.0, scenarios=("goodreads_concurrent", "skupszop_async"))
+    assert set(report["scenarios"]) == {"goodreads_concurrent", "skupszop_async"}
+    search = report["scenarios"]["skupszop_async"]
+    assert search["books"] == 12 and search["latency_unit"] == "book"
+    assert search["books_per_s"] > 0 and search["peak_rss_mb"] > 0
+    assert search["latency_p50"] <= search["latency_p95"] <= search["latency_p99"]
+
+def test_compare_reports_flags_regressions():
+    baseline = {"scenarios": {"s": {"books_per_s": 100.0, "latency_p95": 1.0, "cpu_s": 2.0, "peak_rss_mb": 50.0}}}
+    current = {"scenarios": {"s": {"books_per_s": 80.0, "latency_p95": 1.05, "cpu_s": 1.0, "peak_rss_mb": 50.0},
+                             "new": {"books_per_s": 1.0}}}
+    rows = {row["metric"]: row for row in compare_reports(baseline, current, tolerance=0.1)}
+    assert rows["books_per_s"]["regressed"]
+    assert not rows["latency_p95"]["regressed"] and not rows["cpu_s"]["regressed"]
+    assert {row["scenario"] for row in rows.values()} == {"s"}
+
+def test_suite_imports_and_measures_without_resource_module(monkeypatch):
+    # no resource module (Windows): the suite still imports, CPU time is measured and peak RSS skipped
+    code = "import sys; sys.modules['resource'] = None; import benchmarks.bench_e2e"
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+    monkeypatch.setitem(sys.modules, "resource", None)
+    cpu, peak_rss_mb = _process_usage()
+    assert cpu > 0 and peak_rss_mb is None
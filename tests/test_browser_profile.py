@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from app import browser_profile as bp
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = FakeRequest(resource_type, url)
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+    async def abort(self):
+        self.outcome = "abort"
+
+
+# should_block
+def test_blocks_assets_and_trackers_but_not_documents():
+    profile = bp.BrowserProfile()
+    assert profile.should_block("image", "https://skupszop.pl/media/1.jpg")
+    assert profile.should_block("stylesheet", "https://skupszop.pl/build/app.css")
+    assert profile.should_block("script", "https://www.googletagmanager.com/gtag/js?id=G-1")
+    assert not profile.should_block("document", "https://skupszop.pl/wyszukaj?keyword=Rdza")
+    assert not profile.should_block("script", "https://skupszop.pl/build/app.js")
+
+def test_allow_list_wins_over_deny_lists():
+    profile = bp.BrowserProfile(allowed_url_patterns=("*skupszop.pl/build/*",))
+    assert not profile.should_block("stylesheet", "https://skupszop.pl/build/app.css")
+
+
+# route handling and stats
+def test_route_handler_counts_blocked_requests():
+    profile = bp.BrowserProfile()
+    routes = [FakeRoute("document", "https://skupszop.pl/wyszukaj"),
+              FakeRoute("image", "https://skupszop.pl/1.jpg"),
+              FakeRoute("font", "https://skupszop.pl/a.woff2")]
+
+    async def run():
+        for route in routes:
+            await profile._route_async(route)
+
+    asyncio.run(run())
+    assert [route.outcome for route in routes] == ["continue", "abort", "abort"]
+    stats = profile.stats()
+    assert (stats["requests_allowed"], stats["requests_blocked"]) == (1, 2)
+    assert stats["estimated_bytes_saved"] == bp.TYPICAL_RESOURCE_BYTES["image"] + bp.TYPICAL_RESOURCE_BYTES["font"]
+
+
+# resolve_profile / consent
+def test_resolve_profile():
+    assert isinstance(bp.resolve_profile("lean"), bp.BrowserProfile)
+    assert bp.resolve_profile(None) is None
+    with pytest.raises(ValueError):
+        bp.resolve_profile("heavy")
+
+def test_consent_state_skips_cookie_click():
+    assert bp.BrowserProfile().skips_consent
+    assert bp.BrowserProfile().context_options()["storage_state"]["cookies"][0]["name"] == "CookieConsent"
+    assert not bp.BrowserProfile(storage_state=None).skips_consent
@@ -0,0 +1,105 @@
+import csv
+import json
+import subprocess
+import sys
+from app import cli
+from benchmarks.bench_cli_startup import HEAVY_MODULES, ROOT
+from benchmarks.standin_servers import generated_skupszop_server, goodreads_shelf_server
+
+
+def events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+def write_books(path, catalog):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], *catalog.items()])
+
+
+def test_startup_imports_no_heavy_modules():
+    code = (
+        "import sys, app, app.cli, app.paths, app.skupszop_search, app.skupszop_search_async\n"
+        "assert 'run_skupszop_search' in dir(app)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+def test_paths_import_creates_no_directories():
+    code = "import os; os.makedirs = None; import app.paths"
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+def test_lazy_package_exports():
+    import app
+    from app.matching import is_title_similar
+    assert app.is_title_similar is is_title_similar
+    assert callable(app.run_skupszop_search)
+
+def test_help_and_usage_exit_codes(capsys):
+    assert cli.main(["--help"]) == cli.EXIT_OK
+    assert cli.main(["search", "--max-price", "cheap"]) == cli.EXIT_USAGE
+
+def test_search_streams_offers_as_json_lines(tmp_path, capsys):
+    catalog = {"Rdza": "Jakub Małecki", "Book 2": "Author 2"}
+    books, output = tmp_path / "books.csv", tmp_path / "out" / "prices.csv"
+    write_books(books, catalog)
+    with generated_skupszop_server(catalog) as server:
+        code = cli.main(["-q", "search", "--books", str(books), "--output", str(output),
+                         "--max-price", "100", "--base-url", server.url])
+    assert code == cli.EXIT_OK
+    *offers, done = events(capsys)
+    assert offers and all(event["event"] == "offer" for event in offers)
+    assert {event["title"] for event in offers} == set(catalog)
+    assert done == {"event": "done", "command": "search", "searched": 2, "offers": len(offers),
+                    "failed": [], "output": str(output)}
+    assert len(output.read_text(encoding="utf-8").splitlines()) == len(offers) + 1
+
+def test_search_reports_books_that_kept_failing(tmp_path, capsys):
+    books = tmp_path / "books.csv"
+    write_books(books, {"Rdza": "Jakub Małecki"})
+    with generated_skupszop_server({"Rdza": "Jakub Małecki"}, error_rate=1.0) as server:
+        code = cli.main(["-q", "search", "--books", str(books), "--output", str(tmp_path / "prices.csv"),
+                         "--base-url", server.url])
+    assert code == cli.EXIT_FAILED_SEARCHES
+    done = events(capsys)[-1]
+    assert done["failed"] == ["Rdza"] and done["searched"] == 1
+
+def test_run_and_scrape_commands(tmp_path, capsys):
+    with goodreads_shelf_server(num_books=3) as shelf, generated_skupszop_server() as shop:
+        url = f"{shelf.url}/review/list/1-test?shelf=to-read"
+        assert cli.main(["-q", "scrape", url, "--books", str(tmp_path / "books.csv")]) == cli.EXIT_OK
+        scraped = events(capsys)
+        assert [event["event"] for event in scraped] == ["book"] * 3 + ["done"]
+
+        assert cli.main(["-q", "run", url, "--output", str(tmp_path / "prices.jsonl"), "--base-url", shop.url,
+                         "--progress"]) == cli.EXIT_OK
+        assert [event["event"] for event in events(capsys)] == ["progress"] * 3 + ["done"]
+
+def test_empty_or_unreadable_shelf_exits_with_no_books(tmp_path, capsys):
+    output = tmp_path / "prices.csv"
+    with goodreads_shelf_server(num_books=0) as shelf, generated_skupszop_server() as shop:
+        url = f"{shelf.url}/review/list/1-test"
+        assert cli.main(["-q", "scrape", url]) == cli.EXIT_NO_BOOKS
+        assert cli.main(["-q", "run", url, "--output", str(output), "--base-url", shop.url]) == cli.EXIT_NO_BOOKS
+    # unreachable shelf: the scraper's error goes to the log, stdout stays JSON lines
+    assert cli.main(["-q", "scrape", "http://127.0.0.1:9/review/list/1-test"]) == cli.EXIT_NO_BOOKS
+    assert [(event["event"], event["command"]) for event in events(capsys)] == [
+        ("error", "scrape"), ("error", "run"), ("error", "scrape")]
+    assert not output.exists()
+
+    books = tmp_path / "books.csv"
+    write_books(books, {})
+    assert cli.main(["-q", "search", "--books", str(books), "--output", str(output)]) == cli.EXIT_NO_BOOKS
+    assert events(capsys)[-1]["message"] == f"no books in {books}" and not output.exists()
+
+def test_stray_prints_go_to_stderr(monkeypatch, capsys):
+    def noisy_scrape(args):
+        print("Fetching page 1")
+        cli.emit(args.out, "done", command="scrape")
+        return cli.EXIT_OK
+
+    monkeypatch.setitem(cli.COMMANDS, "scrape", noisy_scrape)
+    assert cli.main(["-q", "scrape", "http://example.invalid/shelf"]) == cli.EXIT_OK
+    captured = capsys.readouterr()
+    assert captured.out == '{"event": "done", "command": "scrape"}\n'
+    assert "Fetching page 1" in captured.err
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from app import concurrency as c
+
+
+def test_classify_status():
+    assert c.classify_status(200) == c.OK
+    assert c.classify_status(429) == c.THROTTLED
+    assert c.classify_status(503) == c.SERVER_ERROR
+    assert c.classify_status(404) == c.ERROR
+
+
+# AdaptiveLimiter decisions
+def test_limit_grows_while_healthy_and_saturated():
+    changes = []
+    limiter = c.AdaptiveLimiter(initial=2, max_limit=4, window=5, on_change=lambda *args: changes.append(args))
+    limiter.in_flight = limiter._peak_in_flight = 2
+    for _ in range(5):
+        limiter.record(0.1, c.OK)
+    assert limiter.limit == 3
+    assert changes[0][:2] == (3, "healthy")
+
+def test_limit_does_not_grow_when_unused():
+    limiter = c.AdaptiveLimiter(initial=4, max_limit=8, window=5)
+    for _ in range(10):
+        limiter.record(0.1, c.OK)
+    assert limiter.limit == 4
+
+def test_backoff_on_throttling_respects_cooldown():
+    limiter = c.AdaptiveLimiter(initial=8, max_limit=8, cooldown=60)
+    limiter.record(0.1, c.THROTTLED)
+    limiter.record(0.1, c.TIMEOUT)
+    assert limiter.limit == 4
+    assert [decision[3] for decision in limiter.decisions] == ["throttled"]
+
+def test_pages_without_cards_are_not_errors():
+    limiter = c.AdaptiveLimiter(initial=2, max_limit=4, window=5)
+    limiter.in_flight = limiter._peak_in_flight = 2
+    for _ in range(5):
+        limiter.record(0.1, c.NO_CARDS)
+    assert limiter.limit == 3 and limiter.decisions[-1][3] == "healthy"
+
+def test_backoff_on_slow_p90():
+    limiter = c.AdaptiveLimiter(initial=8, max_limit=8, window=10, latency_target=1.0)
+    for latency in [0.1] * 8 + [3.0] * 2:
+        limiter.record(latency, c.OK)
+    assert limiter.limit == 4
+    assert limiter.decisions[-1][3] == "latency"
+
+def test_slot_caps_in_flight():
+    async def run():
+        limiter = c.FixedLimiter(3)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(task() for _ in range(12)))
+        return peak
+
+    assert asyncio.run(run()) == 3
+
+
+# against a stand-in server that slows down and throttles under load
+def test_adaptive_search_backs_off_on_overloaded_server(tmp_path):
+    from app.skupszop_search_async import run_skupszop_search_async
+    from benchmarks.standin_servers import skupszop_search_server
+
+    input_csv = tmp_path / "books.csv"
+    input_csv.write_text("Title,Author\n" + "".join(f"Book {i},Author {i}\n" for i in range(80)), encoding="utf-8-sig")
+    limits = []
+    with skupszop_search_server(latency=lambda in_flight: 0.01 * in_flight, capacity=3) as server:
+        asyncio.run(run_skupszop_search_async(
+            input_csv, tmp_path / "out.csv", base_url=server.url, max_concurrent_pages=12,
+            concurrency_callback=lambda limit, reason, stats: limits.append((limit, reason)),
+        ))
+    reasons = {reason for _, reason in limits}
+    assert "throttled" in reasons
+    assert min(limit for limit, _ in limits) <= 3
@@ -49,3 +49,91 @@ def test_save_to_csv_creates_file(tmp_path):
     content = out_file.read_text(encoding="utf-8-sig")
     assert "Book A" in content
     assert "Author B" in content
+
+
+# build_page_url
+def test_build_page_url_keeps_shelf_and_sets_page():
+    url = gs.build_page_url("https://www.goodreads.com/review/list/1-ola?shelf=to-buy", 3, per_page=100)
+    assert url == "https://www.goodreads.com/review/list/1-ola?shelf=to-buy&page=3&per_page=100"
+
+
+# parse_shelf_page
+def test_parse_shelf_page_reads_books_and_page_count():
+    from benchmarks.standin_servers import make_shelf_books, render_shelf_page
+    html = render_shelf_page(make_shelf_books(3), page=1, total_pages=4)
+    books, has_next, total_pages = gs.parse_shelf_page(html.encode())
+    assert books == [{"title": f"Book {i}", "author": f"Author {i}", "review_id": str(1000 + i)} for i in range(3)]
+    assert has_next
+    assert total_pages == 4
+
+def test_lxml_parser_matches_soup_parser_on_fixture():
+    from benchmarks.standin_servers import load_fixture
+    html = load_fixture("goodreads_shelf_page.html").encode()
+    books, has_next, total_pages = gs.parse_shelf_page_lxml(html)
+    assert (books, has_next, total_pages) == gs.parse_shelf_page_soup(html)
+    assert len(books) == 30 and has_next and total_pages == 6
+    assert books[0] == {"title": "Rdza", "author": "Małecki, Jakub", "review_id": "5000000000"}
+
+def test_lxml_parser_falls_back_to_selector_chain_for_other_layouts():
+    html = (
+        b'<table><tr id="review_9"><td class="bookTitleCell"><a href="/book/show/9">Alt '
+        b'<span class="darkGreyText">(Series #2)</span></a></td>'
+        b'<td><a href="/author/show/1">Anna Nowak</a></td></tr></table>'
+    )
+    expected = [{"title": "Alt", "author": "Anna Nowak", "review_id": "9"}]
+    assert gs.parse_shelf_page_lxml(html) == gs.parse_shelf_page_soup(html) == (expected, False, 1)
+
+def test_lxml_parser_last_page_and_empty_page():
+    from benchmarks.standin_servers import make_shelf_books, render_shelf_page
+    html = render_shelf_page(make_shelf_books(2), page=3, total_pages=3).encode()
+    assert gs.parse_shelf_page_lxml(html)[1:] == (False, 3)
+    assert gs.parse_shelf_page_lxml(b"<html><body><p>No books</p></body></html>") == ([], False, 1)
+
+
+# concurrent mode
+def test_concurrent_scrape_matches_sequential_order():
+    from benchmarks.standin_servers import goodreads_shelf_server
+    with goodreads_shelf_server(num_books=230) as server:
+        url = f"{server.url}/review/list/1-test?shelf=to-read"
+        sequential = gs.scrape_goodreads_shelf(url, delay=0, debug=False)
+        concurrent = gs.scrape_goodreads_shelf(url, debug=False, concurrent=True, max_concurrency=4)
+    assert len(concurrent) == 230
+    assert concurrent == sequential
+
+
+# incremental sync
+def test_sync_stops_at_known_reviews_and_merges(tmp_path):
+    from benchmarks.standin_servers import goodreads_shelf_server, make_shelf_books
+    snapshot = tmp_path / "snapshots.json"
+    books = make_shelf_books(250)
+    with goodreads_shelf_server(books=books) as server:
+        url = f"{server.url}/review/list/1-test?shelf=to-read"
+        first = gs.sync_goodreads_shelf(url, snapshot_path=snapshot, delay=0, debug=False)
+        assert len(first) == 250
+        assert first[0]["title"] == "Book 249"
+
+        books.extend([{"id": 9001, "title": "New A", "series": "", "author": "X"},
+                      {"id": 9002, "title": "New B", "series": "", "author": "Y"}])
+        requests_before = server.request_count
+        second = gs.sync_goodreads_shelf(url, snapshot_path=snapshot, delay=0, debug=False)
+        assert server.request_count - requests_before == 1
+    assert [b["title"] for b in second[:3]] == ["New B", "New A", "Book 249"]
+    assert second[2:] == first
+
+def test_sync_uses_conditional_request_when_unchanged(tmp_path):
+    from benchmarks.standin_servers import goodreads_shelf_server
+    snapshot = tmp_path / "snapshots.json"
+    with goodreads_shelf_server(num_books=30) as server:
+        url = f"{server.url}/review/list/1-test?shelf=to-read"
+        first = gs.sync_goodreads_shelf(url, snapshot_path=snapshot, delay=0, debug=False)
+        assert gs.sync_goodreads_shelf(url, snapshot_path=snapshot, delay=0, debug=False) == first
+
+def test_run_goodreads_scraper_incremental_writes_csv(tmp_path):
+    from benchmarks.standin_servers import goodreads_shelf_server
+    with goodreads_shelf_server(num_books=5) as server:
+        url = f"{server.url}/review/list/1-test?shelf=to-read"
+        count = gs.run_goodreads_scraper(url, tmp_path / "books.csv", incremental=True,
+                                         snapshot_path=tmp_path / "snapshots.json")
+    assert count == 5
+    lines = (tmp_path / "books.csv").read_text(encoding="utf-8-sig").splitlines()
+    assert lines[1].startswith("Book 0,")
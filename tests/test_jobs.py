@@ -0,0 +1,81 @@
+import csv
+import time
+import pytest
+from app.jobs import CANCELLED, DONE, FAILED, JobRunner
+from benchmarks.standin_servers import goodreads_shelf_server, make_shelf_books, skupszop_search_server
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(pool_size=4)
+    yield runner
+    runner.close()
+
+
+def shelf_url(server):
+    return f"{server.url}/review/list/1-test?shelf=to-read"
+
+
+def test_job_streams_events_and_finishes(runner, tmp_path):
+    books = make_shelf_books(20)
+    books.insert(10, {"id": 5000, "title": "Rdza", "series": "", "author": "Małecki, Jakub"})
+    output_csv = tmp_path / "prices.csv"
+
+    with goodreads_shelf_server(books=books) as shelf, skupszop_search_server({"Rdza": "skupszop_results.html"}) as shop:
+        job = runner.submit_pipeline(shelf_url(shelf), output_csv, max_price=100, base_url=shop.url)
+        assert job.wait(timeout=30)
+
+    events = job.drain()
+    kinds = [event[0] for event in events]
+    assert job.status == DONE and job.books == 21
+    assert kinds.count("progress") == 21 and kinds[-1] == "finished"
+    rows = [event[1] for event in events if event[0] == "result"]
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        assert rows and len(list(csv.reader(f))) == len(rows) + 1
+    assert job.metrics.snapshot()["counters"]["requests"] == 21
+
+def test_cancel_stops_a_slow_job_promptly(runner, tmp_path):
+    with goodreads_shelf_server(num_books=40) as shelf, skupszop_search_server(latency=0.5) as shop:
+        job = runner.submit_pipeline(shelf_url(shelf), tmp_path / "prices.csv", base_url=shop.url)
+        while not any(event[0] == "progress" for event in job.drain()):
+            time.sleep(0.01)
+        start = time.monotonic()
+        job.cancel()
+        assert job.wait(timeout=1)
+        assert time.monotonic() - start < 1
+        assert job.status == CANCELLED
+        assert shop.request_count < 40
+
+        # the runner stays usable for the next job
+        second = runner.submit_pipeline(shelf_url(shelf), tmp_path / "other.csv", base_url=shop.url, max_pages=1)
+        assert second.wait(timeout=30)
+        assert second.status == DONE and not runner.closed
+
+def test_failed_job_reports_error(runner, tmp_path):
+    job = runner.submit_pipeline("http://127.0.0.1:1/review/list/1", tmp_path / "prices.csv",
+                                 backend="nope")
+    assert job.wait(timeout=10)
+    assert job.status == FAILED and isinstance(job.error, ValueError)
+    assert job.drain()[-1] == ("finished", FAILED)
+
+def test_jobs_share_one_http_pool(tmp_path, monkeypatch):
+    from app import skupszop_search_async as ssa
+
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as shop:
+        runner = JobRunner(pool_size=4, base_url=shop.url)
+        try:
+            def no_new_pool(*args, **kwargs):
+                raise AssertionError("a job opened its own HTTP pool")
+            monkeypatch.setattr(ssa, "HttpSearchBackend", no_new_pool)
+
+            books = [{"Title": "Rdza", "Author": "Jakub Małecki"}]
+            jobs = [runner.submit_search(books, tmp_path / f"prices-{n}.csv", max_price=100, base_url=shop.url)
+                    for n in range(2)]
+            assert all(job.wait(timeout=30) for job in jobs)
+            assert [job.status for job in jobs] == [DONE, DONE]
+            # http_fetch spans still land in each job's own metrics
+            assert all("http_fetch" in job.metrics.snapshot()["stages"] for job in jobs)
+            session = runner.http_backend.session
+        finally:
+            runner.close()
+        assert shop.request_count == 2 and session is runner.http_backend.session
@@ -0,0 +1,52 @@
+import random
+import pytest
+from difflib import SequenceMatcher
+from app import matching as m
+from benchmarks.standin_servers import load_fixture
+from app.skupszop_backends import parse_search_page
+
+
+def legacy_is_title_similar(a, b, threshold=m.TITLE_SIMILARITY_THRESHOLD):
+    return SequenceMatcher(None, a.casefold(), b.casefold()).ratio() >= threshold
+
+def legacy_is_author_match(csv_author, skupszop_authors, threshold=m.AUTHOR_MATCH_THRESHOLD):
+    csv_parts = m.normalize_name(csv_author)
+    for skupszop_author in skupszop_authors:
+        parts = m.normalize_name(skupszop_author)
+        if set(csv_parts) == set(parts):
+            return True
+        if SequenceMatcher(None, " ".join(csv_parts), " ".join(parts)).ratio() >= threshold:
+            return True
+    return False
+
+
+# same decisions as the difflib version
+def test_matcher_agrees_with_difflib_on_random_strings():
+    rng = random.Random(3)
+    alphabet = "abcde .,"
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(150)]
+    for a in words[:60]:
+        for b in words[60:]:
+            assert m.is_title_similar(a, b) == legacy_is_title_similar(a, b)
+            assert m.is_author_match(a, [b, b[::-1]]) == legacy_is_author_match(a, [b, b[::-1]])
+
+def test_matcher_agrees_with_difflib_on_result_page():
+    cards = parse_search_page(load_fixture("skupszop_results.html"))
+    for title, author in [("Rdza", "Małecki, Jakub"), ("Hobbit", "Tolkien, J.R.R."), ("Lalka", "Prus, Bolesław")]:
+        matcher = m.BookMatcher(title, author)
+        for card, match in zip(cards, matcher.score_cards(cards)):
+            expected = legacy_is_title_similar(card["title"], title) and legacy_is_author_match(author, card["authors"])
+            assert match.matched == expected
+
+
+# score_cards
+def test_score_cards_returns_scores():
+    matcher = m.BookMatcher("The Hobbit", "J. R. R. Tolkien")
+    exact, other, rejected = matcher.score_cards([
+        {"title": "the hobbit", "authors": ["Tolkien J R R"]},
+        {"title": "The Hobbits", "authors": ["Jane Doe"]},
+        {"title": "A completely different and much longer title", "authors": []},
+    ])
+    assert exact == m.CardMatch(1.0, 1.0, True)
+    assert other.title_score > 0.9 and not other.matched
+    assert rejected == m.CardMatch(None, None, False)
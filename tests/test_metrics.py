@@ -0,0 +1,68 @@
+import asyncio
+import csv
+import json
+from app.goodreads_scraper import scrape_goodreads_shelf
+from app.metrics import NULL_METRICS, Histogram, Metrics
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import goodreads_shelf_server, skupszop_search_server
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    data = histogram.to_dict()
+    assert data["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 1}
+    assert data["count"] == 4 and abs(data["sum"] - 4.25) < 1e-9
+    assert histogram.quantile(0.5) == 1.0 and histogram.quantile(1.0) == float("inf")
+
+def test_spans_counters_and_exports():
+    metrics = Metrics()
+    with metrics.span("match"):
+        pass
+    metrics.observe("match", 0.2)
+    metrics.count("matches", 3)
+    metrics.count("matches")
+
+    snapshot = json.loads(metrics.to_json())
+    assert snapshot["stages"]["match"]["count"] == 2
+    assert snapshot["counters"] == {"matches": 4}
+
+    text = metrics.to_prometheus(prefix="test")
+    assert 'test_stage_seconds_bucket{stage="match",le="+Inf"} 2' in text
+    assert 'test_stage_seconds_count{stage="match"} 2' in text
+    assert "test_matches_total 4" in text
+
+def test_on_update_is_throttled():
+    snapshots = []
+    metrics = Metrics(on_update=snapshots.append, update_interval=60)
+    for _ in range(100):
+        metrics.count("requests")
+    assert snapshots == []
+    metrics.publish()
+    assert snapshots[-1]["counters"] == {"requests": 100}
+
+def test_null_metrics_records_nothing():
+    assert NULL_METRICS.span("a") is NULL_METRICS.span("b")
+    with NULL_METRICS.span("a"):
+        NULL_METRICS.count("requests")
+    assert not NULL_METRICS.enabled
+
+def test_search_and_scraper_are_instrumented(tmp_path):
+    input_csv = tmp_path / "books.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], ["Rdza", "Małecki, Jakub"], ["Lalka", "Prus, Bolesław"]])
+    metrics = Metrics()
+
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as server:
+        asyncio.run(run_skupszop_search_async(input_csv, tmp_path / "prices.csv", max_price=100,
+                                              base_url=server.url, metrics=metrics))
+    with goodreads_shelf_server(num_books=45) as shelf:
+        books = scrape_goodreads_shelf(f"{shelf.url}/review/list/1-test?shelf=to-read", delay=0,
+                                       debug=False, metrics=metrics)
+
+    snapshot = metrics.snapshot()
+    assert {"book", "http_fetch", "http_parse", "match", "write", "goodreads_fetch", "goodreads_parse"} <= set(snapshot["stages"])
+    counters = snapshot["counters"]
+    assert counters["requests"] == 2 and counters["no_results"] == 1 and counters["matches"] > 0
+    assert counters["goodreads_pages"] == 3 and counters["goodreads_books"] == len(books) == 45
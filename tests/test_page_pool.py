@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from app.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        pass
+
+
+def make_pool(**kwargs):
+    contexts = []
+
+    async def factory():
+        contexts.append(FakeContext())
+        return contexts[-1]
+
+    return PagePool(factory, **kwargs), contexts
+
+
+def test_pages_are_reused_and_recycled_after_max_uses():
+    async def run():
+        pool, _ = make_pool(size=1, max_uses=3)
+        seen = []
+        for _ in range(5):
+            pooled = await pool.acquire()
+            seen.append(pooled.page)
+            await pool.release(pooled)
+        return pool, seen
+
+    pool, seen = asyncio.run(run())
+    assert seen[0] is seen[1] is seen[2]
+    assert seen[3] is not seen[2] and seen[2].closed
+    assert pool.stats()["reuses"] == 3
+    assert pool.stats()["recycled"] == {"max_uses": 1}
+
+def test_failed_and_crashed_pages_are_replaced():
+    async def run():
+        pool, _ = make_pool(size=1)
+        first = await pool.acquire()
+        await pool.release(first, failed=True)
+        second = await pool.acquire()
+        await pool.release(second)
+        second.page.handlers["crash"]()
+        third = await pool.acquire()
+        await pool.release(third)
+        return pool, first, second, third
+
+    pool, first, second, third = asyncio.run(run())
+    assert first.page.closed and second.page is not first.page and third.page is not second.page
+    assert pool.stats()["recycled"] == {"error": 1, "unhealthy": 1}
+
+def test_pool_caps_pages_and_spreads_over_contexts():
+    async def run():
+        pool, contexts = make_pool(size=4, contexts=2)
+        active = 0
+        peak = 0
+
+        async def worker():
+            nonlocal active, peak
+            pooled = await pool.acquire()
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            await pool.release(pooled)
+
+        await asyncio.gather(*(worker() for _ in range(20)))
+        await pool.close()
+        return pool, contexts, peak
+
+    pool, contexts, peak = asyncio.run(run())
+    assert peak == 4
+    assert pool.stats()["pages_created"] == 4
+    assert [len(context.pages) for context in contexts] == [2, 2]
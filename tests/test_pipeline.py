@@ -0,0 +1,38 @@
+import asyncio
+import csv
+import pytest
+from app import pipeline
+from benchmarks.standin_servers import goodreads_shelf_server, make_shelf_books, skupszop_search_server
+
+
+def test_pipeline_streams_shelf_into_search(tmp_path):
+    books = make_shelf_books(150)
+    books.insert(75, {"id": 5000, "title": "Rdza", "series": "", "author": "Małecki, Jakub"})
+    output_csv, books_csv = tmp_path / "prices.csv", tmp_path / "books.csv"
+    progress, results = [], []
+
+    with goodreads_shelf_server(books=books) as shelf, skupszop_search_server({"Rdza": "skupszop_results.html"}) as shop:
+        asyncio.run(pipeline.run_pipeline_async(
+            f"{shelf.url}/review/list/1-test?shelf=to-read",
+            output_csv=output_csv, books_csv=books_csv, max_price=100,
+            progress_callback=lambda current, total, title, author: progress.append((current, total)),
+            result_callback=results.append, max_concurrent_pages=4, queue_size=10,
+            base_url=shop.url,
+        ))
+        assert shop.request_count == 151
+
+    assert len(progress) == 151
+    assert all(current <= total for current, total in progress)
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert rows and len(rows) == len(results)
+    assert {row[0] for row in rows} == {"Rdza"}
+    assert len(books_csv.read_text(encoding="utf-8-sig").splitlines()) == 152
+
+def test_pipeline_without_books_csv_side_output(tmp_path):
+    with goodreads_shelf_server(num_books=3) as shelf, skupszop_search_server() as shop:
+        asyncio.run(pipeline.run_pipeline_async(
+            f"{shelf.url}/review/list/1-test?shelf=to-read",
+            output_csv=tmp_path / "prices.csv", base_url=shop.url,
+        ))
+    assert [path.name for path in tmp_path.iterdir()] == ["prices.csv"]
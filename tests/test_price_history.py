@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import pytest
+from app.price_history import DAY, PriceHistory, to_grosze
+from app.result_sink import ResultSink
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import skupszop_search_server
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = PriceHistory(tmp_path / "history.sqlite3")
+    yield h
+    h.close()
+
+
+def record(price, link="https://skupszop.pl/rdza?id=1", condition="dobry", title="Rdza"):
+    return {"title": title, "authors": ["Jakub Małecki"], "price": price, "condition": condition, "link": link}
+
+
+def test_prices_are_stored_in_grosze():
+    assert to_grosze("9,67") == 967 and to_grosze(12.5) == 1250 and to_grosze(0.29) == 29
+
+def test_latest_offers_and_drops_between_runs(history):
+    assert history.price_drops() == []
+    history.start_run(now=0)
+    history.add_records([record(12.0), record(15.0, condition="jak nowa"), record(20.0, link="x?id=2")], now=0)
+    history.start_run(now=DAY)
+    history.add_records([record(9.5), record(21.0, link="x?id=2")], now=DAY)
+
+    assert [offer["price"] for offer in history.latest_offers()] == [9.5, 21.0]
+    assert history.latest_offers("RDZA")[0]["condition"] == "dobry"
+    assert history.latest_offers("Unknown") == []
+    assert history.price_drops() == [{"title": "Rdza", "link": "https://skupszop.pl/rdza?id=1",
+                                      "old_price": 12.0, "price": 9.5}]
+    assert len(history.runs()) == 2
+
+def test_price_stats_over_a_window(history):
+    for day, price in enumerate([30.0, 10.0, 20.0, 40.0]):
+        history.start_run(now=day * DAY)
+        history.add_records([record(price)], now=day * DAY)
+    assert history.price_stats("Rdza", days=30, now=3 * DAY) == {"count": 4, "min": 10.0, "median": 25.0, "max": 40.0}
+    assert history.price_stats("Rdza", days=1, now=3 * DAY)["min"] == 20.0
+    assert history.price_stats("Lalka")["count"] == 0
+
+def test_sink_and_search_append_to_history(tmp_path, history):
+    input_csv = tmp_path / "books.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], ["Rdza", "Małecki, Jakub"]])
+
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as server:
+        for _ in range(2):
+            asyncio.run(run_skupszop_search_async(input_csv, tmp_path / "prices.csv", max_price=100,
+                                                  base_url=server.url, history=history))
+    with open(tmp_path / "prices.csv", newline="", encoding="utf-8") as f:
+        saved = len(list(csv.reader(f))) - 1
+    # the csv is rewritten per run, the history keeps both
+    assert saved and len(history.latest_offers()) == saved
+    assert len(history.runs()) == 2 and history.price_stats("Rdza")["count"] == 2 * saved
+
+    sink = ResultSink(tmp_path / "more.jsonl", history=history)
+    sink.put(["Lalka", ["Bolesław Prus"], "5,00", "dobry", "https://skupszop.pl/lalka?id=3"])
+    sink.close()
+    assert history.latest_offers()[0]["title"] == "Lalka"
+
+def test_offers_are_kept_under_the_wishlist_book(tmp_path, history):
+    book = ("Rdza", "Jakub Małecki")
+    sink = ResultSink(tmp_path / "prices.jsonl", history=history)
+    sink.put(["Rdza", ["Jakub Małecki"], "9,67", "jak nowa", "https://skupszop.pl/rdza?id=1"], book)
+    sink.put(["Rdza (wydanie II)", ["Jakub Małecki"], "12,00", "dobry", "https://skupszop.pl/rdza?id=2"], book)
+    sink.close()
+
+    assert [offer["price"] for offer in history.latest_offers("Rdza")] == [9.67, 12.0]
+    assert history.price_stats("Rdza")["count"] == 2
+    # the output files keep the SkupSzop card fields only
+    assert "wishlist_title" not in (tmp_path / "prices.jsonl").read_text(encoding="utf-8")
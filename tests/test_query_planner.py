@@ -0,0 +1,77 @@
+import asyncio
+import csv
+import pytest
+from app.query_planner import SearchCoalescer, plan_searches, search_key
+from app.skupszop_search import run_skupszop_search
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import skupszop_search_server
+
+
+def test_search_key_ignores_case_punctuation_and_spacing():
+    assert search_key("Rdza") == search_key("  rdza. ") == search_key("RDZA!") == "rdza"
+    assert search_key("Hobbit, czyli tam i z powrotem") == search_key("Hobbit czyli  tam i z powrotem")
+    assert search_key("Księgi Jakubowe") != search_key("Księgi")
+
+def test_plan_searches_groups_in_first_seen_order():
+    books = [{"Title": t} for t in ["Rdza", "Lalka", "rdza.", "Solaris", "LALKA"]]
+    assert [[idx for idx, _ in group] for group in plan_searches(books)] == [[0, 2], [1, 4], [3]]
+
+def test_coalescer_shares_one_search_between_requesters():
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["card"]
+
+    async def main():
+        coalescer = SearchCoalescer()
+        results = await asyncio.gather(*(coalescer.run(title, search) for title in ["Rdza", "rdza", "RDZA."]))
+        later = await coalescer.run("Rdza", search)
+        return coalescer, results, later
+
+    coalescer, results, later = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [["card"]] * 3 and later == ["card"]
+    assert coalescer.stats() == {"searches": 1, "coalesced": 3}
+
+def test_coalescer_cancelled_requester_does_not_cancel_search():
+    async def search():
+        await asyncio.sleep(0.02)
+        return ["card"]
+
+    async def main():
+        coalescer = SearchCoalescer()
+        first = asyncio.ensure_future(coalescer.run("Rdza", search))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coalescer.run("Rdza", search))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ["card"]
+
+
+# duplicates are searched once and matched against each book's own author
+BOOKS = [("Rdza", "Małecki, Jakub"), ("rdza.", "Nowak, Anna"), ("RDZA", "Jakub Małecki")]
+
+@pytest.mark.parametrize("engine", ["async", "sync"])
+def test_engines_search_duplicates_once(tmp_path, engine):
+    input_csv, output_csv = tmp_path / "books.csv", tmp_path / "prices.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], *BOOKS])
+    results = []
+
+    with skupszop_search_server(default_page="skupszop_results.html") as server:
+        if engine == "async":
+            asyncio.run(run_skupszop_search_async(input_csv, output_csv, max_price=100, base_url=server.url,
+                                                  result_callback=results.append))
+        else:
+            run_skupszop_search(input_csv, output_csv, max_price=100, base_url=server.url,
+                                result_callback=results.append)
+        assert server.request_count == 1
+
+    single_book_rows = len(results) // 2
+    assert single_book_rows > 0 and len(results) == 2 * single_book_rows
@@ -0,0 +1,103 @@
+import asyncio
+import csv
+import pytest
+from app.recheck import DAY, RecheckScheduler
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import skupszop_search_server
+
+ROW = ["Rdza", ["Jakub Małecki"], "9,67", "jak nowa", "https://skupszop.pl/rdza?id=1"]
+
+
+@pytest.fixture
+def recheck(tmp_path):
+    r = RecheckScheduler(tmp_path / "recheck.sqlite3", full_sweep_days=7)
+    yield r
+    r.close()
+
+
+def books(*titles):
+    return [{"Title": title, "Author": "A"} for title in titles]
+
+
+def test_misses_back_off_exponentially(recheck):
+    assert [recheck.interval(n) / DAY for n in range(1, 8)] == [1, 2, 4, 8, 16, 30, 30]
+    for run in range(3):
+        recheck.begin(now=run * 60)
+        recheck.record("Nieznana", [], now=0)
+        recheck.finish()
+    recheck.begin(now=2 * DAY)
+    assert not recheck.is_due("nieznana", now=2 * DAY)
+    assert recheck.is_due("Nieznana", now=4 * DAY)
+    assert recheck.state("Nieznana")["misses"] == 3
+
+def test_books_sharing_a_key_count_once_per_run(recheck):
+    recheck.begin(now=0)
+    recheck.record("Rdza", [], now=0)
+    recheck.record("rdza.", [], now=0)
+    recheck.record("Dygot", [ROW], now=0)
+    recheck.record("dygot", [], now=0)
+    recheck.record("DYGOT", [[*ROW[:2], "5,00", *ROW[3:]]], now=0)
+    recheck.finish()
+    assert recheck.state("Rdza")["misses"] == 1
+    # a hit of any book of the key wins, with the cheapest offer among them
+    assert recheck.state("Dygot")["misses"] == 0 and recheck.state("Dygot")["last_offer"][2] == "5,00"
+
+    recheck.begin(now=DAY)
+    recheck.record("rdza.", [], now=DAY)
+    recheck.finish()
+    assert recheck.state("Rdza")["misses"] == 2
+
+def test_resumed_run_keeps_books_it_rechecked_due(recheck):
+    recheck.begin(now=0)
+    recheck.record("Old", [], now=0)
+    recheck.finish()
+    # the interrupted run started at DAY and re-checked "New" before the crash
+    recheck.begin(now=DAY)
+    recheck.record("New", [], now=DAY + 60)
+    recheck.finish()
+    recheck.begin(now=DAY + 120)
+    assert recheck.plan(books("Old", "New"), now=DAY + 120) == books("Old")
+    assert recheck.plan(books("Old", "New"), now=DAY + 120, rechecked_since=DAY) == books("Old", "New")
+    assert recheck.plan_indexes(books("New", "Old"), now=DAY + 120) == [1]
+
+def test_plan_prioritizes_new_books_then_hits(recheck):
+    recheck.begin(now=0)
+    recheck.record("Miss", [], now=0)
+    recheck.record("Hit", [ROW], now=0)
+    recheck.record("Failed", None, now=0)
+    recheck.finish()
+
+    recheck.begin(now=DAY)
+    assert [book["Title"] for book in recheck.plan(books("Miss", "Hit", "New", "Failed"), now=DAY)] == \
+           ["New", "Failed", "Hit", "Miss"]
+    recheck.record("Miss", [], now=DAY)
+    recheck.record("Hit", [], now=DAY)
+    # a miss keeps the last seen offer
+    assert recheck.state("Hit")["last_offer"] == ROW
+    recheck.finish()
+
+    recheck.begin(now=2 * DAY)
+    assert [book["Title"] for book in recheck.plan(books("Miss", "Hit"), now=2 * DAY)] == ["Hit"]
+    assert recheck.stats() == {"sweep": False, "due": 1, "skipped": 1}
+
+def test_full_sweep_every_n_days(recheck):
+    assert recheck.begin(now=0)
+    recheck.record("Miss", [], now=0)
+    recheck.finish()
+    for day in range(1, 7):
+        assert not recheck.begin(now=day * DAY)
+    assert recheck.begin(now=7 * DAY)
+    assert recheck.is_due("Miss", now=7 * DAY)
+
+def test_search_skips_books_that_are_not_due(tmp_path, recheck):
+    input_csv = tmp_path / "books.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], ["Rdza", "Małecki, Jakub"], ["Lalka", "Prus, Bolesław"]])
+
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as server:
+        for _ in range(2):
+            asyncio.run(run_skupszop_search_async(input_csv, tmp_path / "prices.csv", max_price=100,
+                                                  base_url=server.url, recheck=recheck))
+        # second run: "Lalka" had no results a moment ago
+        assert server.request_count == 3
+    assert recheck.state("Lalka")["misses"] == 1 and recheck.state("Rdza")["misses"] == 0
@@ -0,0 +1,71 @@
+import asyncio
+import csv
+import json
+import pytest
+from app import result_sink as rs
+
+ROWS = [
+    ["Rdza", ["Jakub Małecki"], "9,67", "jak nowa", "https://skupszop.pl/rdza?id=1"],
+    ["Jedyny samolot na niebie", ["M. Graff Garrett", "Garrett M. Graff"], "12.50", "dobry", "https://skupszop.pl/js?id=2"],
+]
+
+
+# to_record / infer_format
+def test_to_record_types_price_and_authors():
+    record = rs.to_record(ROWS[0])
+    assert record == {"title": "Rdza", "authors": ["Jakub Małecki"], "price": 9.67,
+                      "condition": "jak nowa", "link": "https://skupszop.pl/rdza?id=1"}
+
+def test_infer_format_from_extension():
+    assert rs.infer_format("out.csv") == "csv"
+    assert rs.infer_format("out.jsonl") == "jsonl"
+    assert rs.infer_format("out.parquet") == "parquet"
+
+def test_unknown_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        rs.ResultSink(tmp_path / "out.csv", fmt="xlsx")
+
+
+# writing
+def test_csv_sink_buffers_until_flush(tmp_path):
+    path = tmp_path / "out.csv"
+    sink = rs.ResultSink(path, flush_rows=10, flush_interval=60)
+    for row in ROWS:
+        sink.put(row)
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+    sink.close()
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == rs.CSV_HEADER
+    assert rows[2] == ["Jedyny samolot na niebie", "M. Graff Garrett; Garrett M. Graff", "12.5", "dobry", "https://skupszop.pl/js?id=2"]
+
+def test_jsonl_sink_with_async_writer(tmp_path):
+    path = tmp_path / "out.jsonl"
+
+    async def run():
+        async with rs.ResultSink(path, flush_rows=1) as sink:
+            for row in ROWS:
+                sink.put(row)
+
+    asyncio.run(run())
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["price"] for r in records] == [9.67, 12.5]
+    assert records[1]["authors"] == ["M. Graff Garrett", "Garrett M. Graff"]
+
+def test_parquet_sink_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    sink = rs.ResultSink(path, flush_rows=1)
+    for row in ROWS:
+        sink.put(row)
+    sink.close()
+    table = pq.read_table(path)
+    assert table.num_rows == 2
+    assert str(table.schema.field("price").type) == "double"
+    assert table.column("authors").to_pylist()[1] == ["M. Graff Garrett", "Garrett M. Graff"]
+
+def test_parquet_without_pyarrow_says_so(tmp_path, monkeypatch):
+    import sys
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="needs pyarrow"):
+        rs.ResultSink(tmp_path / "out.parquet")
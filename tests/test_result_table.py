@@ -0,0 +1,57 @@
+from ui.result_table import ResultTable, display_row, row_html
+
+
+class FakePlaceholder:
+    def __init__(self):
+        self.calls = []
+
+    def markdown(self, body, unsafe_allow_html=False):
+        self.calls.append(body)
+
+
+def make_row(i):
+    return [f"Book {i}", ["Author A", "Author B"], "9,99", "dobry", f"https://skupszop.pl/book?id={i}"]
+
+
+def test_display_row_keeps_first_author_and_escapes_html():
+    assert display_row(make_row(1))[1] == "Author A"
+    assert display_row(["T", [], "1", "dobry", "x"])[1] == "Unknown"
+    html = row_html(["<b>Title</b>", "A", "1,00", "dobry", 'https://x?a=1&b="2"'])
+    assert "&lt;b&gt;Title&lt;/b&gt;" in html and "&quot;2&quot;" in html
+
+def test_redraws_are_batched():
+    table = ResultTable(interval_ms=60_000, batch_rows=50)
+    table.placeholder = placeholder = FakePlaceholder()
+    for i in range(120):
+        table.add(make_row(i))
+    # the first row draws (no draw yet), then every 50 rows
+    assert len(placeholder.calls) == 3
+    table.flush()
+    assert len(placeholder.calls) == 4
+    table.flush()
+    assert len(placeholder.calls) == 4
+
+def test_pages_only_draw_their_rows():
+    table = ResultTable(interval_ms=60_000, batch_rows=1000, page_size=100)
+    table.placeholder = placeholder = FakePlaceholder()
+    for i in range(250):
+        table.add(make_row(i))
+    assert table.pages == 3 and len(table) == 250
+
+    table.draw(page=3)
+    last_page = placeholder.calls[-1]
+    assert last_page.count("<tr>") == 1 + 50
+    assert "Book 200" in last_page and "Book 199" not in last_page
+    assert "Offers 201–250 of 250 (page 3/3)" in last_page
+
+    # out-of-range pages are clamped
+    assert "Book 0<" in table.page_html(page=0) and "Book 249" in table.page_html(page=9)
+
+def test_nothing_drawn_without_placeholder_or_rows():
+    table = ResultTable()
+    table.add(make_row(1))
+    placeholder = FakePlaceholder()
+    empty = ResultTable()
+    empty.placeholder = placeholder
+    empty.draw()
+    assert placeholder.calls == [] and table.redraws == 0
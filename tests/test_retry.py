@@ -0,0 +1,93 @@
+import asyncio
+import csv
+import random
+import time
+from app.concurrency import NO_CARDS, OK, SERVER_ERROR
+from app.query_planner import SearchCoalescer
+from app.retry import CircuitBreaker, RetryPolicy, RetryQueue
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import generated_skupszop_server
+
+
+def test_backoff_grows_with_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=0.5)
+    rng = random.Random(1)
+    for failures, full in [(1, 1.0), (2, 2.0), (3, 4.0), (6, 5.0)]:
+        delays = {policy.delay(failures, rng) for _ in range(20)}
+        assert len(delays) > 1 and all(full / 2 <= d <= full for d in delays)
+
+def test_breaker_opens_on_error_spike_and_recovers():
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_requests=4, cooldown=0.05)
+    for outcome in (OK, SERVER_ERROR, OK, SERVER_ERROR):
+        breaker.record(outcome)
+    assert not breaker.is_open
+    breaker.record(SERVER_ERROR)
+    assert breaker.is_open and breaker.opened == 1
+
+    start = time.monotonic()
+    asyncio.run(breaker.wait())
+    assert time.monotonic() - start >= 0.04 and not breaker.is_open
+
+def test_breaker_ignores_pages_without_cards():
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_requests=4)
+    for _ in range(10):
+        breaker.record(NO_CARDS)
+    assert not breaker.is_open
+
+def test_queue_gives_up_after_max_attempts():
+    queue = RetryQueue(RetryPolicy(max_attempts=2, base_delay=0.01))
+    book = {"Title": "Rdza", "Author": "A"}
+    runs = []
+
+    async def run(idx, book):
+        runs.append(idx)
+        queue.attempt(idx, book["Title"])
+        queue.defer(idx, book)
+
+    queue.attempt(0, "Rdza")
+    assert queue.defer(0, book)
+    asyncio.run(queue.drain(run))
+    assert runs == [0] and len(queue) == 0
+    summary = queue.summary()
+    assert summary["failed"] == ["Rdza"] and summary["attempts_per_book"] == {"Rdza": 2}
+
+def test_coalescer_does_not_share_failed_searches():
+    async def main():
+        coalescer = SearchCoalescer()
+
+        async def failing():
+            return None
+
+        assert await coalescer.run("Rdza", failing) is None
+        await asyncio.sleep(0)
+        assert not coalescer.known("Rdza")
+
+    asyncio.run(main())
+
+def test_failed_searches_are_retried_after_the_main_pass(tmp_path):
+    catalog = {f"Book {i}": f"Author {i}" for i in range(30)}
+    input_csv = tmp_path / "books.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], *catalog.items()])
+
+    def found(output):
+        with open(output, newline="", encoding="utf-8") as f:
+            return {row[0] for row in list(csv.reader(f))[1:]}
+
+    def search(output, retry):
+        with generated_skupszop_server(catalog, error_rate=0.3, seed=3) as server:
+            asyncio.run(run_skupszop_search_async(input_csv, output, max_price=100, base_url=server.url,
+                                                  adaptive_concurrency=False, retry=retry))
+            return server.request_count
+
+    # without retries the failed books are missing
+    search(tmp_path / "no_retry.csv", False)
+    assert found(tmp_path / "no_retry.csv") < set(catalog)
+
+    queue = RetryQueue(RetryPolicy(max_attempts=8, base_delay=0.01), CircuitBreaker(threshold=1.0))
+    requests = search(tmp_path / "prices.csv", queue)
+    assert found(tmp_path / "prices.csv") == set(catalog)
+    summary = queue.summary()
+    assert summary["books"] == 30 and summary["failed"] == []
+    assert summary["retried"] == summary["recovered"] > 0
+    assert requests == sum(n * count for n, count in summary["attempts"].items())
@@ -0,0 +1,130 @@
+import asyncio
+import csv
+import os
+from app.pipeline import run_pipeline_async
+from app.recheck import RecheckScheduler
+from app.result_sink import ResultSink
+from app.run_journal import RunJournal, journal_path, run_key
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import generated_skupszop_server, goodreads_shelf_server, make_shelf_books
+
+ROW = ["Rdza", ["Jakub Małecki"], "9,67", "jak nowa", "https://skupszop.pl/rdza?id=1"]
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def test_resume_drops_rows_of_unfinished_books(tmp_path):
+    output = tmp_path / "prices.csv"
+    journal = RunJournal(journal_path(output), run_key("books", 0, 20))
+    assert not journal.open(output)
+    sink = ResultSink(output, flush_rows=1000, flush_interval=60, journal=journal)
+    sink.put(ROW)
+    sink.book_done(0)
+    sink.flush()
+    # book 1 wrote a row, but the run died before it finished
+    sink.put(ROW)
+    sink.close()
+    journal.close()
+    assert len(read_rows(output)) == 2
+
+    journal = RunJournal(journal_path(output), run_key("books", 0, 20))
+    assert journal.open(output, resume=True)
+    assert journal.completed == {0} and len(read_rows(output)) == 1
+    journal.close(finished=True)
+    assert not os.path.exists(journal_path(output))
+
+def test_journal_of_another_run_starts_over(tmp_path):
+    output = tmp_path / "prices.csv"
+    journal = RunJournal(journal_path(output), run_key("books", 0, 20))
+    journal.open(output)
+    journal.commit([0, 1], 10)
+    journal.close()
+    other = RunJournal(journal_path(output), run_key("books", 0, 50))
+    assert not other.open(output, resume=True) and other.completed == set()
+    other.close()
+
+def test_interrupted_search_resumes_without_repeating_books(tmp_path):
+    catalog = {f"Book {i}": f"Author {i}" for i in range(20)}
+    input_csv, output = tmp_path / "books.csv", tmp_path / "prices.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], *catalog.items()])
+
+    def search(server, **options):
+        return run_skupszop_search_async(input_csv, output, max_price=100, base_url=server.url, max_concurrent_pages=2,
+                                         adaptive_concurrency=False, resume=True, **options)
+
+    with generated_skupszop_server(catalog, latency=0.05) as server:
+        try:
+            asyncio.run(asyncio.wait_for(search(server), timeout=0.3))
+        except asyncio.TimeoutError:
+            pass
+        first = server.request_count
+        assert 0 < first < 20 and os.path.exists(journal_path(output))
+        asyncio.run(search(server))
+        # books finished before the interruption are not searched again
+        assert server.request_count - first <= 20 - first + 2
+
+    rows = read_rows(output)
+    assert not os.path.exists(journal_path(output))
+    assert len(rows) == len(set(map(tuple, rows)))
+    assert {row[0] for row in rows} == set(catalog)
+
+def interrupted(coro, timeout):
+    try:
+        asyncio.run(asyncio.wait_for(coro, timeout=timeout))
+    except asyncio.TimeoutError:
+        pass
+
+def test_resume_with_recheck_keeps_the_journal(tmp_path):
+    catalog = {f"Book {i}": f"Author {i}" for i in range(80)}
+    input_csv, output = tmp_path / "books.csv", tmp_path / "prices.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], *catalog.items()])
+
+    def search(server):
+        # outcomes recorded before the interruption change the re-check plan of the resumed run
+        recheck = RecheckScheduler(tmp_path / "recheck.sqlite3")
+        return recheck, run_skupszop_search_async(input_csv, output, max_price=100, base_url=server.url,
+                                                  max_concurrent_pages=4, adaptive_concurrency=False,
+                                                  resume=True, recheck=recheck)
+
+    with generated_skupszop_server(catalog, latency=0.02) as server:
+        recheck, run = search(server)
+        interrupted(run, timeout=0.6)
+        recheck.close()
+        first = server.request_count
+        assert 0 < first < 80
+        recheck, run = search(server)
+        asyncio.run(run)
+        recheck.close()
+        assert server.request_count - first < 80 - first + 10
+
+    rows = read_rows(output)
+    assert len(rows) == len(set(map(tuple, rows)))
+    assert {row[0] for row in rows} == set(catalog)
+
+def test_pipeline_resume_survives_shelf_changes(tmp_path):
+    books = make_shelf_books(100)
+    catalog = {book["title"]: book["author"] for book in books + [{"title": "Rdza", "author": "Jakub Małecki"}]}
+    output = tmp_path / "prices.csv"
+
+    def run(shelf, shop):
+        return run_pipeline_async(f"{shelf.url}/review/list/1-test?shelf=to-read", output, max_price=100,
+                                  base_url=shop.url, max_concurrent_pages=2, adaptive_concurrency=False, resume=True)
+
+    with generated_skupszop_server(catalog, latency=0.04) as shop, goodreads_shelf_server(books=books) as shelf:
+        # long enough for the sink to flush (and journal) a first batch
+        interrupted(run(shelf, shop), timeout=1.6)
+        assert 0 < shop.request_count < 100 and os.path.getsize(journal_path(output)) > 100
+        first = shop.request_count
+        # a book added in front of the shelf shifts every shelf position
+        books.insert(0, {"id": 5000, "title": "Rdza", "series": "", "author": "Małecki, Jakub"})
+        asyncio.run(run(shelf, shop))
+        assert shop.request_count - first < 101 - first + 10
+
+    rows = read_rows(output)
+    assert len(rows) == len(set(map(tuple, rows)))
+    assert {row[0] for row in rows} == set(catalog)
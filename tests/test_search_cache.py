@@ -0,0 +1,86 @@
+import pytest
+from app import search_cache as sc
+
+CARDS = [{"title": "Rdza", "authors": ["Jakub Małecki"], "link": "https://skupszop.pl/rdza?id=1",
+          "offers": [{"price": "9,67", "condition": "jak nowa"}]}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = sc.SearchCache(tmp_path / "cache.sqlite3")
+    yield c
+    c.close()
+
+
+# normalize_title_key
+def test_normalize_title_key_casefolds_and_collapses_spaces():
+    assert sc.normalize_title_key("  The   HOBBIT ") == "the hobbit"
+
+
+# get / put
+def test_cache_roundtrip_and_counters(cache):
+    assert cache.get("Rdza", 20) is None
+    cache.put("Rdza", 20, CARDS)
+    assert cache.get("rdza ", 20) == CARDS
+    assert cache.get("Rdza", 30) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 1}
+
+def test_cache_stores_empty_results(cache):
+    cache.put("Nieznana", 20, [])
+    assert cache.get("Nieznana", 20) == []
+
+def test_cache_entries_expire(tmp_path):
+    cache = sc.SearchCache(tmp_path / "cache.sqlite3", ttl=-1)
+    cache.put("Rdza", 20, CARDS)
+    assert cache.get("Rdza", 20) is None
+    assert len(cache) == 0
+    cache.close()
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = sc.SearchCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put("A", 20, [])
+    cache.put("B", 20, [])
+    cache.get("A", 20)
+    cache.put("C", 20, [])
+    assert cache.get("B", 20) is None
+    assert cache.get("A", 20) == [] and cache.get("C", 20) == []
+    cache.close()
+
+def test_cache_hits_write_nothing_until_put_or_close(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = sc.SearchCache(path)
+    cache.put("Rdza", 20, CARDS)
+    writes = cache._conn.total_changes
+    assert cache.get("Rdza", 20) == CARDS and cache.get("Rdza", 20) == CARDS
+    assert cache._conn.total_changes == writes
+    cache.close()
+    reopened = sc.SearchCache(path)
+    used, created = reopened._conn.execute("SELECT last_used, created_at FROM search_cache").fetchone()
+    assert used > created
+    reopened.close()
+
+def test_cache_bypass_skips_reads_but_stores(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = sc.SearchCache(path, bypass=True)
+    cache.put("Rdza", 20, CARDS)
+    assert cache.get("Rdza", 20) is None
+    cache.close()
+    assert sc.SearchCache(path).get("Rdza", 20) == CARDS
+
+
+# cache in front of the async search
+def test_async_search_reuses_cached_cards(tmp_path):
+    import asyncio
+    from app.skupszop_search_async import run_skupszop_search_async
+    from benchmarks.standin_servers import skupszop_search_server
+
+    input_csv = tmp_path / "books.csv"
+    input_csv.write_text("Title,Author\nRdza,\"Małecki, Jakub\"\n", encoding="utf-8-sig")
+    cache = sc.SearchCache(tmp_path / "cache.sqlite3")
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as server:
+        for _ in range(2):
+            asyncio.run(run_skupszop_search_async(input_csv, tmp_path / "out.csv", max_price=100,
+                                                  base_url=server.url, cache=cache))
+        assert server.request_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
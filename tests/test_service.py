@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+import pytest
+import requests
+from app.jobs import FairScheduler
+from app.service import SearchService, make_server
+from benchmarks.standin_servers import goodreads_shelf_server, skupszop_search_server
+
+
+@pytest.fixture
+def service_url(tmp_path):
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as shop:
+        service = SearchService(max_running=1, max_concurrency=4, base_url=shop.url, use_cache=False,
+                                output_dir=str(tmp_path))
+        httpd = make_server(service, port=0)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        host, port = httpd.server_address[:2]
+        yield f"http://{host}:{port}", service
+        httpd.shutdown()
+        httpd.server_close()
+        service.close()
+
+
+def test_fair_scheduler_alternates_users():
+    order = []
+
+    async def job(scheduler, user, n):
+        async with scheduler.slot(user):
+            order.append((user, n))
+            await asyncio.sleep(0.01)
+
+    async def main():
+        scheduler = FairScheduler(max_running=1)
+        tasks = [asyncio.create_task(job(scheduler, "a", n)) for n in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job(scheduler, "b", 0)))
+        # a cancelled waiter gives up its turn
+        cancelled = asyncio.create_task(job(scheduler, "c", 0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(*tasks)
+        assert scheduler.running == 0 and scheduler.waiting == 0
+
+    asyncio.run(main())
+    assert order == [("a", 0), ("a", 1), ("b", 0), ("a", 2)]
+
+def test_book_list_job_streams_results(service_url):
+    url, service = service_url
+    books = [{"title": "Rdza", "author": "Małecki, Jakub"}, {"title": "Lalka", "author": "Prus, Bolesław"}]
+    response = requests.post(f"{url}/jobs", json={"user": "ola", "books": books, "max_price": 100})
+    assert response.status_code == 201
+    job_id = response.json()["id"]
+
+    lines = requests.get(f"{url}/jobs/{job_id}/stream", timeout=30).text.splitlines()
+    events = [json.loads(line) for line in lines]
+    assert events[-1] == {"event": "finished", "status": "done"}
+    offers = [event["offer"] for event in events if event["event"] == "result"]
+    assert offers and {offer["title"] for offer in offers} == {"Rdza"}
+
+    polled = requests.get(f"{url}/jobs/{job_id}/events", params={"start": 0, "timeout": 0}).json()
+    assert polled["status"] == "done" and polled["next"] == len(events)
+    assert requests.get(f"{url}/jobs/{job_id}").json()["books"] == 2
+    assert requests.get(f"{url}/health").json()["running"] == 0
+
+def test_shelf_job_shares_the_runner(service_url):
+    url, service = service_url
+    with goodreads_shelf_server(num_books=5) as shelf:
+        ids = [requests.post(f"{url}/jobs", json={"user": user, "shelf_url": f"{shelf.url}/review/list/1-test"}).json()["id"]
+               for user in ("a", "b")]
+        for job_id in ids:
+            assert service.get(job_id).wait(timeout=30)
+    assert [job.status for job in service.list_jobs()] == ["done", "done"]
+    assert {job.books for job in service.list_jobs()} == {5}
+
+def test_bad_requests_and_cancel(service_url):
+    url, service = service_url
+    assert requests.post(f"{url}/jobs", json={"books": []}).status_code == 400
+    assert requests.post(f"{url}/jobs", json={"shelf_url": "ftp://x", "books": None}).status_code == 400
+    assert requests.post(f"{url}/jobs", json={"books": [{"title": "A"}], "min_price": 5, "max_price": 1}).status_code == 400
+    assert requests.get(f"{url}/jobs/999").status_code == 404
+
+    job_id = requests.post(f"{url}/jobs", json={"books": [{"title": "A"}]}).json()["id"]
+    for query in ("start=abc", "timeout=soon", "start=-1", "timeout=nan"):
+        assert requests.get(f"{url}/jobs/{job_id}/events?{query}", timeout=5).status_code == 400
+
+    with goodreads_shelf_server(num_books=40, latency=0.3) as shelf:
+        job_id = requests.post(f"{url}/jobs", json={"shelf_url": f"{shelf.url}/review/list/1-test"}).json()["id"]
+        assert requests.delete(f"{url}/jobs/{job_id}").status_code == 202
+        assert service.get(job_id).wait(timeout=2)
+    assert service.get(job_id).status == "cancelled"
@@ -0,0 +1,93 @@
+import asyncio
+import csv
+from app import sharding
+from app.retry import RetryPolicy, RetryQueue
+from app.search_cache import SearchCache
+from app.skupszop_search_async import run_skupszop_search_async
+from benchmarks.standin_servers import generated_skupszop_server, skupszop_search_server
+
+BOOKS = [
+    ("Rdza", "Małecki, Jakub"),
+    ("Lalka", "Prus, Bolesław"),
+    ("Nieznana książka", "Kowalski, Jan"),
+    ("Solaris", "Lem, Stanisław"),
+    ("Dygot", "Małecki, Jakub"),
+    ("Bieguni", "Tokarczuk, Olga"),
+]
+
+
+def write_books(path, books):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Title", "Author"])
+        writer.writerows(books)
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_split_books_round_robin_keeps_indexes():
+    books = [{"Title": title} for title in "abcde"]
+    parts = sharding.split_books(books, 2)
+    assert [[group[0][0] for group in part] for part in parts] == [[0, 2, 4], [1, 3]]
+    assert sharding.split_books(books[:1], 4) == [[[(0, books[0])]]]
+    assert sharding.split_books([], 4) == []
+
+def test_split_books_keeps_search_groups_together():
+    books = [{"Title": title} for title in ["Rdza", "Lalka", "rdza.", "Solaris", "RDZA"]]
+    parts = sharding.split_books(books, 2, dedupe_queries=True)
+    assert [[[idx for idx, _ in group] for group in part] for part in parts] == [[[0, 2, 4], [3]], [[1]]]
+
+def test_sharded_search_merges_in_book_order(tmp_path):
+    input_csv = tmp_path / "books.csv"
+    write_books(input_csv, BOOKS)
+    progress, results = [], []
+
+    with skupszop_search_server({"Nieznana książka": "skupszop_no_results.html"},
+                                default_page="skupszop_results.html") as server:
+        # one page at a time -> rows in book order
+        asyncio.run(run_skupszop_search_async(
+            input_csv, tmp_path / "serial.csv", max_price=100, base_url=server.url,
+            max_concurrent_pages=1, adaptive_concurrency=False,
+        ))
+        sharding.run_sharded_search(
+            input_csv, tmp_path / "sharded.csv", max_price=100, base_url=server.url,
+            progress_callback=lambda current, total, title, author: progress.append((current, total, title)),
+            result_callback=results.append, shards=3, concurrency_per_shard=2,
+        )
+        assert server.request_count == 2 * len(BOOKS)
+
+    sharded = read_rows(tmp_path / "sharded.csv")
+    assert sharded == read_rows(tmp_path / "serial.csv")
+    assert len({row[0] for row in sharded[1:]}) > 1
+    assert len(results) == len(sharded) - 1
+    assert sorted(progress) == [(i + 1, len(BOOKS), title) for i, (title, _) in enumerate(BOOKS)]
+
+def test_sharded_search_shares_cache_file(tmp_path):
+    input_csv = tmp_path / "books.csv"
+    write_books(input_csv, BOOKS[:2])
+    cache = SearchCache(tmp_path / "cache.sqlite3")
+
+    with skupszop_search_server(default_page="skupszop_results.html") as server:
+        for _ in range(2):
+            sharding.run_sharded_search(input_csv, tmp_path / "prices.jsonl", max_price=100,
+                                        base_url=server.url, shards=2, cache=cache)
+        assert server.request_count == 2
+
+    assert cache.stats() == {"hits": 2, "misses": 2, "entries": 2}
+    cache.close()
+
+def test_sharded_search_retries_failed_searches(tmp_path):
+    input_csv = tmp_path / "books.csv"
+    write_books(input_csv, BOOKS[:4])
+    retry = RetryQueue(RetryPolicy(max_attempts=2, base_delay=0.01))
+
+    with generated_skupszop_server(dict(BOOKS), error_rate=1.0) as server:
+        sharding.run_sharded_search(input_csv, tmp_path / "prices.csv", max_price=100,
+                                    base_url=server.url, shards=2, retry=retry)
+        assert server.request_count == 2 * 4
+
+    summary = retry.summary()
+    assert summary["failed"] == sorted(title for title, _ in BOOKS[:4])
+    assert summary["attempts"] == {2: 4}
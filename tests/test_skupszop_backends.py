@@ -0,0 +1,55 @@
+import pytest
+from app import skupszop_backends as sb
+from benchmarks.standin_servers import load_fixture, skupszop_search_server
+
+
+# build_search_url
+def test_build_search_url_encodes_keyword():
+    assert sb.build_search_url("Rdza i kości", 20) == "https://skupszop.pl/wyszukaj?keyword=Rdza%20i%20ko%C5%9Bci&price_to=20"
+
+
+# parse_search_page
+def test_parse_search_page_reads_cards():
+    cards = sb.parse_search_page(load_fixture("skupszop_results.html"))
+    assert len(cards) == 24
+    assert cards[0]["title"] == "Rdza"
+    assert cards[0]["authors"] == ["Jakub Małecki"]
+    assert cards[0]["link"].startswith("https://skupszop.pl/")
+    assert all(set(offer) == {"price", "condition"} for card in cards for offer in card["offers"])
+
+def test_parse_search_page_no_results_is_empty_list():
+    assert sb.parse_search_page(load_fixture("skupszop_no_results.html")) == []
+
+def test_parse_search_page_client_rendered_needs_browser():
+    assert sb.parse_search_page(load_fixture("skupszop_client_rendered.html")) is None
+
+def test_parse_search_page_without_cards_or_marker_is_empty_list():
+    # unknown no-results wording must not send the book to the browser
+    page = "<html><body><main><h1>Wyniki wyszukiwania</h1><p>Zero produktów.</p></main></body></html>"
+    assert sb.parse_search_page(page) == []
+
+def test_read_search_page_outcomes():
+    assert sb.read_search_page(load_fixture("skupszop_no_results.html")) == ([], sb.OK)
+    page = "<html><body><main><h1>Wyniki wyszukiwania</h1><p>Zero produktów.</p></main></body></html>"
+    assert sb.read_search_page(page) == ([], sb.NO_CARDS)
+
+
+# HttpSearchBackend against a local stand-in server
+def test_http_backend_search():
+    pages = {"Rdza": "skupszop_results.html", "Spa": "skupszop_client_rendered.html"}
+    with skupszop_search_server(pages) as server:
+        backend = sb.HttpSearchBackend(pool_size=2, base_url=server.url)
+        try:
+            assert len(backend.search("Rdza", 20)) == 24
+            assert backend.search("Nieznana", 20) == []
+            assert backend.search("Spa", 20) is None
+        finally:
+            backend.close()
+
+def test_http_backend_error_falls_back_to_browser():
+    with skupszop_search_server() as server:
+        backend = sb.HttpSearchBackend(base_url=server.url + "/missing")
+        try:
+            assert backend.search("Rdza", 20) is None
+        finally:
+            backend.close()
@@ -47,3 +47,32 @@ def test_debug_similarity():
     print("similarity =", ratio)
     # test always passes but shows results
     assert isinstance(ratio, float)
+
+
+# sync entry point = async engine
+def test_sync_search_matches_async_and_runs_concurrently():
+    from benchmarks.bench_sync_async_parity import compare
+
+    results = compare(books=12, latency=0.2)
+    (_, sync_rows, sync_peak), (_, async_rows, _) = results["sync"], results["async"]
+    assert sync_rows == async_rows and len(sync_rows) > 0
+    # searches overlap instead of running one by one
+    assert sync_peak > 1
+
+def test_sync_search_inside_running_loop(tmp_path):
+    import asyncio
+    import csv
+    from benchmarks.standin_servers import generated_skupszop_server
+
+    input_csv, output_csv = tmp_path / "books.csv", tmp_path / "prices.csv"
+    with open(input_csv, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerows([["Title", "Author"], ["Rdza", "Jakub Małecki"]])
+    progress = []
+
+    async def caller(url):
+        return ss.run_skupszop_search(input_csv, output_csv, max_price=100, base_url=url,
+                                      progress_callback=lambda *args: progress.append(args))
+
+    with generated_skupszop_server({"Rdza": "Jakub Małecki"}) as server:
+        assert asyncio.run(caller(server.url)) == output_csv
+    assert len(progress) == 1 and output_csv.stat().st_size > 0
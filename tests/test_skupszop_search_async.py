@@ -0,0 +1,105 @@
+import pytest
+from app import skupszop_search_async as ssa
+
+
+def make_card(title, authors, offers, link="https://skupszop.pl/book?id=1"):
+    return {
+        "title": title,
+        "authors": authors,
+        "link": link,
+        "offers": [{"price": price, "condition": condition} for price, condition in offers],
+    }
+
+
+# select_offers
+def test_select_offers_returns_rows_in_price_range():
+    cards = [make_card("Rdza", ["Jakub Małecki"], [("9,67", "jak nowa"), ("25,00", "dobry")])]
+    rows = ssa.select_offers(cards, "Rdza", "Małecki, Jakub", min_price=0, max_price=20)
+    assert rows == [["Rdza", ["Jakub Małecki"], "9,67", "jak nowa", "https://skupszop.pl/book?id=1"]]
+
+def test_select_offers_skips_other_titles_and_authors():
+    cards = [
+        make_card("Lalka", ["Bolesław Prus"], [("5,00", "dobry")]),
+        make_card("Rdza", ["Anna Nowak"], [("5,00", "dobry")]),
+    ]
+    assert ssa.select_offers(cards, "Rdza", "Małecki, Jakub", 0, 20) == []
+
+def test_select_offers_skips_cards_without_authors():
+    cards = [make_card("Rdza", [], [("5,00", "dobry")])]
+    assert ssa.select_offers(cards, "Rdza", "Małecki, Jakub", 0, 20) == []
+
+def test_select_offers_ignores_unparsable_prices():
+    cards = [make_card("Rdza", ["Jakub Małecki"], [("brak", "dobry"), ("12.50", "dobry")])]
+    rows = ssa.select_offers(cards, "Rdza", "Jakub Małecki", 10, 20)
+    assert [row[2] for row in rows] == ["12.50"]
+
+
+# run_skupszop_search_async with the HTTP backend
+def test_run_search_http_backend_writes_matching_offers(tmp_path):
+    import asyncio
+    import csv
+    from benchmarks.standin_servers import skupszop_search_server
+
+    input_csv = tmp_path / "books.csv"
+    output_csv = tmp_path / "prices.csv"
+    input_csv.write_text("Title,Author\nRdza,\"Małecki, Jakub\"\nLalka,\"Prus, Bolesław\"\n", encoding="utf-8-sig")
+    results = []
+
+    with skupszop_search_server({"Rdza": "skupszop_results.html"}) as server:
+        asyncio.run(ssa.run_skupszop_search_async(
+            input_csv, output_csv, min_price=0, max_price=100,
+            result_callback=results.append, base_url=server.url,
+        ))
+
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["Title", "Author", "Price", "Condition", "Link"]
+    assert len(rows) - 1 == len(results) > 0
+    assert {row[0] for row in rows[1:]} == {"Rdza"}
+
+def test_run_search_rejects_unknown_backend(tmp_path):
+    import asyncio
+    with pytest.raises(ValueError):
+        asyncio.run(ssa.run_skupszop_search_async(tmp_path / "in.csv", tmp_path / "out.csv", backend="carrier-pigeon"))
+
+def test_failed_card_extraction_is_a_failed_search():
+    import asyncio
+
+    class CrashedPage:
+        class first:
+            @staticmethod
+            async def wait_for(timeout):
+                pass
+
+        async def goto(self, url, timeout):
+            return None
+
+        def locator(self, selector):
+            return self
+
+        async def evaluate(self, script):
+            raise RuntimeError("Target page, context or browser has been closed")
+
+    cards, outcome = asyncio.run(ssa.fetch_cards_with_outcome(CrashedPage(), "Rdza", 20, accept_cookies=False))
+    assert cards is None and outcome == ssa.ERROR
+
+def test_page_without_cards_or_marker_is_no_cards_not_a_timeout():
+    import asyncio
+
+    class UnlabelledEmptyPage:
+        class first:
+            @staticmethod
+            async def wait_for(timeout):
+                raise TimeoutError("no product cards")
+
+        async def goto(self, url, timeout):
+            return None
+
+        def locator(self, selector):
+            return self
+
+        async def inner_text(self, selector, timeout):
+            return "Wyniki wyszukiwania. Zero produktów."
+
+    cards, outcome = asyncio.run(ssa.fetch_cards_with_outcome(UnlabelledEmptyPage(), "Rdza", 20, accept_cookies=False))
+    assert cards == [] and outcome == ssa.NO_CARDS
@@ -0,0 +1,88 @@
+import html
+import math
+import time
+
+COLUMNS = ["Title", "Author", "Price", "Condition", "Link"]
+
+TABLE_STYLE = (
+    "background-color:#1d232f; color:#ffffff; "
+    "border-radius:8px; border-collapse:separate; border-spacing:0; overflow:hidden;"
+)
+CELL_STYLE = "padding:8px 12px;"
+LINK_STYLE = "color:#1E90FF; text-decoration:none; font-weight:bold;"
+
+
+# result row -> display row (first author only, as before)
+def display_row(row):
+    title, authors, price, condition, link = row
+    if isinstance(authors, list):
+        authors = authors[0] if authors else "Unknown"
+    return [title, authors, price, condition, link]
+
+def row_html(row):
+    title, author, price, condition, link = row
+    cells = [html.escape(str(value)) for value in (title, author, price, condition)]
+    cells.append(f'<a href="{html.escape(str(link), quote=True)}" target="_blank" style="{LINK_STYLE}">Page</a>')
+    return "<tr>" + "".join(f'<td style="{CELL_STYLE}">{cell}</td>' for cell in cells) + "</tr>"
+
+
+class ResultTable:
+    """
+    Search results for the Streamlit table. Each row is formatted to HTML once
+    when it arrives; the placeholder is redrawn at most every `interval_ms` ms
+    or `batch_rows` rows, and only one page of `page_size` rows is drawn.
+    """
+
+    def __init__(self, interval_ms=300, batch_rows=50, page_size=100):
+        self.interval = interval_ms / 1000
+        self.batch_rows = batch_rows
+        self.page_size = page_size
+        self.page = 1
+        self.placeholder = None
+        self.redraws = 0
+        self._rows = []
+        self._html_rows = []
+        self._pending = 0
+        self._last_draw = 0.0
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(len(self._rows) / self.page_size))
+
+    def add(self, row):
+        row = display_row(row)
+        self._rows.append(row)
+        self._html_rows.append(row_html(row))
+        self._pending += 1
+        if self._pending >= self.batch_rows or time.monotonic() - self._last_draw >= self.interval:
+            self.draw()
+
+    # rows that arrived since the last redraw
+    def flush(self):
+        if self._pending:
+            self.draw()
+
+    def page_html(self, page=None):
+        page = min(max(1, self.page if page is None else page), self.pages)
+        start = (page - 1) * self.page_size
+        body = "".join(self._html_rows[start:start + self.page_size])
+        header = "".join(f'<th style="{CELL_STYLE}">{column}</th>' for column in COLUMNS)
+        caption = ""
+        if self.pages > 1:
+            caption = (f'<p style="opacity:0.7;">Offers {start + 1}–{min(start + self.page_size, len(self))} '
+                       f'of {len(self)} (page {page}/{self.pages})</p>')
+        return (f'<div style="overflow-x:auto;">{caption}<table border="0" style="{TABLE_STYLE}">'
+                f'<thead><tr>{header}</tr></thead><tbody>{body}</tbody></table></div>')
+
+    def draw(self, page=None):
+        self._pending = 0
+        self._last_draw = time.monotonic()
+        if page is not None:
+            self.page = page
+        if self.placeholder is None or not self._rows:
+            return
+        self.redraws += 1
+        self.placeholder.markdown(self.page_html(), unsafe_allow_html=True)
@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 import asyncio
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
@@ -9,12 +10,12 @@ if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 
-import pandas as pd
 import streamlit as st
 from urllib.parse import urlparse
 from app import paths as p
-from app.goodreads_scraper import scrape_goodreads_shelf, save_to_csv
-from app.skupszop_search_async import run_skupszop_search_async
+from app.jobs import CANCELLED, FAILED, JobRunner
+from app.search_cache import SearchCache
+from ui.result_table import ResultTable
 
 
 st.set_page_config(page_title="SkupSzop Books Prices", layout="wide")
@@ -35,16 +36,23 @@ def is_goodreads_shelf(url: str) -> bool:
     except:
         return False
 
+# one background runner per server process: its browser stays warm across reruns and sessions
+@st.cache_resource
+def get_job_runner():
+    return JobRunner()
+
+runner = get_job_runner()
+
 # session state
-if "running" not in st.session_state:
-    st.session_state.running = False
-if "stop" not in st.session_state:
-    st.session_state.stop = False
-if "results_df" not in st.session_state:
-    st.session_state.results_df = pd.DataFrame(columns=["Title", "Author", "Price", "Condition", "Link"])
+if "job" not in st.session_state:
+    st.session_state.job = None
+if "results_table" not in st.session_state:
+    st.session_state.results_table = ResultTable()
 
 def stop_scraping():
-    st.session_state.stop = True
+    # runs before the rerun; the job unwinds (closing its pages) in the background
+    if st.session_state.job is not None:
+        st.session_state.job.cancel()
 
 # layout: left = controls/messages, right = table
 col_left, col_right = st.columns([1, 1], gap="medium")
@@ -52,6 +60,7 @@ col_left, col_right = st.columns([1, 1], gap="medium")
 with col_right:
     st.subheader("Results")
     results_placeholder = st.empty()
+    st.session_state.results_table.placeholder = results_placeholder
 
 with col_left:
     #DEFAULT_GOODREADS_URL = "https://www.goodreads.com/review/list/26367680?shelf=read"
@@ -59,6 +68,7 @@ with col_left:
     
     url = st.text_input("Enter the Goodreads shelf link:", placeholder=DEFAULT_GOODREADS_URL)
     min_price, max_price = st.slider("Max price (PLN):", min_value=0, max_value=100, value=(0,20))
+    use_cache = st.checkbox("Use cached search results (up to 6 h old)", value=True)
 
     if not url:
         url = DEFAULT_GOODREADS_URL
@@ -72,92 +82,97 @@ with col_left:
             if not is_goodreads_shelf(url):
                 st.error("Please enter a valid Goodreads shelf link!")
             else:
-                st.session_state.stop = False
-                st.session_state.running = True
-                st.session_state.url = url
-                st.session_state.min_price = min_price
+                if st.session_state.job is not None:
+                    # the old run must let go of the output file first
+                    st.session_state.job.cancel()
+                    st.session_state.job.wait(timeout=2)
                 st.session_state.max_price = max_price
-                st.session_state.results_df = pd.DataFrame(columns=["Title", "Author", "Price", "Condition", "Link"])
+                st.session_state.results_table = ResultTable()
+                st.session_state.results_table.placeholder = results_placeholder
+                results_placeholder.empty()
+                # Goodreads pages stream straight into the SkupSzop search (books.csv is a side output)
+                st.session_state.job = runner.submit_pipeline(
+                    url,
+                    p.SKUPSZOP_CSV,
+                    books_csv=p.BOOKS_CSV,
+                    min_price=min_price,
+                    max_price=max_price,
+                    cache=SearchCache(bypass=not use_cache),
+                )
 
     with btn_col2:
         # stop button
-        if st.session_state.running:
+        if st.session_state.job is not None:
             st.button("Stop", on_click=stop_scraping, use_container_width=True, key="stop_btn")
 
     status_placeholder = st.empty()
 
-    # scraping/searching
-    if st.session_state.running and not st.session_state.stop:
-        try:
-            books = []
-            with st.spinner("Loading your Goodreads shelf..."):
-                # load books from Goodreads shelf
-                shelf_books = list(scrape_goodreads_shelf(st.session_state.url, delay=1.5, max_pages=100, debug=False))
-                for i, book in enumerate(shelf_books):
-                    if st.session_state.stop:
-                        status_placeholder.warning("Interrupted by user")
+    # the search runs in the background; each script run follows it until it finishes
+    job = st.session_state.job
+    if job is not None:
+        with st.spinner("Loading your Goodreads shelf and searching for prices on SkupSzop..."):
+            progress_bar = st.progress(0, text="SkupSzop search")
+            concurrency_placeholder = st.empty()
+            metrics_placeholder = st.empty()
+            results_table = st.session_state.results_table
+
+            def update_metrics(snapshot):
+                # live run metrics: request outcomes and mean time per stage
+                counters = snapshot["counters"]
+                stages = ", ".join(f"{stage} {h['mean']:.2f}s" for stage, h in snapshot["stages"].items())
+                metrics_placeholder.caption(
+                    f"Requests: {counters.get('requests', 0)}, timeouts: {counters.get('timeouts', 0)}, "
+                    f"no results: {counters.get('no_results', 0)}, matches: {counters.get('matches', 0)} | {stages}"
+                )
+
+            try:
+                while True:
+                    finished = job.done()
+                    for event in job.drain():
+                        kind = event[0]
+                        if kind == "progress":
+                            # inform Streamlit which book is processing
+                            current, total, title, author = event[1:]
+                            progress_bar.progress(current / total, text=f"SkupSzop search {current}/{total}: {title} ({author})")
+                        elif kind == "result":
+                            # results in table (buffered, redrawn a few times per second)
+                            results_table.add(event[1])
+                        elif kind == "concurrency":
+                            # adaptive limiter decisions
+                            concurrency_placeholder.caption(f"SkupSzop concurrency: {event[1]} ({event[2]})")
+                        elif kind == "metrics":
+                            update_metrics(event[1])
+                    if finished:
                         break
-                    books.append(book)
-
-                if not books:
-                    status_placeholder.warning("No books loaded")
-                else:
-                    # save to CSV
-                    save_to_csv(books, p.BOOKS_CSV)
-                    status_placeholder.success(f"Successfully fetched {len(books)} books from Goodreads")
-
-            if books and not st.session_state.stop:
-                with st.spinner("Searching for prices on SkupSzop..."):
-                    progress_bar = st.progress(0, text="SkupSzop search")
-
-                    def update_skupszop_progress(current, total, title, author):
-                        # inform Streamlit which book is processing
-                        progress_bar.progress(current / total, text=f"SkupSzop search {current}/{total}: {title} ({author})")
-
-                    # results in table
-                    def update_skupszop_result(row):
-                        if isinstance(row[1], list):
-                            row[1] = row[1][0] if row[1] else "Unknown"
-                        st.session_state.results_df.loc[len(st.session_state.results_df)] = row
-                        temp_df = st.session_state.results_df.copy()
-                        temp_df["Link"] = temp_df["Link"].apply(
-                            lambda x: f'<a href="{x}" target="_blank" style="color:#1E90FF; text-decoration:none; font-weight:bold;">Page</a>'
-                        )
-
-                        # convert DataFrame to styled HTML table
-                        table_html = temp_df.to_html(escape=False, index=False)
-                        table_html = table_html.replace(
-                            "<table",
-                            '<table style="background-color:#1d232f; color:#ffffff; '
-                            'border-radius:8px; border-collapse:separate; border-spacing:0; overflow:hidden;"',
-                            1,
-                        ).replace('border="1"', 'border="0"', 1) \
-                         .replace("<td", '<td style="padding:8px 12px;"')
-
-                        results_html = f'<div style="overflow-x:auto;">{table_html}</div>'
-                        results_placeholder.markdown(results_html, unsafe_allow_html=True)
-
-                    asyncio.run(run_skupszop_search_async(
-                        p.BOOKS_CSV,
-                        p.SKUPSZOP_CSV,
-                        min_price=st.session_state.min_price,
-                        max_price=st.session_state.max_price,
-                        progress_callback=update_skupszop_progress,
-                        result_callback=update_skupszop_result
-                    ))
-
-
-                    if st.session_state.results_df.empty:
-                        progress_bar.empty()
-                        status_placeholder.warning(
-                            f"No books found under {st.session_state.max_price} PLN on SkupSzop."
-                        )
-                    else:
-                        progress_bar.empty()
-                        status_placeholder.success("Search ended")
-
-
-        except Exception as e:
-            status_placeholder.error(f"An error occurred: {e}")
-        finally:
-            st.session_state.running = False
+                    time.sleep(0.1)
+            finally:
+                results_table.flush()
+
+        st.session_state.job = None
+        progress_bar.empty()
+        if job.cache is not None:
+            st.caption(f"Search cache: {job.cache.hits} hits, {job.cache.misses} misses")
+        with st.expander("Run metrics"):
+            st.json(job.metrics.snapshot())
+
+        if job.status == FAILED:
+            status_placeholder.error(f"An error occurred: {job.error}")
+        elif job.status == CANCELLED:
+            status_placeholder.info(f"Search stopped ({len(results_table)} offers found)")
+        elif not job.books:
+            status_placeholder.warning("No books loaded")
+        elif not len(results_table):
+            status_placeholder.warning(
+                f"No books found under {st.session_state.max_price} PLN on SkupSzop."
+            )
+        else:
+            status_placeholder.success(f"Search ended ({job.books} books from Goodreads)")
+
+# results table: redrawn from the session on every rerun, one page at a time
+with col_right:
+    results_table = st.session_state.results_table
+    if results_table.pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=results_table.pages, value=min(results_table.page, results_table.pages))
+        results_table.draw(page=page)
+    else:
+        results_table.draw()